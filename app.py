@@ -1,18 +1,23 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, render_template_string, session
-import pandas as pd
+import time
+_import_started = time.perf_counter()
+from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, render_template_string, session, Response, stream_with_context
 from flask_cors import CORS
-import math
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from models import db, User, PlumberProfile, Booking, Review, APIKey
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, text
 from collections import defaultdict, Counter
-from attribute_system import DynamicAttributeSystem, AttributeCategory, AttributeDefinition, AttributeType
+from attribute_types import AttributeCategory, AttributeDefinition, AttributeType, ExpiredCursorError
+from startup import StartupTimings, Deferred, STARTUP_MODES, EAGER, BACKGROUND, load_warm_up_queries, replay_queries
+from facet_cache import FacetCache, profile_values
+from availability import parse_availability, parse_slot, is_available, slots_overlap
 import json
 import functools
+# pandas/numpy-backed modules are imported by build_matcher() and the routes that use them,
+# so that STARTUP_MODE=lazy or background can defer them
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)
@@ -30,21 +35,129 @@ login_manager.login_view = 'login'
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-# Initialize dynamic attribute system
-attribute_system = DynamicAttributeSystem()
-
-# Create tables if not exist
-with app.app_context():
-    db.create_all()
-
-# Load enhanced dataset
-try:
-    df = pd.read_csv('enhanced_plumbers_dataset.csv')
-    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
-except FileNotFoundError:
-    # Fallback to original dataset
-    df = pd.read_csv('gujarat_plumbers_dataset.csv')
-    print("Warning: Using original dataset. Enhanced dataset not found.")
+# Startup: eager builds the matcher at import, lazy on the first request that needs it,
+# background in a warm-up thread started at import
+STARTUP_MODE = os.environ.get('STARTUP_MODE', EAGER)
+if STARTUP_MODE not in STARTUP_MODES:
+    raise ValueError(f"STARTUP_MODE must be one of {list(STARTUP_MODES)}, got '{STARTUP_MODE}'")
+startup_timings = StartupTimings()
+
+def create_tables():
+    with startup_timings.phase('create_tables'):
+        with app.app_context():
+            db.create_all()
+    return True
+
+def load_catalog(attribute_system, path):
+    # Memory-map the compiled snapshot (python catalog_snapshot.py) unless it is missing or stale
+    if not attribute_system.load_compiled(path):
+        attribute_system.load_dataset(path)
+
+class Matcher:
+    """The attribute system with the registry and dataset reloader that keep it current"""
+    def __init__(self, attribute_system, attribute_registry, dataset_reloader):
+        self.attribute_system = attribute_system
+        self.attribute_registry = attribute_registry
+        self.dataset_reloader = dataset_reloader
+
+def build_matcher():
+    with startup_timings.phase('import_matcher'):
+        from attribute_system import DynamicAttributeSystem
+        from attribute_registry import AttributeRegistry
+        from match_cache import MatchCache
+        from dataset_reloader import DatasetReloader
+
+    database.resolve()
+    with startup_timings.phase('load_attributes'):
+        # Initialize dynamic attribute system
+        attribute_system = DynamicAttributeSystem()
+        attribute_system.match_cache = MatchCache(
+            max_entries=int(os.environ.get('MATCH_CACHE_SIZE', 1024)),
+            ttl_seconds=float(os.environ.get('MATCH_CACHE_TTL', 300)),
+            grid_degrees=float(os.environ.get('MATCH_CACHE_GRID_DEGREES', 0.005))
+        )
+        # Attribute definitions are shared through the database, so edits reach every worker
+        attribute_registry = AttributeRegistry(attribute_system,
+                                               min_interval_seconds=float(os.environ.get('ATTRIBUTE_SYNC_INTERVAL', 1)))
+        with app.app_context():
+            attribute_registry.load()
+
+    with startup_timings.phase('load_catalog'):
+        # Load enhanced dataset
+        try:
+            dataset_path = 'enhanced_plumbers_dataset.csv'
+            load_catalog(attribute_system, dataset_path)
+        except FileNotFoundError:
+            # Fallback to original dataset
+            dataset_path = 'gujarat_plumbers_dataset.csv'
+            load_catalog(attribute_system, dataset_path)
+            print("Warning: Using original dataset. Enhanced dataset not found.")
+
+        # Pick up edits to the dataset file without a restart (0 disables)
+        dataset_reloader = DatasetReloader(attribute_system, dataset_path,
+                                           min_interval_seconds=float(os.environ.get('DATASET_RELOAD_INTERVAL', 5)))
+
+    print(f"⏱️ Startup ({STARTUP_MODE}): {startup_timings.summary()}")
+    return Matcher(attribute_system, attribute_registry, dataset_reloader)
+
+database = Deferred(create_tables)
+matcher = Deferred(build_matcher)
+attribute_system = Deferred(lambda: matcher.resolve().attribute_system)
+attribute_registry = Deferred(lambda: matcher.resolve().attribute_registry)
+dataset_reloader = Deferred(lambda: matcher.resolve().dataset_reloader)
+# Dropdown values; catalog facets resolve the matcher only when first asked for
+facet_cache = Deferred(lambda: FacetCache(attribute_system,
+                                          min_interval_seconds=float(os.environ.get('FACET_SYNC_INTERVAL', 1))))
+
+# Recorded /api/v1/match bodies replayed before /readyz reports ready
+WARM_UP_QUERIES = os.environ.get('WARM_UP_QUERIES', 'warm_up_queries.json')
+
+def check_database():
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+
+def warm_up():
+    # Everything /readyz waits for
+    engine = matcher.resolve().attribute_system.get_engine()
+    with startup_timings.phase('warm_indexes'):
+        engine.warm_up()
+    with startup_timings.phase('check_database'):
+        check_database()
+    with startup_timings.phase('replay_queries'):
+        replayed = replay_queries(attribute_system, load_warm_up_queries(WARM_UP_QUERIES))
+    print(f"🔥 Warm after replaying {replayed} queries: {startup_timings.summary()}")
+    return True
+
+warm = Deferred(warm_up)
+
+# Probes must answer without touching the database or the catalog
+PROBE_ENDPOINTS = ('healthz', 'readyz')
+
+@app.before_request
+def ensure_tables():
+    if request.endpoint not in PROBE_ENDPOINTS:
+        database.resolve()
+
+@app.before_request
+def reload_dataset_if_changed():
+    if request.endpoint in PROBE_ENDPOINTS:
+        return
+    if matcher.ready and dataset_reloader.min_interval_seconds > 0:
+        try:
+            summary = dataset_reloader.maybe_reload()
+        except Exception as e:
+            # Keep serving the current catalog; the reload is retried on a later request
+            print(f"❌ Reloading {dataset_reloader.file_path} failed: {e}")
+            return
+        if summary:
+            print(f"🔄 Reloaded {dataset_reloader.file_path}: {summary}")
+
+@app.before_request
+def sync_attributes():
+    if request.endpoint in PROBE_ENDPOINTS:
+        return
+    if matcher.ready and attribute_registry.sync():
+        print(f"🔄 Attribute registry updated to version {attribute_registry.version}")
 
 # Custom Jinja2 filter to parse JSON strings
 @app.template_filter('from_json')
@@ -54,6 +167,39 @@ def from_json_filter(s):
     except Exception:
         return []
 
+# Largest number of preference objects accepted by /api/v1/match/batch
+MAX_BATCH_QUERIES = 500
+# Largest page of plumbers returned or streamed by one paginated match request
+MAX_PAGE_SIZE = 1000
+
+def result_count(value):
+    """A page_size or max_results from a request, capped at MAX_PAGE_SIZE; None unless it is a positive integer"""
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        return None
+    return min(count, MAX_PAGE_SIZE) if count >= 1 else None
+
+def wants_explanation(data):
+    """Whether the caller asked for per-attribute scores with ?explain=1 or "explain": true"""
+    value = request.args.get('explain', (data or {}).get('explain', False))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def tagged(response, facets):
+    """Tag a facet response with an ETag; answers 304 when the client already has this version"""
+    response.set_etag(facets.tag)
+    return response.make_conditional(request)
+
+def ndjson_response(results, next_cursor, total_found, annotate=None):
+    """Stream ranked plumbers as newline-delimited JSON, one per line, then a summary line"""
+    def generate():
+        for plumber in results:
+            if annotate:
+                annotate(plumber)
+            yield app.json.dumps({'plumber': plumber}) + '\n'
+        yield app.json.dumps({'next_cursor': next_cursor, 'total_found': total_found}) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # API Key Authentication Decorator
 def require_api_key(permissions=None):
     def decorator(f):
@@ -157,7 +303,7 @@ def api_create_attribute():
         )
         
         # Add to attribute system
-        attribute_system.add_attribute(attr_def)
+        attribute_registry.add(attr_def)
         
         return jsonify({
             'success': True,
@@ -199,7 +345,7 @@ def api_update_attribute(attr_name):
             existing_attr.unit = data['unit']
         
         # Update in attribute system
-        attribute_system.update_attribute(attr_name, existing_attr)
+        attribute_registry.update(attr_name, existing_attr)
         
         return jsonify({
             'success': True,
@@ -219,7 +365,7 @@ def api_delete_attribute(attr_name):
             return jsonify({'error': f'Attribute "{attr_name}" not found'}), 404
         
         # Delete from attribute system
-        attribute_system.remove_attribute(attr_name)
+        attribute_registry.remove(attr_name)
         
         return jsonify({
             'success': True,
@@ -254,7 +400,7 @@ def api_batch_update_attributes():
                     if 'description' in attr_data:
                         existing_attr.description = attr_data['description']
                     
-                    attribute_system.update_attribute(attr_name, existing_attr)
+                    attribute_registry.update(attr_name, existing_attr)
                     results.append({'name': attr_name, 'status': 'updated'})
                 else:
                     results.append({'name': attr_name, 'status': 'error', 'message': 'Attribute not found'})
@@ -276,30 +422,111 @@ def api_batch_update_attributes():
 @app.route('/api/v1/match', methods=['POST'])
 @require_api_key(['read_attributes', 'match_plumbers'])
 def api_match_plumbers():
-    """Match plumbers based on customer preferences"""
+    """Match plumbers based on customer preferences
+    
+    Sending page_size or a cursor returns one page plus a next_cursor for the
+    following page; "stream": true sends the page as newline-delimited JSON.
+    """
     try:
         data = request.json
+        cursor = data.get('cursor')
         
-        if 'preferences' not in data:
+        if 'preferences' not in data and not cursor:
             return jsonify({'error': 'Missing preferences object'}), 400
         
-        customer_preferences = data['preferences']
+        customer_preferences = data.get('preferences', {})
         max_results = data.get('max_results', 10)
+        radius_km = data.get('radius_km')
+        
+        if max_results is not None and result_count(max_results) is None:
+            return jsonify({'error': 'max_results must be a positive integer'}), 400
+        
+        if cursor or data.get('stream') or 'page_size' in data:
+            page_size = result_count(data.get('page_size', max_results or 10))
+            if page_size is None:
+                return jsonify({'error': 'page_size must be a positive integer'}), 400
+            results, next_cursor, total_found = attribute_system.match_plumbers_page(
+                customer_preferences, page_size=page_size, radius_km=radius_km, cursor=cursor,
+                explain=wants_explanation(data))
+            if data.get('stream'):
+                return ndjson_response(results, next_cursor, total_found)
+            response_data = {
+                'plumbers': list(results),
+                'total_found': total_found,
+                'next_cursor': next_cursor,
+                'preferences_used': list(customer_preferences.keys())
+            }
+            if wants_explanation(data) and not cursor:
+                response_data['plan'] = attribute_system.explain_query(customer_preferences, radius_km)
+            return jsonify({'success': True, 'data': response_data})
         
         # Use the dynamic attribute system to match plumbers
-        matched_plumbers = attribute_system.match_plumbers(customer_preferences, max_results=max_results)
+        matched_plumbers = attribute_system.match_plumbers(customer_preferences, max_results=max_results,
+                                                           radius_km=radius_km, explain=wants_explanation(data))
+        
+        response_data = {
+            'plumbers': matched_plumbers,
+            'total_found': len(matched_plumbers),
+            'preferences_used': list(customer_preferences.keys())
+        }
+        if wants_explanation(data):
+            response_data['plan'] = attribute_system.explain_query(customer_preferences, radius_km)
+        return jsonify({'success': True, 'data': response_data})
+    except ExpiredCursorError as e:
+        return jsonify({'error': str(e)}), 410
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/v1/match/batch', methods=['POST'])
+@require_api_key(['read_attributes', 'match_plumbers'])
+def api_match_plumbers_batch():
+    """Match plumbers for many customers in one request"""
+    try:
+        data = request.json
+        
+        if 'queries' not in data or not isinstance(data['queries'], list):
+            return jsonify({'error': 'Missing queries array'}), 400
+        if len(data['queries']) > MAX_BATCH_QUERIES:
+            return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
+        
+        preference_list = []
+        for query in data['queries']:
+            preferences = query.get('preferences') if isinstance(query, dict) else None
+            if not isinstance(preferences, dict):
+                return jsonify({'error': 'Every query needs a preferences object'}), 400
+            preference_list.append(preferences)
+        
+        max_results = data.get('max_results', 10)
+        matched = attribute_system.match_plumbers_batch(preference_list, max_results=max_results,
+                                                        explain=wants_explanation(data))
         
         return jsonify({
             'success': True,
             'data': {
-                'plumbers': matched_plumbers,
-                'total_found': len(matched_plumbers),
-                'preferences_used': list(customer_preferences.keys())
+                'results': [
+                    {
+                        'plumbers': matched_plumbers,
+                        'total_found': len(matched_plumbers),
+                        'preferences_used': list(preferences.keys())
+                    }
+                    for preferences, matched_plumbers in zip(preference_list, matched)
+                ],
+                'total_queries': len(preference_list)
             }
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/v1/match/cache', methods=['GET'])
+@require_api_key(['read_attributes'])
+def api_match_cache_stats():
+    """Get match cache hit/miss statistics"""
+    return jsonify({
+        'success': True,
+        'data': attribute_system.match_cache.stats(),
+        'version': attribute_system.version
+    })
+
 @app.route('/api/v1/attributes/export', methods=['GET'])
 @require_api_key(['read_attributes'])
 def api_export_attributes():
@@ -325,7 +552,7 @@ def api_import_attributes():
             return jsonify({'error': 'Missing attributes configuration'}), 400
         
         # Import configuration
-        attribute_system.import_configuration(data)
+        attribute_registry.import_configuration(data)
         
         return jsonify({
             'success': True,
@@ -417,17 +644,6 @@ def toggle_api_key(key_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Haversine formula to calculate distance between two lat/lon points in km
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
 # Pricing model: base price per work type
 WORK_TYPE_PRICING = {
     'leak repair': 300,
@@ -441,6 +657,38 @@ WORK_TYPE_PRICING = {
 def index():
     return redirect(url_for('login'))
 
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({
+        'status': 'alive',
+        'startup_mode': STARTUP_MODE,
+        'uptime_seconds': round(time.perf_counter() - _import_started, 1)
+    })
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: 200 once the catalog, its indexes, the attribute registry and the database are warm
+    
+    Until then it answers 503 and makes sure a warm-up is running.
+    """
+    if not warm.ready:
+        warm.warm_up()
+        return jsonify({'status': 'warming', 'startup_mode': STARTUP_MODE,
+                        'timings': startup_timings.as_dict()}), 503
+    try:
+        check_database()
+    except Exception as e:
+        return jsonify({'status': 'database unavailable', 'error': str(e)}), 503
+    return jsonify({
+        'status': 'ready',
+        'startup_mode': STARTUP_MODE,
+        'plumbers': len(attribute_system.get_store()),
+        'catalog_version': attribute_system.version,
+        'attribute_registry_version': attribute_registry.version,
+        'timings': startup_timings.as_dict()
+    })
+
 @app.route('/dynamic_booking')
 @login_required
 def dynamic_booking():
@@ -452,14 +700,24 @@ def dynamic_booking():
 @app.route('/api/time_slots')
 def api_time_slots():
     """API endpoint to get available time slots"""
-    time_slots = sorted(set(slot.strip() for slots in df['Free_Time_Slots'] for slot in str(slots).split(',')))
-    return jsonify({'time_slots': time_slots})
+    facets = facet_cache.catalog_facets()
+    return tagged(jsonify({'time_slots': facets.values['time_slots']}), facets)
 
 @app.route('/api/districts')
 def api_districts():
     """API endpoint to get available districts"""
-    districts = sorted(df['District'].unique())
-    return jsonify({'districts': districts})
+    facets = facet_cache.catalog_facets()
+    return tagged(jsonify({'districts': facets.values['locations']}), facets)
+
+@app.route('/api/facet_counts', methods=['POST'])
+def api_facet_counts():
+    """API endpoint to count the plumbers matching each filter option, given the preferences chosen so far"""
+    data = request.get_json(silent=True) or {}
+    customer_preferences = data.get('preferences', {})
+    if not isinstance(customer_preferences, dict):
+        return jsonify({'error': 'preferences must be an object'}), 400
+    counts = attribute_system.facet_counts(customer_preferences, radius_km=data.get('radius_km'))
+    return jsonify({'total_found': counts['total'], 'facets': counts['facets']})
 
 @app.route('/api/attribute_categories')
 def api_attribute_categories():
@@ -509,18 +767,21 @@ def api_dynamic_match_plumbers():
         
         # Add dynamic attributes
         for key, value in data.items():
-            if key not in ['date', 'time_slot', 'work_type', 'district', 'language', 'client_lat', 'client_lon']:
+            if key not in ['date', 'time_slot', 'work_type', 'district', 'language', 'client_lat', 'client_lon', 'radius_km',
+                           'max_results', 'page_size', 'cursor', 'stream', 'explain']:
                 if value and value != '':
                     customer_preferences[key] = value
         
         print(f"🎯 Customer preferences: {customer_preferences}")
         
         # Use the dynamic attribute system to match plumbers
-        matched_plumbers = attribute_system.match_plumbers(customer_preferences, max_results=20)
-        print(f"✅ Found {len(matched_plumbers)} plumbers")
+        radius_km = float(data['radius_km']) if data.get('radius_km') else None
+        max_results = result_count(data.get('max_results', 20))
+        if max_results is None:
+            return jsonify({'error': 'max_results must be a positive integer'}), 400
         
-        # Add additional information for display
-        for plumber in matched_plumbers:
+        def add_display_info(plumber):
+            """Add ETA and cost estimate for display"""
             # Calculate ETA
             if customer_preferences.get('client_lat') and customer_preferences.get('client_lon'):
                 distance = plumber.get('Distance_km', 0)
@@ -533,6 +794,25 @@ def api_dynamic_match_plumbers():
             cost_estimate = int(base_price + 10 * distance)
             plumber['cost_estimate'] = cost_estimate
         
+        if data.get('stream') or data.get('cursor'):
+            results, next_cursor, total_found = attribute_system.match_plumbers_page(
+                customer_preferences, page_size=max_results, radius_km=radius_km, cursor=data.get('cursor'),
+                explain=wants_explanation(data))
+            if data.get('stream'):
+                return ndjson_response(results, next_cursor, total_found, annotate=add_display_info)
+            matched_plumbers = list(results)
+            for plumber in matched_plumbers:
+                add_display_info(plumber)
+            return jsonify({'plumbers': matched_plumbers, 'total_found': total_found, 'next_cursor': next_cursor})
+        
+        matched_plumbers = attribute_system.match_plumbers(customer_preferences, max_results=max_results, radius_km=radius_km,
+                                                           explain=wants_explanation(data))
+        print(f"✅ Found {len(matched_plumbers)} plumbers")
+        
+        # Add additional information for display
+        for plumber in matched_plumbers:
+            add_display_info(plumber)
+        
         response_data = {
             'plumbers': matched_plumbers,
             'total_found': len(matched_plumbers)
@@ -540,6 +820,8 @@ def api_dynamic_match_plumbers():
         print(f"📤 Sending response with {len(matched_plumbers)} plumbers")
         return jsonify(response_data)
         
+    except ExpiredCursorError as e:
+        return jsonify({'error': str(e)}), 410
     except Exception as e:
         print(f"❌ Error in API: {str(e)}")
         import traceback
@@ -555,12 +837,12 @@ def api_confirm_booking():
         
         # Find the plumber by name
         plumber_name = data.get('plumber_name')
-        plumber_row = df[df['Name'] == plumber_name]
+        plumber_ids = attribute_system.get_store().find_by_name(plumber_name)
         
-        if plumber_row.empty:
+        if len(plumber_ids) == 0:
             return jsonify({'success': False, 'error': 'Plumber not found'})
         
-        plumber_data = plumber_row.iloc[0]
+        plumber_data = attribute_system.get_store().record(int(plumber_ids[0]))
         
         # Create booking
         booking = Booking(
@@ -589,21 +871,54 @@ def find_plumbers():
     work_type = data.get('work_type')
     time_slot = data.get('time_slot')
     language = data.get('language')
-    client_lat = float(data.get('client_lat'))
-    client_lon = float(data.get('client_lon'))
+    try:
+        client_lat = float(data.get('client_lat'))
+        client_lon = float(data.get('client_lon'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'client_lat and client_lon must be numbers'}), 400
+    radius_km = data.get('radius_km')
+    if radius_km:
+        try:
+            radius_km = float(radius_km)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'radius_km must be a number'}), 400
+        if not radius_km > 0:
+            return jsonify({'error': 'radius_km must be greater than 0'}), 400
+    import numpy as np
+    from geo import HAVERSINE, METHODS
+    from plumber_store import intersect_postings
+    distance_method = data.get('distance_method', HAVERSINE)
+    if not isinstance(distance_method, str) or distance_method not in METHODS:
+        return jsonify({'error': f'distance_method must be one of {list(METHODS)}'}), 400
+    try:
+        requested = parse_slot(time_slot) if time_slot else None
+        day = datetime.strptime(data['date'], '%Y-%m-%d').weekday() if data.get('date') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    filtered = df[df['District'] == location]
-    filtered = filtered[filtered['Work_Specialization'] == work_type]
-    filtered = filtered[filtered['Free_Time_Slots'].str.contains(time_slot)]
+    # Intersect the posting lists of each filter, smallest first
+    engine = attribute_system.get_engine()
+    store = engine.store
+    posting_lists = [
+        store.lookup('District', location),
+        store.lookup('Work_Specialization', work_type),
+    ]
+    if requested is not None:
+        # Plumbers free for the whole slot, on that weekday if a date was given
+        posting_lists.append(np.flatnonzero(engine.availability.available(requested, day)))
     if language and language != 'Any':
-        filtered = filtered[filtered['Languages_Spoken'].str.contains(language)]
+        posting_lists.append(store.lookup_contains('Languages_Spoken', language))
+    if radius_km:
+        nearby, _ = engine.spatial_index.within(client_lat, client_lon, radius_km, distance_method)
+        posting_lists.append(nearby)
+    matches = intersect_postings(*posting_lists)
 
     # Calculate distance and ETA for each plumber
+    plumber_distances = engine.distances(client_lat, client_lon, matches, distance_method)
     plumbers = []
-    for _, row in filtered.iterrows():
-        dist = haversine(client_lat, client_lon, row['Latitude'], row['Longitude'])
+    for idx, dist in zip(matches.tolist(), plumber_distances.tolist()):
         eta = dist / 40 * 60  # 40 km/h, ETA in minutes
-        plumber = row.to_dict()
+        plumber = store.record(idx)
         plumber['Distance_km'] = round(dist, 2)
         plumber['ETA_min'] = int(round(eta))
         plumbers.append(plumber)
@@ -612,16 +927,8 @@ def find_plumbers():
 
 @app.route('/options', methods=['GET'])
 def get_options():
-    locations = sorted(df['District'].unique())
-    work_types = sorted(df['Work_Specialization'].unique())
-    time_slots = sorted(set(slot.strip() for slots in df['Free_Time_Slots'] for slot in str(slots).split(',')))
-    languages = sorted(set(lang.strip() for langs in df['Languages_Spoken'] for lang in str(langs).split(',')))
-    return jsonify({
-        'locations': locations,
-        'work_types': work_types,
-        'time_slots': time_slots,
-        'languages': languages
-    })
+    facets = facet_cache.catalog_facets()
+    return tagged(jsonify(facets.values), facets)
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -633,6 +940,12 @@ def register():
         if User.query.filter_by(email=email).first():
             flash('Email already registered.', 'danger')
             return render_template('register.html')
+        if role == 'plumber':
+            try:
+                parse_availability(request.form.get('free_time_slots'))
+            except ValueError as e:
+                flash(str(e), 'danger')
+                return render_template('register.html')
         user = User(
             name=name,
             email=email,
@@ -653,12 +966,11 @@ def register():
                 district=district,
                 specialization=specialization,
                 languages=languages,
-                free_time_slots=free_time_slots,
                 lat=float(lat) if lat else None,
                 lon=float(lon) if lon else None
             )
-            db.session.add(plumber_profile)
-            db.session.commit()
+            plumber_profile.set_free_time_slots(free_time_slots)
+            facet_cache.save_profile(plumber_profile)
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
     return render_template('register.html')
@@ -698,16 +1010,28 @@ def customer_dashboard():
         return redirect(url_for('login'))
     # Get bookings for this customer
     bookings = Booking.query.filter_by(customer_id=current_user.id).order_by(Booking.date.desc()).all()
+    plumbers = [PlumberProfile.query.get(b.plumber_id) for b in bookings]
+    # Distances for every booking with both locations known, in one call
+    located = [i for i, (b, plumber) in enumerate(zip(bookings, plumbers))
+               if b.client_lat is not None and b.client_lon is not None
+               and plumber and plumber.lat is not None and plumber.lon is not None]
+    booking_distances = {}
+    if located:
+        import numpy as np
+        from geo import distances
+        booking_distances = dict(zip(located, distances(
+            np.array([bookings[i].client_lat for i in located], dtype=float),
+            np.array([bookings[i].client_lon for i in located], dtype=float),
+            np.array([plumbers[i].lat for i in located], dtype=float),
+            np.array([plumbers[i].lon for i in located], dtype=float)
+        ).tolist()))
     booking_list = []
-    for b in bookings:
-        plumber = PlumberProfile.query.get(b.plumber_id)
+    for i, (b, plumber) in enumerate(zip(bookings, plumbers)):
         review = Review.query.filter_by(booking_id=b.id).first()
         # Cost estimate logic
         work_type_norm = (b.service_type or '').strip().lower()
         base_price = WORK_TYPE_PRICING.get(work_type_norm, 400)
-        dist = None
-        if b.client_lat is not None and b.client_lon is not None and plumber and plumber.lat is not None and plumber.lon is not None:
-            dist = haversine(b.client_lat, b.client_lon, plumber.lat, plumber.lon)
+        dist = booking_distances.get(i)
         if dist is not None:
             cost_estimate = int(base_price + 10 * dist)
         else:
@@ -864,15 +1188,25 @@ def book_plumber():
         client_lat = float(request.form['client_lat'])
         client_lon = float(request.form['client_lon'])
         plumber = PlumberProfile.query.get(plumber_id)
-        # Double-check plumber is available (atomic)
-        already_booked = Booking.query.filter_by(plumber_id=plumber_id, date=date, time_slot=time_slot).with_for_update().first()
-        if already_booked:
+        booking_date = datetime.strptime(date, '%Y-%m-%d').date()
+        try:
+            requested = parse_slot(time_slot)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('book_plumber'))
+        weekly = plumber.weekly_availability()
+        if weekly is not None and not is_available(weekly, requested, booking_date.weekday()):
+            flash('Plumber is not available at that time.', 'danger')
+            return redirect(url_for('book_plumber'))
+        # Double-check plumber is available (atomic); bookings clash when their slots overlap
+        booked = Booking.query.filter_by(plumber_id=plumber_id, date=booking_date).with_for_update().all()
+        if any(slots_overlap(time_slot, b.time_slot) for b in booked):
             flash('Plumber is no longer available for this slot.', 'danger')
             return redirect(url_for('book_plumber'))
         booking = Booking(
             customer_id=current_user.id,
             plumber_id=plumber_id,
-            date=datetime.strptime(date, '%Y-%m-%d').date(),
+            date=booking_date,
             time_slot=time_slot,
             status='pending',
             service_type=work_type,
@@ -888,10 +1222,9 @@ def book_plumber():
         flash('Booking created! Await plumber confirmation.', 'success')
         return redirect(url_for('customer_dashboard'))
     # GET: just render the booking page
-    work_types = sorted(set(p.specialization for p in PlumberProfile.query.all() if p.specialization))
-    time_slots = sorted(set(slot.strip() for p in PlumberProfile.query.all() for slot in (p.free_time_slots or '').split(',') if slot.strip()))
-    languages = sorted(set(lang.strip() for p in PlumberProfile.query.all() for lang in (p.languages or '').split(',') if lang.strip()))
-    return render_template('book_plumber.html', work_types=work_types, time_slots=time_slots, languages=languages, plumbers=None, form_data=None)
+    facets = facet_cache.profile_facets().values
+    return render_template('book_plumber.html', work_types=facets['work_types'], time_slots=facets['time_slots'],
+                           languages=facets['languages'], plumbers=None, form_data=None)
 
 @app.route('/cancel_booking/<int:booking_id>', methods=['POST'])
 @login_required
@@ -1023,8 +1356,13 @@ def update_availability():
         flash('No plumber profile found.', 'danger')
         return redirect(url_for('logout'))
     free_time_slots = request.form['free_time_slots']
-    plumber_profile.free_time_slots = free_time_slots
-    db.session.commit()
+    previous = profile_values(plumber_profile)
+    try:
+        plumber_profile.set_free_time_slots(free_time_slots)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('plumber_dashboard'))
+    facet_cache.save_profile(plumber_profile, previous)
     flash('Availability updated.', 'success')
     return redirect(url_for('plumber_dashboard'))
 
@@ -1060,17 +1398,18 @@ def create_sample_plumbers():
                 district=p["district"],
                 specialization=p["specialization"],
                 languages=p["languages"],
-                free_time_slots=p["free_time_slots"],
                 lat=p["lat"],
                 lon=p["lon"]
             )
-            db.session.add(plumber_profile)
+            plumber_profile.set_free_time_slots(p["free_time_slots"])
+            facet_cache.save_profile(plumber_profile)
     db.session.commit()
 
 # Flask CLI command to populate sample plumbers
 @app.cli.command("create-sample-plumbers")
 def create_sample_plumbers_command():
     """Populate the database with 10-15 sample plumbers."""
+    database.resolve()
     with app.app_context():
         create_sample_plumbers()
     print("Sample plumbers created.")
@@ -1127,20 +1466,8 @@ def get_attributes():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        from attribute_system import DynamicAttributeSystem
-        attr_system = DynamicAttributeSystem()
-        
-        # Load dataset if not already loaded
-        try:
-            # Try to load enhanced dataset first
-            attr_system.load_dataset('enhanced_plumbers_dataset.csv')
-        except FileNotFoundError:
-            try:
-                # Fallback to original dataset
-                attr_system.load_dataset('gujarat_plumbers_dataset.csv')
-            except FileNotFoundError:
-                # If no dataset is available, still return attributes (they exist in the system)
-                pass
+        # The shared system already holds the dataset; don't re-read the CSV per request
+        attr_system = attribute_system
         
         attributes = attr_system.get_available_attributes()
         
@@ -1171,20 +1498,8 @@ def get_attribute(attr_name):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        from attribute_system import DynamicAttributeSystem
-        attr_system = DynamicAttributeSystem()
-        
-        # Load dataset if not already loaded
-        try:
-            # Try to load enhanced dataset first
-            attr_system.load_dataset('enhanced_plumbers_dataset.csv')
-        except FileNotFoundError:
-            try:
-                # Fallback to original dataset
-                attr_system.load_dataset('gujarat_plumbers_dataset.csv')
-            except FileNotFoundError:
-                # If no dataset is available, still return attributes (they exist in the system)
-                pass
+        # The shared system already holds the dataset; don't re-read the CSV per request
+        attr_system = attribute_system
         
         attributes = attr_system.get_available_attributes()
         
@@ -1215,8 +1530,6 @@ def add_attribute():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        attr_system = DynamicAttributeSystem()
-        
         # Get form data
         name = request.form.get('name').strip()
         category = request.form.get('category')
@@ -1269,11 +1582,11 @@ def add_attribute():
             unit=unit if unit else None
         )
         
-        # Add to attribute system
-        attr_system.attributes[name] = attr_def
+        # Add to the shared registry, which also persists it
+        if attribute_system.get_attribute(name) is not None:
+            return jsonify({'error': f'Attribute "{name}" already exists'}), 400
+        attribute_registry.add(attr_def)
         
-        # Save to persistent storage (you might want to implement this)
-        # For now, we'll just return success
         session['admin_notification'] = f'Attribute "{name}" added successfully!'
         
         return jsonify({'success': True, 'message': f'Attribute "{name}" added successfully'})
@@ -1288,8 +1601,6 @@ def update_attribute():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        attr_system = DynamicAttributeSystem()
-        
         # Get form data
         name = request.form.get('name').strip()
         category = request.form.get('category')
@@ -1330,7 +1641,7 @@ def update_attribute():
             return jsonify({'error': 'Weight must be between 0 and 2'}), 400
         
         # Update attribute definition
-        if name not in attr_system.attributes:
+        if attribute_system.get_attribute(name) is None:
             return jsonify({'error': 'Attribute not found'}), 404
         
         attr_def = AttributeDefinition(
@@ -1345,7 +1656,7 @@ def update_attribute():
             unit=unit if unit else None
         )
         
-        attr_system.attributes[name] = attr_def
+        attribute_registry.update(name, attr_def)
         
         session['admin_notification'] = f'Attribute "{name}" updated successfully!'
         
@@ -1361,15 +1672,13 @@ def delete_attribute():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        attr_system = DynamicAttributeSystem()
-        
         data = request.get_json()
         name = data.get('name')
         
         if not name:
             return jsonify({'error': 'Attribute name is required'}), 400
         
-        if name not in attr_system.attributes:
+        if attribute_system.get_attribute(name) is None:
             return jsonify({'error': 'Attribute not found'}), 404
         
         # Check if it's a core attribute that shouldn't be deleted
@@ -1378,7 +1687,7 @@ def delete_attribute():
             return jsonify({'error': f'Cannot delete core attribute "{name}"'}), 400
         
         # Remove the attribute
-        del attr_system.attributes[name]
+        attribute_registry.remove(name)
         
         session['admin_notification'] = f'Attribute "{name}" deleted successfully!'
         
@@ -1394,20 +1703,8 @@ def attribute_stats():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        from attribute_system import DynamicAttributeSystem
-        attr_system = DynamicAttributeSystem()
-        
-        # Load dataset if not already loaded
-        try:
-            # Try to load enhanced dataset first
-            attr_system.load_dataset('enhanced_plumbers_dataset.csv')
-        except FileNotFoundError:
-            try:
-                # Fallback to original dataset
-                attr_system.load_dataset('gujarat_plumbers_dataset.csv')
-            except FileNotFoundError:
-                # If no dataset is available, still return attributes (they exist in the system)
-                pass
+        # The shared system already holds the dataset; don't re-read the CSV per request
+        attr_system = attribute_system
         
         attributes = attr_system.get_available_attributes()
         
@@ -1457,15 +1754,9 @@ def import_attributes():
         if not data or 'attributes' not in data:
             return jsonify({'error': 'Invalid configuration format'}), 400
         
-        from attribute_system import DynamicAttributeSystem, AttributeDefinition, AttributeCategory, AttributeType
-        
-        attr_system = DynamicAttributeSystem()
-        
         # Clear existing attributes (except core ones)
         core_attributes = ['work_type', 'district', 'language']
-        attributes_to_remove = [name for name in attr_system.attributes.keys() if name not in core_attributes]
-        for name in attributes_to_remove:
-            del attr_system.attributes[name]
+        attributes = {name: attr for name, attr in attribute_system.attributes.items() if name in core_attributes}
         
         # Import new attributes
         imported_count = 0
@@ -1487,13 +1778,15 @@ def import_attributes():
                     unit=attr_data.get('unit')
                 )
                 
-                attr_system.attributes[attr_data['name']] = attr_def
+                attributes[attr_data['name']] = attr_def
                 imported_count += 1
                 
             except Exception as e:
                 print(f"Error importing attribute {attr_data.get('name', 'unknown')}: {str(e)}")
                 continue
         
+        attribute_registry.replace(attributes)
+        
         session['admin_notification'] = f'Successfully imported {imported_count} attributes!'
         
         return jsonify({
@@ -1512,25 +1805,33 @@ def reset_attributes():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        from attribute_system import DynamicAttributeSystem
-        
-        # Create a fresh attribute system instance
-        attr_system = DynamicAttributeSystem()
-        
         # The _initialize_attributes method will restore default configuration
-        attr_system.attributes = attr_system._initialize_attributes()
+        attribute_registry.replace(attribute_system._initialize_attributes())
         
         session['admin_notification'] = 'Attribute system reset to default configuration!'
         
         return jsonify({
             'success': True, 
             'message': 'Attribute system reset to default configuration',
-            'total_attributes': len(attr_system.attributes)
+            'total_attributes': len(attribute_system.attributes)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/admin/reload_dataset', methods=['POST'])
+@login_required
+def reload_dataset():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        summary = dataset_reloader.reload()
+        session['admin_notification'] = f'Plumber dataset reloaded ({summary["mode"]})!'
+        return jsonify({'success': True, 'reload': summary})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/admin/test_attribute_system', methods=['POST'])
 @login_required
 def test_attribute_system():
@@ -1538,8 +1839,6 @@ def test_attribute_system():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        from attribute_system import DynamicAttributeSystem
-        
         # Get test parameters
         customer_preferences = {}
         
@@ -1562,24 +1861,13 @@ def test_attribute_system():
             customer_preferences['client_lat'] = float(request.form.get('client_lat'))
             customer_preferences['client_lon'] = float(request.form.get('client_lon'))
         
-        # Test the attribute system
-        attr_system = DynamicAttributeSystem()
-        
-        # Load dataset if not already loaded
-        try:
-            # Try to load enhanced dataset first
-            attr_system.load_dataset('enhanced_plumbers_dataset.csv')
-        except FileNotFoundError:
-            try:
-                # Fallback to original dataset
-                attr_system.load_dataset('gujarat_plumbers_dataset.csv')
-            except FileNotFoundError:
-                return jsonify({'error': 'No plumber dataset found. Please ensure either enhanced_plumbers_dataset.csv or gujarat_plumbers_dataset.csv is available.'}), 400
+        # Test the shared attribute system, which already holds the dataset
+        attr_system = attribute_system
         
         matched_plumbers = attr_system.match_plumbers(customer_preferences, max_results=10)
         
-        # Generate test report
-        report = attr_system.generate_matching_report(customer_preferences, matched_plumbers)
+        # Report over every matching plumber in the catalog, not just the top 10
+        report = attr_system.generate_matching_report(customer_preferences)
         
         # Format results for display
         results_html = f"""
@@ -1592,7 +1880,7 @@ def test_attribute_system():
         
         <div class="mb-3">
             <h6 class="text-success">Matching Results:</h6>
-            <p><strong>Total Plumbers Found:</strong> {len(matched_plumbers)}</p>
+            <p><strong>Total Plumbers Found:</strong> {report['total_plumbers_found']}</p>
             <p><strong>Average Match Score:</strong> {report.get('average_score', 0):.2f}</p>
             <p><strong>Best Match Score:</strong> {report.get('best_score', 0):.2f}</p>
         </div>
@@ -1618,7 +1906,7 @@ def test_attribute_system():
                         <tr>
                             <td>{i}</td>
                             <td>{plumber.get('Name', 'N/A')}</td>
-                            <td><span class="badge bg-success">{plumber.get('match_score', 0):.2f}</span></td>
+                            <td><span class="badge bg-success">{plumber.get('Match_Score', 0):.2f}</span></td>
                             <td>{plumber.get('District', 'N/A')}</td>
                             <td>{plumber.get('Work_Specialization', 'N/A')}</td>
                         </tr>
@@ -1635,8 +1923,10 @@ def test_attribute_system():
             <ul class="list-unstyled">
         """
         
-        for attr_name, score_info in report.get('attribute_scores', {}).items():
-            results_html += f'<li><strong>{attr_name}:</strong> {score_info.get("average_score", 0):.2f}</li>'
+        for attr_name, score_info in report['attribute_analysis'].items():
+            results_html += (f'<li><strong>{attr_name}:</strong> {score_info["average_score"]:.2f} '
+                             f'(min {score_info["min_score"]:.2f}, median {score_info["p50"]:.2f}, '
+                             f'max {score_info["max_score"]:.2f})</li>')
         
         results_html += """
             </ul>
@@ -1646,13 +1936,19 @@ def test_attribute_system():
         return jsonify({
             'success': True,
             'results': results_html,
-            'total_matches': len(matched_plumbers),
+            'total_matches': report['total_plumbers_found'],
             'average_score': report.get('average_score', 0)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+startup_timings.record('import_app', time.perf_counter() - _import_started)
+if STARTUP_MODE == EAGER:
+    warm.resolve()
+elif STARTUP_MODE == BACKGROUND:
+    warm.warm_up()
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5001))
@@ -0,0 +1,221 @@
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, Callable, Tuple
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import db, AttributeRecord, AttributeRegistryVersion
+from attribute_types import (AttributeDefinition, AttributeCategory, AttributeType, definition_values,
+                             definitions_from_configuration)
+
+# Tries at one registry write while other workers keep committing in between
+WRITE_ATTEMPTS = 5
+
+
+def to_record(attribute_name: str, attr: AttributeDefinition, position: int) -> AttributeRecord:
+    """Database row for one attribute definition"""
+    return AttributeRecord(
+        name=attribute_name,
+        position=position,
+        display_name=attr.name,
+        category=attr.category.value,
+        type=attr.type.value,
+        weight=attr.weight,
+        description=attr.description,
+        possible_values=json.dumps(attr.possible_values) if attr.possible_values is not None else None,
+        min_value=attr.min_value,
+        max_value=attr.max_value,
+        unit=attr.unit
+    )
+
+
+def from_record(record: AttributeRecord) -> AttributeDefinition:
+    """Attribute definition stored in one database row"""
+    return AttributeDefinition(
+        name=record.display_name,
+        category=AttributeCategory(record.category),
+        type=AttributeType(record.type),
+        weight=record.weight,
+        description=record.description or '',
+        possible_values=json.loads(record.possible_values) if record.possible_values is not None else None,
+        min_value=record.min_value,
+        max_value=record.max_value,
+        unit=record.unit
+    )
+
+
+def _stored_values(attr: AttributeDefinition) -> Dict[str, Any]:
+    """What to_record() keeps of a definition, comparable across mutable and frozen ones"""
+    values = definition_values(attr)
+    if values['possible_values'] is not None:
+        values['possible_values'] = list(values['possible_values'])
+    return values
+
+
+class AttributeRegistry:
+    """Attribute definitions persisted in SQLite and shared by every worker
+
+    Reads are served by the DynamicAttributeSystem in memory.  Every write
+    re-reads the stored definitions, applies the edit to them and stores
+    the changed rows in the same transaction as a compare-and-swap bump of
+    the registry version; only once that commits is the result published
+    in memory.
+    sync() compares the stored version with the one loaded and reloads the
+    definitions when another worker has written since.  Must be used
+    inside an application context.
+    """
+
+    def __init__(self, attribute_system, min_interval_seconds: float = 1.0):
+        self.attribute_system = attribute_system
+        self.min_interval_seconds = min_interval_seconds
+        self.version = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _version_row(self) -> AttributeRegistryVersion:
+        row = db.session.get(AttributeRegistryVersion, 1)
+        if row is None:
+            row = AttributeRegistryVersion(id=1, version=0)
+            db.session.add(row)
+        return row
+
+    def _read(self) -> Tuple[Dict[str, AttributeDefinition], int]:
+        """Stored definitions in order and the version they belong to"""
+        version = self._version_row().version
+        records = AttributeRecord.query.order_by(AttributeRecord.position).all()
+        return {record.name: from_record(record) for record in records}, version
+
+    def _load(self):
+        try:
+            attributes, version = self._read()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.attribute_system.attributes = attributes
+        self.version = version
+        self._last_check = time.monotonic()
+
+    def load(self):
+        """Read the definitions from the database, seeding it with the current ones if empty"""
+        with self._lock:
+            if AttributeRecord.query.first() is None:
+                current = dict(self.attribute_system.attributes)
+                self._change(lambda attributes: attributes.update(current))
+            else:
+                self._load()
+
+    def sync(self) -> bool:
+        """Reload if another worker wrote since the last load, at most once per min_interval_seconds"""
+        now = time.monotonic()
+        if now - self._last_check < self.min_interval_seconds:
+            return False
+        self._last_check = now
+        row = db.session.get(AttributeRegistryVersion, 1)
+        version = row.version if row is not None else None
+        db.session.commit()
+        if version is None or version == self.version:
+            return False
+        self.load()
+        return True
+
+    def _claim_version(self, version: int) -> bool:
+        """Move the stored version from version to version + 1, unless another worker already moved it"""
+        result = db.session.execute(
+            update(AttributeRegistryVersion)
+            .where(AttributeRegistryVersion.id == 1, AttributeRegistryVersion.version == version)
+            .values(version=version + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def _change(self, edit: Callable[[Dict[str, AttributeDefinition]], None]):
+        """Apply edit to the stored definitions, store what changed with a version bump, then publish
+
+        Called with the lock held.  The edit works on a fresh copy of the
+        stored definitions, and the version is bumped with a compare-and-swap
+        before any row is written: if another worker committed since the
+        read, nothing is written and the edit is applied again to its
+        result.  Memory is left untouched when the edit raises or the commit
+        fails.
+        """
+        for _ in range(WRITE_ATTEMPTS):
+            try:
+                stored, version = self._read()
+                attributes = dict(stored)
+                edit(attributes)
+                # Taking the write lock here keeps other writers out until the commit
+                if not self._claim_version(version):
+                    db.session.rollback()
+                    continue
+                stored_positions = {name: i for i, name in enumerate(stored)}
+                for attribute_name in stored:
+                    if attribute_name not in attributes:
+                        AttributeRecord.query.filter_by(name=attribute_name).delete()
+                for position, (attribute_name, attr) in enumerate(attributes.items()):
+                    if attribute_name not in stored or _stored_values(stored[attribute_name]) != _stored_values(attr) \
+                            or stored_positions[attribute_name] != position:
+                        db.session.merge(to_record(attribute_name, attr, position))
+                db.session.commit()
+            except IntegrityError:
+                # Another worker created the version row first
+                db.session.rollback()
+                continue
+            except Exception:
+                db.session.rollback()
+                raise
+            self.attribute_system.attributes = attributes
+            self.version = version + 1
+            self._last_check = time.monotonic()
+            return
+        raise RuntimeError("Attribute registry kept changing during the write, try again")
+
+    def add(self, attr_def: AttributeDefinition, attribute_name: str = None):
+        """Add an attribute, keyed by its name unless attribute_name is given"""
+        attribute_name = attribute_name or attr_def.name
+
+        def edit(attributes):
+            if attribute_name in attributes:
+                raise ValueError(f"Attribute '{attribute_name}' already exists")
+            attributes[attribute_name] = attr_def
+
+        with self._lock:
+            self._change(edit)
+
+    def update(self, attribute_name: str, attr_def: AttributeDefinition):
+        """Replace an existing attribute definition"""
+        def edit(attributes):
+            if attribute_name not in attributes:
+                raise KeyError(f"Attribute '{attribute_name}' not found")
+            attributes[attribute_name] = attr_def
+
+        with self._lock:
+            self._change(edit)
+
+    def remove(self, attribute_name: str):
+        """Remove an attribute"""
+        def edit(attributes):
+            if attribute_name not in attributes:
+                raise KeyError(f"Attribute '{attribute_name}' not found")
+            del attributes[attribute_name]
+
+        with self._lock:
+            self._change(edit)
+
+    def replace(self, attributes: Dict[str, AttributeDefinition]):
+        """Swap in a whole new set of attribute definitions"""
+        replacement = dict(attributes)
+
+        def edit(attributes):
+            attributes.clear()
+            attributes.update(replacement)
+
+        with self._lock:
+            self._change(edit)
+
+    def import_configuration(self, config: Dict[str, Any]):
+        """Add or replace attributes from export_configuration() output or a list of definitions"""
+        imported = definitions_from_configuration(config)
+        with self._lock:
+            self._change(lambda attributes: attributes.update(imported))
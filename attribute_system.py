@@ -1,44 +1,142 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Any
-from dataclasses import dataclass
-from enum import Enum
-import math
+from typing import Dict, List, Tuple, Any, Iterator
+from types import MappingProxyType
+import json
+import base64
+import secrets
+import threading
+from plumber_store import PlumberStore
+from scoring_engine import ScoringEngine, Ranking, REPORT_PERCENTILES, score_statistics
+from match_cache import MatchCache, copy_results
+from catalog_snapshot import load_snapshot, snapshot_path
+from catalog_schema import read_catalog
+from attribute_types import (ExpiredCursorError, AttributeType, AttributeCategory, AttributeDefinition,
+                             FrozenAttributeDefinition, definition_values, definitions_from_configuration)
 
-class AttributeType(Enum):
-    """Types of attributes for matching"""
-    REQUIRED = "required"
-    PREFERRED = "preferred"
-    OPTIONAL = "optional"
-    NEGATIVE = "negative"  # Attributes that reduce score
+# Map attribute names to actual column names in the dataset
+ATTRIBUTE_COLUMNS = {
+    'work_type': 'Work_Specialization',
+    'district': 'District',
+    'language': 'Languages_Spoken',
+    'experience_years': 'Experience_Years',
+    'license_type': 'License_Type',
+    'insurance_status': 'Insurance_Status',
+    'specialization_level': 'Specialization_Level',
+    'response_time': 'Response_Time_Minutes',
+    'max_distance': 'Max_Distance_km',
+    'weekend_available': 'Weekend_Available',
+    'emergency_service': 'Emergency_Service',
+    'min_rating': 'Rating',
+    'min_success_rate': 'Success_Rate',
+    'guarantee_period': 'Guarantee_Period_Days',
+    'max_cost': 'Min_Order_Value',
+    'payment_methods': 'Payment_Methods',
+    'required_equipment': 'Equipment_Available',
+    'certifications': 'Certifications'
+}
 
-class AttributeCategory(Enum):
-    """Categories of attributes"""
-    BASIC = "basic"
-    PROFESSIONAL = "professional"
-    LOGISTICAL = "logistical"
-    QUALITY = "quality"
-    FINANCIAL = "financial"
+def copy_attribute(attr: AttributeDefinition) -> AttributeDefinition:
+    """Mutable copy of an attribute definition that shares no mutable state with it"""
+    values = definition_values(attr)
+    if values['possible_values'] is not None:
+        values['possible_values'] = list(values['possible_values'])
+    return AttributeDefinition(**values)
 
-@dataclass
-class AttributeDefinition:
-    """Definition of an attribute for matching"""
-    name: str
-    category: AttributeCategory
-    type: AttributeType
-    weight: float
-    description: str
-    possible_values: List[str] = None
-    min_value: float = None
-    max_value: float = None
-    unit: str = None
+def freeze_attribute(attr: AttributeDefinition) -> FrozenAttributeDefinition:
+    """Read-only copy of an attribute definition, for publishing in a snapshot"""
+    if isinstance(attr, FrozenAttributeDefinition):
+        return attr
+    return FrozenAttributeDefinition(**definition_values(attr))
+
+class MatcherSnapshot:
+    """Everything a match reads, published as one immutable unit
+    
+    Writers never modify a snapshot; they build a new one and swap it in.
+    A reader takes the current snapshot once and uses only that object, so
+    it sees either all of an update or none of it, without locking.  The
+    attribute mapping is read-only and holds frozen copies of the
+    definitions.
+    """
+    
+    __slots__ = ('_df', 'store', 'engine', 'attributes', 'version')
+    
+    def __init__(self, df: pd.DataFrame, store: PlumberStore, engine: ScoringEngine,
+                 attributes: Dict[str, AttributeDefinition], version: int):
+        self._df = df
+        self.store = store
+        self.engine = engine
+        self.attributes = attributes
+        self.version = version
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """The catalog as a DataFrame, rebuilt from the store on first use after loading a compiled snapshot"""
+        if self._df is None and self.store is not None:
+            self._df = self.store.to_frame()
+        return self._df
+    
+    def require_dataset(self):
+        if self.store is None:
+            raise ValueError("Dataset not loaded. Call load_dataset() first.")
 
 class DynamicAttributeSystem:
     """Dynamic attribute system for plumber matching"""
     
     def __init__(self):
-        self.attributes = self._initialize_attributes()
-        self.df = None
+        self.match_cache = MatchCache()
+        # Rankings behind open pagination cursors, keyed by ranking id
+        self.rankings = MatchCache(max_entries=256, ttl_seconds=600)
+        # Serializes writers; readers only read self._snapshot
+        self._lock = threading.RLock()
+        self._snapshot = MatcherSnapshot(None, None, None, self._frozen(self._initialize_attributes()), 0)
+    
+    @property
+    def snapshot(self) -> MatcherSnapshot:
+        """The current matcher state"""
+        return self._snapshot
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._snapshot.df
+    
+    @property
+    def store(self) -> PlumberStore:
+        return self._snapshot.store
+    
+    @property
+    def version(self) -> int:
+        """Bumped whenever the dataset or the attribute definitions change"""
+        return self._snapshot.version
+    
+    @property
+    def attributes(self) -> Dict[str, AttributeDefinition]:
+        """Read-only view of the current attribute definitions"""
+        return self._snapshot.attributes
+    
+    @attributes.setter
+    def attributes(self, attributes: Dict[str, AttributeDefinition]):
+        with self._lock:
+            self._publish(attributes=self._frozen(attributes))
+    
+    @staticmethod
+    def _frozen(attributes: Dict[str, AttributeDefinition]) -> Dict[str, AttributeDefinition]:
+        return MappingProxyType({name: freeze_attribute(attr) for name, attr in attributes.items()})
+    
+    def _publish(self, **changes: Any):
+        """Swap in a snapshot with some fields replaced and a new version; callers hold self._lock"""
+        current = self._snapshot
+        fields = {'df': current._df, 'store': current.store, 'engine': current.engine,
+                  'attributes': current.attributes}
+        fields.update(changes)
+        fields['version'] = current.version + 1
+        if 'attributes' in changes and fields['engine'] is not None:
+            fields['engine'].precompute_tier_tables(fields['attributes'])
+        self._snapshot = MatcherSnapshot(**fields)
+        # Entries are keyed by version, so this only frees memory
+        if self.match_cache is not None:
+            self.match_cache.clear()
+        self.rankings.clear()
         
     def _initialize_attributes(self) -> Dict[str, AttributeDefinition]:
         """Initialize all available attributes"""
@@ -216,13 +314,132 @@ class DynamicAttributeSystem:
     
     def load_dataset(self, file_path: str):
         """Load the plumber dataset"""
-        self.df = pd.read_csv(file_path)
-        return self.df
+        df = read_catalog(file_path)
+        self.apply_dataset(df)
+        return df
+    
+    def load_compiled(self, file_path: str, snapshot_file: str = None) -> bool:
+        """Load the dataset from its compiled snapshot (see catalog_snapshot)
+        
+        Returns False, loading nothing, when there is no snapshot or it was
+        compiled from a different version of the CSV.
+        """
+        compiled = load_snapshot(snapshot_file or snapshot_path(file_path), file_path)
+        if compiled is None:
+            return False
+        store, engine_meta, engine_arrays = compiled
+        with self._lock:
+            engine = ScoringEngine(store, ATTRIBUTE_COLUMNS, self.calculate_attribute_score)
+            engine.load_snapshot(engine_meta, engine_arrays)
+            engine.precompute_tier_tables(self._snapshot.attributes)
+            self._publish(df=None, store=store, engine=engine)
+        return True
+    
+    def apply_dataset(self, df: pd.DataFrame, source_rows: np.ndarray = None):
+        """Switch to a new catalog in one step
+        
+        With source_rows (see PlumberStore.updated), only the plumbers marked
+        as changed are encoded; the rest are copied from the current store.
+        """
+        with self._lock:
+            current = self._snapshot
+            if source_rows is not None and current.store is not None:
+                store = current.store.updated(df, source_rows)
+            else:
+                store = PlumberStore(df)
+            engine = self._build_engine(store, current.attributes)
+            self._publish(df=df, store=store, engine=engine)
+    
+    def get_store(self) -> PlumberStore:
+        """Get the compiled plumber store for the loaded dataset"""
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        return snapshot.store
+    
+    def invalidate(self):
+        """Publish the current state under a new version, dropping cached match results"""
+        with self._lock:
+            self._publish()
+    
+    def get_engine(self) -> ScoringEngine:
+        """Get the columnar scoring engine for the loaded dataset"""
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        return snapshot.engine
+    
+    def _build_engine(self, store: PlumberStore, attributes: Dict[str, AttributeDefinition]) -> ScoringEngine:
+        """Scoring engine for store, with the categorical tier tables built up front"""
+        engine = ScoringEngine(store, ATTRIBUTE_COLUMNS, self.calculate_attribute_score)
+        engine.precompute_tier_tables(attributes)
+        return engine
     
     def get_available_attributes(self) -> Dict[str, AttributeDefinition]:
         """Get all available attributes for selection"""
         return self.attributes
     
+    def get_attribute(self, attribute_name: str) -> AttributeDefinition:
+        """Get a copy of one attribute definition, or None if it doesn't exist
+        
+        Changing the copy has no effect until it is passed to update_attribute.
+        """
+        attr = self.attributes.get(attribute_name)
+        return copy_attribute(attr) if attr is not None else None
+    
+    def add_attribute(self, attr_def: AttributeDefinition, attribute_name: str = None):
+        """Add an attribute, keyed by its name unless attribute_name is given"""
+        attribute_name = attribute_name or attr_def.name
+        with self._lock:
+            attributes = dict(self.attributes)
+            if attribute_name in attributes:
+                raise ValueError(f"Attribute '{attribute_name}' already exists")
+            attributes[attribute_name] = attr_def
+            self._publish(attributes=self._frozen(attributes))
+    
+    def update_attribute(self, attribute_name: str, attr_def: AttributeDefinition):
+        """Replace an existing attribute definition"""
+        with self._lock:
+            attributes = dict(self.attributes)
+            if attribute_name not in attributes:
+                raise KeyError(f"Attribute '{attribute_name}' not found")
+            attributes[attribute_name] = attr_def
+            self._publish(attributes=self._frozen(attributes))
+    
+    def remove_attribute(self, attribute_name: str):
+        """Remove an attribute"""
+        with self._lock:
+            attributes = dict(self.attributes)
+            if attribute_name not in attributes:
+                raise KeyError(f"Attribute '{attribute_name}' not found")
+            del attributes[attribute_name]
+            self._publish(attributes=self._frozen(attributes))
+    
+    def export_configuration(self) -> Dict[str, Any]:
+        """Export the attribute definitions as JSON-serializable data"""
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'attributes': {
+                attribute_name: {
+                    'name': attr.name,
+                    'category': attr.category.value,
+                    'type': attr.type.value,
+                    'weight': attr.weight,
+                    'description': attr.description,
+                    'possible_values': list(attr.possible_values) if attr.possible_values is not None else None,
+                    'min_value': attr.min_value,
+                    'max_value': attr.max_value,
+                    'unit': attr.unit
+                }
+                for attribute_name, attr in snapshot.attributes.items()
+            }
+        }
+    
+    def import_configuration(self, config: Dict[str, Any]):
+        """Add or replace attributes from export_configuration() output or a list of definitions"""
+        attributes = definitions_from_configuration(config)
+        with self._lock:
+            self._publish(attributes=self._frozen({**self.attributes, **attributes}))
+    
     def get_attributes_by_category(self, category: AttributeCategory) -> Dict[str, AttributeDefinition]:
         """Get attributes filtered by category"""
         return {name: attr for name, attr in self.attributes.items() 
@@ -230,11 +447,10 @@ class DynamicAttributeSystem:
     
     def validate_attribute_values(self, attribute_name: str, value: Any) -> bool:
         """Validate if a value is valid for a given attribute"""
-        if attribute_name not in self.attributes:
+        attr = self.attributes.get(attribute_name)
+        if attr is None:
             return False
         
-        attr = self.attributes[attribute_name]
-        
         if attr.possible_values and value not in attr.possible_values:
             return False
         
@@ -247,37 +463,16 @@ class DynamicAttributeSystem:
         return True
     
     def calculate_attribute_score(self, plumber_data: Dict, attribute_name: str, 
-                                customer_value: Any, attribute_type: AttributeType) -> float:
-        """Calculate score for a specific attribute"""
-        if attribute_name not in self.attributes:
+                                customer_value: Any, attribute_type: AttributeType,
+                                attr: AttributeDefinition = None) -> float:
+        """Calculate score for a specific attribute, using attr instead of the current definition if given"""
+        if attr is None:
+            attr = self.attributes.get(attribute_name)
+        if attr is None:
             return 0.0
         
-        attr = self.attributes[attribute_name]
-        
-        # Map attribute names to actual column names in the dataset
-        column_mapping = {
-            'work_type': 'Work_Specialization',
-            'district': 'District',
-            'language': 'Languages_Spoken',
-            'experience_years': 'Experience_Years',
-            'license_type': 'License_Type',
-            'insurance_status': 'Insurance_Status',
-            'specialization_level': 'Specialization_Level',
-            'response_time': 'Response_Time_Minutes',
-            'max_distance': 'Max_Distance_km',
-            'weekend_available': 'Weekend_Available',
-            'emergency_service': 'Emergency_Service',
-            'min_rating': 'Rating',
-            'min_success_rate': 'Success_Rate',
-            'guarantee_period': 'Guarantee_Period_Days',
-            'max_cost': 'Min_Order_Value',
-            'payment_methods': 'Payment_Methods',
-            'required_equipment': 'Equipment_Available',
-            'certifications': 'Certifications'
-        }
-        
         # Get the actual column name
-        column_name = column_mapping.get(attribute_name, attribute_name)
+        column_name = ATTRIBUTE_COLUMNS.get(attribute_name, attribute_name)
         plumber_value = plumber_data.get(column_name)
         
         if plumber_value is None:
@@ -334,65 +529,168 @@ class DynamicAttributeSystem:
         return 0.0
     
     def match_plumbers(self, customer_preferences: Dict[str, Any], 
-                      max_results: int = 10) -> List[Dict]:
-        """Match plumbers based on customer preferences"""
-        if self.df is None:
-            raise ValueError("Dataset not loaded. Call load_dataset() first.")
+                      max_results: int = 10, radius_km: float = None, use_cache: bool = True,
+                      explain: bool = False) -> List[Dict]:
+        """Match plumbers based on customer preferences
         
-        results = []
+        With radius_km, only plumbers within that distance of client_lat/client_lon
+        are scored; they are looked up in the spatial index instead of scanning.
+        Plumbers scoring zero on a REQUIRED attribute are left out, and matches
+        on NEGATIVE attributes lower the score (see explain_query for the plan).
+        Results are served from match_cache when an equivalent query was seen recently.
+        With explain, each result also carries its per-attribute Attribute_Scores.
+        """
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        key = None
+        if use_cache and self.match_cache is not None:
+            key = self.match_cache.make_key(customer_preferences, max_results, radius_km, explain, snapshot.version)
+            cached = self.match_cache.get(key)
+            if cached is not None:
+                return copy_results(cached)
         
-        for _, plumber in self.df.iterrows():
-            plumber_dict = plumber.to_dict()
-            total_score = 0.0
-            attribute_scores = {}
-            
-            # Calculate scores for each attribute
-            for attr_name, customer_value in customer_preferences.items():
-                if attr_name in self.attributes and customer_value is not None:
-                    score = self.calculate_attribute_score(
-                        plumber_dict, attr_name, customer_value, 
-                        self.attributes[attr_name].type
-                    )
-                    attribute_scores[attr_name] = score
-                    total_score += score
-            
-            # Apply distance penalty
-            if 'client_lat' in customer_preferences and 'client_lon' in customer_preferences:
-                distance = self._calculate_distance(
-                    customer_preferences['client_lat'],
-                    customer_preferences['client_lon'],
-                    plumber_dict['Latitude'],
-                    plumber_dict['Longitude']
-                )
-                # Don't apply distance penalty if no other attributes matched
-                if total_score > 0:
-                    distance_penalty = max(0.1, 1 - (distance / 100))  # Less aggressive penalty
-                    total_score *= distance_penalty
-                plumber_dict['Distance_km'] = round(distance, 2)
-            
-            # Add to results if meets minimum requirements OR if no specific preferences were given
-            if total_score > 0 or len([k for k, v in customer_preferences.items() if k not in ['client_lat', 'client_lon'] and v is not None]) == 0:
-                # If no specific preferences, give a base score
-                if total_score == 0:
-                    total_score = 0.1  # Minimum score for showing results
-                plumber_dict['Match_Score'] = round(total_score, 2)
-                plumber_dict['Attribute_Scores'] = attribute_scores
-                results.append(plumber_dict) 
-                
-        # Sort by match score and return top results
-        results.sort(key=lambda x: x['Match_Score'], reverse=True)
-        return results[:max_results]
-    
-    def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate distance between two points using Haversine formula"""
-        R = 6371  # Earth radius in km
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        dphi = math.radians(lat2 - lat1)
-        dlambda = math.radians(lon2 - lon1)
-        a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        matched_plumbers = self._match_uncached(snapshot, customer_preferences, max_results, radius_km, explain)
+        if key is not None:
+            self.match_cache.put(key, matched_plumbers)
+            return copy_results(matched_plumbers)
+        return matched_plumbers
+    
+    def _match_uncached(self, snapshot: MatcherSnapshot, customer_preferences: Dict[str, Any],
+                        max_results: int, radius_km: float, explain: bool = False) -> List[Dict]:
+        """Run the matcher on one snapshot, bypassing the result cache"""
+        rows = self._radius_rows(snapshot.engine, customer_preferences, radius_km)
+        return snapshot.engine.match(customer_preferences, snapshot.attributes, max_results, rows, explain)
+    
+    @staticmethod
+    def _radius_rows(engine: ScoringEngine, customer_preferences: Dict[str, Any], radius_km: float) -> np.ndarray:
+        """Plumbers within radius_km of the client, or None to consider the whole catalog"""
+        if radius_km is None or 'client_lat' not in customer_preferences or 'client_lon' not in customer_preferences:
+            return None
+        rows, _ = engine.spatial_index.within(
+            float(customer_preferences['client_lat']),
+            float(customer_preferences['client_lon']),
+            float(radius_km)
+        )
+        return rows
+    
+    def explain_query(self, customer_preferences: Dict[str, Any], radius_km: float = None) -> Dict[str, Any]:
+        """The query plan for a preference dict and the candidates left after each of its stages"""
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        engine = snapshot.engine
+        plan = engine.plan(customer_preferences, snapshot.attributes)
+        rows = self._radius_rows(engine, customer_preferences, radius_km)
+        engine.rank(customer_preferences, snapshot.attributes, rows, plan)
+        return plan.explain()
+    
+    def facet_counts(self, customer_preferences: Dict[str, Any], radius_km: float = None) -> Dict[str, Any]:
+        """Total matches plus, for every value of every categorical attribute, the plumbers that would match with it
+        
+        Counts come from bitset intersections (see ScoringEngine.facet_counts)
+        rather than a match per value.
+        """
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        rows = self._radius_rows(snapshot.engine, customer_preferences, radius_km)
+        return snapshot.engine.facet_counts(customer_preferences, snapshot.attributes, rows)
+    
+    def match_plumbers_page(self, customer_preferences: Dict[str, Any] = None, page_size: int = 10,
+                            radius_km: float = None, cursor: str = None,
+                            explain: bool = False) -> Tuple[Iterator[Dict], str, int]:
+        """One page of ranked plumbers, the cursor for the next page and the total match count
+        
+        Without a cursor the catalog is scored once and the ranking is kept
+        server-side; passing the returned cursor reads the following page of
+        that ranking without scoring again.  Plumber dicts are built lazily
+        as the returned iterator is consumed.  next_cursor is None on the last page.
+        """
+        if page_size < 1:
+            # An empty page would hand back a cursor to the same offset
+            raise ValueError("page_size must be at least 1")
+        snapshot = self._snapshot
+        engine = snapshot.engine
+        if cursor is not None:
+            ranking_id, offset = self._decode_cursor(cursor)
+            entry = self.rankings.get(ranking_id)
+            if entry is None or entry[1] != snapshot.version:
+                raise ExpiredCursorError("Cursor expired or invalid, start a new search")
+            ranking = entry[0]
+        else:
+            snapshot.require_dataset()
+            rows = self._radius_rows(engine, customer_preferences, radius_km)
+            ranking = engine.rank(customer_preferences, snapshot.attributes, rows)
+            ranking_id, offset = secrets.token_urlsafe(12), 0
+        
+        next_offset = offset + page_size
+        next_cursor = None
+        if next_offset < len(ranking):
+            self.rankings.put(ranking_id, (ranking, snapshot.version))
+            next_cursor = self._encode_cursor(ranking_id, next_offset)
+        results = engine.iter_ranking(ranking, snapshot.attributes, offset, page_size, explain)
+        return results, next_cursor, len(ranking)
+    
+    @staticmethod
+    def _encode_cursor(ranking_id: str, offset: int) -> str:
+        payload = json.dumps({'r': ranking_id, 'o': offset}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, int]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            return str(payload['r']), max(0, int(payload['o']))
+        except (ValueError, TypeError, KeyError):
+            raise ExpiredCursorError("Cursor expired or invalid, start a new search")
+    
+    def match_plumbers_batch(self, preference_list: List[Dict[str, Any]],
+                             max_results: int = 10, explain: bool = False) -> List[List[Dict]]:
+        """Match plumbers for many customers in one pass, one result list per preference dict"""
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        results = [None] * len(preference_list)
+        keys = [None] * len(preference_list)
+        if self.match_cache is not None:
+            for i, preferences in enumerate(preference_list):
+                keys[i] = self.match_cache.make_key(preferences, max_results, None, explain, snapshot.version)
+                cached = self.match_cache.get(keys[i])
+                if cached is not None:
+                    results[i] = copy_results(cached)
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        matched = snapshot.engine.match_batch([preference_list[i] for i in pending], snapshot.attributes,
+                                              max_results, explain)
+        for i, matched_plumbers in zip(pending, matched):
+            if keys[i] is not None:
+                self.match_cache.put(keys[i], matched_plumbers)
+                matched_plumbers = copy_results(matched_plumbers)
+            results[i] = matched_plumbers
+        return results
+    
+    def plumbers_within(self, lat: float, lon: float, radius_km: float) -> List[Dict]:
+        """Plumbers within radius_km of a point, nearest first"""
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        ids, distances = snapshot.engine.spatial_index.within(lat, lon, radius_km)
+        return self._with_distances(snapshot.store, ids, distances, sort=True)
+    
+    def nearest_plumbers(self, lat: float, lon: float, k: int = 10) -> List[Dict]:
+        """The k plumbers closest to a point, nearest first"""
+        snapshot = self._snapshot
+        snapshot.require_dataset()
+        ids, distances = snapshot.engine.spatial_index.nearest(lat, lon, k)
+        return self._with_distances(snapshot.store, ids, distances)
+    
+    @staticmethod
+    def _with_distances(store: PlumberStore, ids, distances, sort: bool = False) -> List[Dict]:
+        pairs = list(zip(ids.tolist(), distances.tolist()))
+        if sort:
+            pairs.sort(key=lambda pair: pair[1])
+        results = []
+        for idx, distance in pairs:
+            plumber_dict = store.record(idx)
+            plumber_dict['Distance_km'] = round(distance, 2)
+            results.append(plumber_dict)
+        return results
     
     def get_attribute_suggestions(self, partial_input: str) -> List[str]:
         """Get attribute suggestions based on partial input"""
@@ -409,11 +707,10 @@ class DynamicAttributeSystem:
     
     def get_value_suggestions(self, attribute_name: str, partial_input: str = "") -> List[str]:
         """Get value suggestions for a specific attribute"""
-        if attribute_name not in self.attributes:
+        attr = self.attributes.get(attribute_name)
+        if attr is None:
             return []
         
-        attr = self.attributes[attribute_name]
-        
         if attr.possible_values:
             if partial_input:
                 return [val for val in attr.possible_values 
@@ -423,19 +720,41 @@ class DynamicAttributeSystem:
         
         return []
     
-    def generate_matching_report(self, customer_preferences: Dict[str, Any], 
-                               matched_plumbers: List[Dict]) -> Dict:
-        """Generate a detailed matching report"""
+    def generate_matching_report(self, customer_preferences: Dict[str, Any],
+                                 matched_plumbers: List[Dict] = None, radius_km: float = None,
+                                 percentiles: Tuple[int, ...] = REPORT_PERCENTILES) -> Dict:
+        """Generate a detailed matching report
+
+        Statistics cover matched_plumbers when given (their Attribute_Scores,
+        so match them with explain=True), otherwise every plumber in the
+        catalog, or within radius_km, that matches the preferences.
+        """
+        snapshot = self._snapshot
+        attributes = snapshot.attributes
+        if matched_plumbers is None:
+            snapshot.require_dataset()
+            engine = snapshot.engine
+            rows = self._radius_rows(engine, customer_preferences, radius_km)
+            ids, names, matrix, match_scores, distance = engine.score_matrix(customer_preferences, attributes, rows)
+            ranking = Ranking(customer_preferences, ids, match_scores)
+            top_plumbers = list(engine.iter_ranking(ranking, attributes, 0, 5))
+        else:
+            names = [attr_name for attr_name in customer_preferences if attr_name in attributes]
+            matrix = np.array([[p.get('Attribute_Scores', {}).get(attr_name, 0) for attr_name in names]
+                               for p in matched_plumbers], dtype=float).reshape(len(matched_plumbers), len(names))
+            match_scores = np.array([p['Match_Score'] for p in matched_plumbers], dtype=float)
+            distance = np.array([p.get('Distance_km', 0) for p in matched_plumbers], dtype=float)
+            top_plumbers = matched_plumbers[:5]
+
         report = {
-            'total_plumbers_found': len(matched_plumbers),
+            'total_plumbers_found': len(match_scores),
             'preferences_used': list(customer_preferences.keys()),
             'top_matches': [],
             'attribute_analysis': {},
             'recommendations': []
         }
         
-        if matched_plumbers:
-            # Top matches
+        if len(match_scores):
             report['top_matches'] = [
                 {
                     'name': p['Name'],
@@ -444,27 +763,22 @@ class DynamicAttributeSystem:
                     'distance': p.get('Distance_km', 'N/A'),
                     'rating': p.get('Rating', 'N/A')
                 }
-                for p in matched_plumbers[:5]
+                for p in top_plumbers
             ]
             
-            # Attribute analysis
-            for attr_name in customer_preferences.keys():
-                if attr_name in self.attributes:
-                    scores = [p['Attribute_Scores'].get(attr_name, 0) 
-                             for p in matched_plumbers]
-                    report['attribute_analysis'][attr_name] = {
-                        'average_score': round(np.mean(scores), 2),
-                        'max_score': round(max(scores), 2),
-                        'min_score': round(min(scores), 2)
-                    }
+            # Attribute analysis and overall score statistics, one pass over the score matrix
+            report['attribute_analysis'] = dict(zip(names, score_statistics(matrix, percentiles)))
+            report['score_statistics'] = score_statistics(match_scores[:, None], percentiles)[0]
+            report['average_score'] = report['score_statistics']['average_score']
+            report['best_score'] = report['score_statistics']['max_score']
             
             # Recommendations
-            if len(matched_plumbers) < 5:
+            if len(match_scores) < 5:
                 report['recommendations'].append(
                     "Consider relaxing some preferences to find more plumbers"
                 )
             
-            if any(p.get('Distance_km', 0) > 30 for p in matched_plumbers):
+            if distance is not None and (distance > 30).any():
                 report['recommendations'].append(
                     "Some plumbers are far away. Consider expanding your search area"
                 )
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, fields
+from enum import Enum
+from typing import Any, Dict, List
+
+class ExpiredCursorError(ValueError):
+    """A pagination cursor whose ranking is gone or belongs to an older catalog"""
+
+class AttributeType(Enum):
+    """Types of attributes for matching"""
+    REQUIRED = "required"
+    PREFERRED = "preferred"
+    OPTIONAL = "optional"
+    NEGATIVE = "negative"  # Attributes that reduce score
+
+class AttributeCategory(Enum):
+    """Categories of attributes"""
+    BASIC = "basic"
+    PROFESSIONAL = "professional"
+    LOGISTICAL = "logistical"
+    QUALITY = "quality"
+    FINANCIAL = "financial"
+
+@dataclass
+class AttributeDefinition:
+    """Definition of an attribute for matching"""
+    name: str
+    category: AttributeCategory
+    type: AttributeType
+    weight: float
+    description: str
+    possible_values: List[str] = None
+    min_value: float = None
+    max_value: float = None
+    unit: str = None
+
+
+def definition_values(attr: AttributeDefinition) -> Dict[str, Any]:
+    """Field values of an attribute definition, as keyword arguments for a new one"""
+    return {field.name: getattr(attr, field.name) for field in fields(AttributeDefinition)}
+
+
+class FrozenAttributeDefinition(AttributeDefinition):
+    """Read-only attribute definition, as published in a matcher snapshot
+
+    Its possible values are kept as a tuple, so nothing a reader holds can
+    change scoring without going through a write that bumps the version.
+    """
+
+    def __init__(self, *args, **kwargs):
+        for name, value in definition_values(AttributeDefinition(*args, **kwargs)).items():
+            if name == 'possible_values' and value is not None:
+                value = tuple(value)
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("Published attribute definitions are read-only; "
+                             "change a get_attribute() copy and pass it to update_attribute")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("Published attribute definitions are read-only")
+
+
+def definitions_from_configuration(config: Dict[str, Any]) -> Dict[str, AttributeDefinition]:
+    """Attribute definitions in export_configuration() output or a list of definitions"""
+    items = config['attributes']
+    if isinstance(items, dict):
+        items = [(attribute_name, attr_data) for attribute_name, attr_data in items.items()]
+    else:
+        items = [(attr_data['name'], attr_data) for attr_data in items]
+
+    return {
+        attribute_name: AttributeDefinition(
+            name=attr_data.get('name', attribute_name),
+            category=AttributeCategory(attr_data['category']),
+            type=AttributeType(attr_data['type']),
+            weight=float(attr_data['weight']),
+            description=attr_data.get('description', ''),
+            possible_values=attr_data.get('possible_values'),
+            min_value=attr_data.get('min_value'),
+            max_value=attr_data.get('max_value'),
+            unit=attr_data.get('unit')
+        )
+        for attribute_name, attr_data in items
+    }
@@ -0,0 +1,198 @@
+"""
+Plumber availability as time-slot bitmaps
+
+Free-text availability such as "9AM-11AM, 1PM-3PM", "9am-12pm" or
+"Mon-Fri 9:30am-1pm, Sat 10am-2pm" is parsed into canonical minute-of-day
+intervals per weekday and stored as a bitmap with one bit per SLOT_MINUTES
+slot of the week.  Intervals without days recur every day; an interval
+ending at or before its start runs past midnight into the next day, for
+availability and requested slots alike.
+
+Availability bitmaps keep only the slots a plumber is free for in full,
+while a requested slot sets every slot it touches, so a request is
+available exactly when its bits are a subset of the plumber's.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+SLOT_MINUTES = 15
+MINUTES_PER_DAY = 24 * 60
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+ALL_DAYS = tuple(range(len(DAYS)))
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+_DAY_GROUPS = {'daily': ALL_DAYS, 'everyday': ALL_DAYS, 'weekdays': ALL_DAYS[:5], 'weekends': ALL_DAYS[5:]}
+_TIME = re.compile(r'^(\d{1,2})(?:[:.](\d{2}))?\s*([ap])\.?m?\.?$|^(\d{1,2})(?:[:.](\d{2}))?$', re.IGNORECASE)
+_ITEM = re.compile(r'^(?:(?P<days>[a-z]+(?:\s*[-/]\s*[a-z]+)*)\s+)?(?P<start>\d[^-–]*?)\s*(?:-|–|\bto\b)\s*(?P<end>\d.*)$',
+                   re.IGNORECASE)
+
+
+def parse_time(text: str) -> int:
+    """Minute of the day for "9AM", "9:30 pm", "12am" or "21:00" ("24:00" is the end of the day)"""
+    match = _TIME.match(text.strip())
+    if not match:
+        raise ValueError(f"Unreadable time '{text}'")
+    if match.group(3):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Unreadable time '{text}'")
+        hour = hour % 12 + (12 if match.group(3).lower() == 'p' else 0)
+    else:
+        hour, minute = int(match.group(4)), int(match.group(5) or 0)
+    minutes = hour * 60 + minute
+    if minute >= 60 or minutes > MINUTES_PER_DAY:
+        raise ValueError(f"Unreadable time '{text}'")
+    return minutes
+
+
+def _parse_day(text: str) -> int:
+    day = text.strip()[:3].title()
+    if day not in DAYS:
+        raise ValueError(f"Unreadable day '{text}'")
+    return DAYS.index(day)
+
+
+def _parse_days(text: str) -> Tuple[int, ...]:
+    """Weekdays of "Mon", "Mon-Fri", "Mon/Wed/Fri", "Sat-Mon", "weekdays", "weekends" or "daily" """
+    if text.lower() in _DAY_GROUPS:
+        return _DAY_GROUPS[text.lower()]
+    days = []
+    for part in text.split('/'):
+        if '-' in part:
+            first, last = (_parse_day(day) for day in part.split('-', 1))
+            days.extend((first + offset) % len(DAYS) for offset in range((last - first) % len(DAYS) + 1))
+        else:
+            days.append(_parse_day(part))
+    return tuple(sorted(set(days)))
+
+
+def _merge(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _parse_items(text: str) -> List[Tuple[Tuple[int, ...], int, int]]:
+    """(weekdays, start, end) of each comma or semicolon separated item, end <= start running past midnight"""
+    items = []
+    for item in re.split(r'[,;]', text):
+        item = item.strip()
+        if not item:
+            continue
+        match = _ITEM.match(item)
+        if not match:
+            raise ValueError(f"Unreadable availability '{item}', expected e.g. '9AM-11AM' or 'Mon-Fri 9am-5pm'")
+        days = _parse_days(match.group('days')) if match.group('days') else ALL_DAYS
+        start, end = parse_time(match.group('start')), parse_time(match.group('end'))
+        if start == end or start == MINUTES_PER_DAY:
+            raise ValueError(f"Empty availability interval '{item}'")
+        items.append((days, start, end))
+    return items
+
+
+def parse_availability(text: Any) -> Dict[int, List[Tuple[int, int]]]:
+    """Canonical availability: sorted, merged [start, end) minute intervals per weekday (0 = Monday)
+
+    Items are separated by commas or semicolons.  Missing or empty text
+    means no availability; unreadable items raise ValueError.
+    """
+    if not isinstance(text, str):
+        return {}
+    intervals = {day: [] for day in ALL_DAYS}
+    for days, start, end in _parse_items(text):
+        for day in days:
+            if end > start:
+                intervals[day].append((start, end))
+            else:
+                intervals[day].append((start, MINUTES_PER_DAY))
+                if end:
+                    intervals[(day + 1) % len(DAYS)].append((0, end))
+    return {day: _merge(day_intervals) for day, day_intervals in intervals.items() if day_intervals}
+
+
+def format_time(minutes: int) -> str:
+    """Canonical text of a minute of the day: "9AM", "9:30PM", "12PM" for noon and "12AM" for midnight"""
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    text = str(hour % 12 or 12) + (f':{minute:02d}' if minute else '')
+    return text + ('PM' if hour >= 12 else 'AM')
+
+
+def slot_options(text: Any) -> List[str]:
+    """Each readable item of availability text as a bookable "9AM-1PM" slot, without its weekdays"""
+    if not isinstance(text, str):
+        return []
+    options = []
+    for item in re.split(r'[,;]', text):
+        try:
+            options.extend(f'{format_time(start)}-{format_time(end)}' for _, start, end in _parse_items(item))
+        except ValueError:
+            continue
+    return list(dict.fromkeys(options))
+
+
+def _slot_bits(start: int, end: int, inward: bool) -> int:
+    """Bits of the slots inside [start, end) (inward) or touching it"""
+    if inward:
+        first, last = -(-start // SLOT_MINUTES), end // SLOT_MINUTES
+    else:
+        first, last = start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    return ((1 << last) - (1 << first)) if last > first else 0
+
+
+def availability_bitmap(intervals: Dict[int, List[Tuple[int, int]]]) -> int:
+    """Weekly bitmap of parse_availability() intervals, SLOTS_PER_DAY bits per day from Monday"""
+    bitmap = 0
+    for day, day_intervals in intervals.items():
+        for start, end in day_intervals:
+            bitmap |= _slot_bits(start, end, inward=True) << (day * SLOTS_PER_DAY)
+    return bitmap
+
+
+def day_pattern(bitmap: int, day: int) -> int:
+    """The SLOTS_PER_DAY bits of one weekday of a weekly bitmap"""
+    return (bitmap >> (day * SLOTS_PER_DAY)) & DAY_MASK
+
+
+def parse_slot(text: str) -> int:
+    """Slots touched by a requested slot such as "9AM-11AM", "2pm to 4:30pm", "10PM-2AM" or just "9AM"
+
+    Bits count from midnight of the requested day; a slot running past
+    midnight continues into the next SLOTS_PER_DAY bits, i.e. the next day.
+    """
+    text = text.strip()
+    if not any(separator in text for separator in ('-', '–', ' to ')):
+        start = parse_time(text)
+        if start == MINUTES_PER_DAY:
+            raise ValueError(f"Unreadable time slot '{text}'")
+        return _slot_bits(start, start + 1, inward=False)
+    pattern = 0
+    for days, start, end in _parse_items(text):
+        if days != ALL_DAYS:
+            raise ValueError(f"Time slot '{text}' should not name days")
+        pattern |= _slot_bits(start, end if end > start else end + MINUTES_PER_DAY, inward=False)
+    if not pattern:
+        raise ValueError(f"Unreadable time slot '{text}'")
+    return pattern
+
+
+def is_available(bitmap: int, requested: int, day: int = None) -> bool:
+    """Whether a weekly bitmap is free for every slot of a parse_slot() pattern starting on day, or on any day"""
+    days = ALL_DAYS if day is None else (day,)
+    return requested != 0 and any(
+        requested & ~(day_pattern(bitmap, d) | day_pattern(bitmap, (d + 1) % len(DAYS)) << SLOTS_PER_DAY) == 0
+        for d in days
+    )
+
+
+def slots_overlap(first: str, second: str) -> bool:
+    """Whether two requested slots share any time; texts that don't parse only clash when equal"""
+    try:
+        return parse_slot(first) & parse_slot(second) != 0
+    except ValueError:
+        return first == second
@@ -0,0 +1,55 @@
+import numpy as np
+from typing import Any, List
+from availability import parse_availability, availability_bitmap, day_pattern, DAYS, DAY_MASK, SLOTS_PER_DAY
+
+WORD_BITS = 64
+WORDS_PER_DAY = -(-SLOTS_PER_DAY // WORD_BITS)
+_WORD_MASK = (1 << WORD_BITS) - 1
+
+
+def _words(pattern: int) -> List[int]:
+    return [(pattern >> (WORD_BITS * i)) & _WORD_MASK for i in range(WORDS_PER_DAY)]
+
+
+class AvailabilityIndex:
+    """Weekly availability bitmaps of the catalog for vectorized slot queries
+
+    Each distinct availability text is parsed once into a row of uint64
+    words per weekday (see availability for the layout); plumbers point at
+    their row through the store's value codes.  A query ANDs the requested
+    slot bits with every distinct bitmap, over a window of the weekday and
+    the next one so slots past midnight are checked against the next day,
+    and gathers the answer per plumber.  Text that doesn't parse counts as
+    no availability.
+    """
+
+    def __init__(self, values: List[Any], codes: np.ndarray):
+        # One row per distinct value plus a trailing empty row for missing values (code -1)
+        table = np.zeros((len(values) + 1, len(DAYS), WORDS_PER_DAY), dtype=np.uint64)
+        self.unreadable = []
+        for i, value in enumerate(values):
+            try:
+                bitmap = availability_bitmap(parse_availability(value))
+            except ValueError:
+                self.unreadable.append(value)
+                continue
+            for day in range(len(DAYS)):
+                table[i, day] = _words(day_pattern(bitmap, day))
+        # Each weekday followed by the next, for parse_slot() patterns running past midnight
+        self.windows = np.concatenate([table, np.roll(table, -1, axis=1)], axis=2)
+        self.codes = codes
+
+    @classmethod
+    def from_store(cls, store, column: str = 'Free_Time_Slots') -> 'AvailabilityIndex':
+        if column not in store.codes:
+            return cls([], np.full(len(store), -1, dtype=np.int32))
+        return cls(store.categories[column], store.codes[column])
+
+    def available(self, requested: int, day: int = None) -> np.ndarray:
+        """Mask of plumbers free for every slot of a parse_slot() pattern, on day (0 = Monday) or on any day"""
+        if requested == 0:
+            return np.zeros(len(self.codes), dtype=bool)
+        query = np.array(_words(requested & DAY_MASK) + _words(requested >> SLOTS_PER_DAY), dtype=np.uint64)
+        days = self.windows if day is None else self.windows[:, day:day + 1]
+        free = ((days & query) == query).all(axis=2).any(axis=1)
+        return free[self.codes]
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Declared column types for the plumber catalog CSV
+
+Text columns with a handful of distinct values are read as categoricals,
+integer columns are downcast to the smallest type that holds them, and
+float columns stay float64 so every value round-trips exactly.  Large
+files are read a chunk at a time.
+
+Command line use compares the memory held per plumber by a default
+pd.read_csv, by the typed frame and by the compiled PlumberStore:
+
+    python catalog_schema.py --dataset enhanced_plumbers_dataset.csv
+"""
+
+import os
+import sys
+import argparse
+import pandas as pd
+from pandas.api.types import union_categoricals
+from typing import Dict, List, Any
+
+TEXT = 'str'
+CATEGORY = 'category'
+INTEGER = 'integer'
+FLOAT = 'float64'
+
+# Every column of enhanced_plumbers_dataset.csv; columns missing from a file are simply absent
+CATALOG_SCHEMA = {
+    'Name': TEXT,
+    'District': CATEGORY,
+    'Current_Tasks': CATEGORY,
+    'Free_Time_Slots': CATEGORY,
+    'Languages_Spoken': CATEGORY,
+    'Work_Specialization': CATEGORY,
+    'Distance_from_Client_km': FLOAT,
+    'Latitude': FLOAT,
+    'Longitude': FLOAT,
+    'Experience_Years': INTEGER,
+    'License_Type': CATEGORY,
+    'Insurance_Status': CATEGORY,
+    'Vehicle_Type': CATEGORY,
+    'Response_Time_Minutes': INTEGER,
+    'Availability_Status': CATEGORY,
+    'Specialization_Level': CATEGORY,
+    'Equipment_Available': CATEGORY,
+    'Payment_Methods': CATEGORY,
+    'Working_Hours': CATEGORY,
+    'Weekend_Available': CATEGORY,
+    'Emergency_Service': CATEGORY,
+    'Guarantee_Period_Days': INTEGER,
+    'Min_Order_Value': INTEGER,
+    'Max_Distance_km': INTEGER,
+    'Rating': FLOAT,
+    'Total_Jobs': INTEGER,
+    'Success_Rate': INTEGER,
+    'Specializations_Detailed': CATEGORY,
+    'Languages_Detailed': CATEGORY,
+    'Equipment_List': CATEGORY,
+    'Service_Areas': CATEGORY,
+    'Certifications': CATEGORY,
+    'Membership_Status': CATEGORY,
+    'Response_Priority': CATEGORY
+}
+
+# Files larger than this are read CHUNK_ROWS rows at a time
+CHUNKED_FILE_BYTES = 64 * 1024 * 1024
+CHUNK_ROWS = 100_000
+
+
+def _read_dtypes() -> Dict[str, str]:
+    """dtype argument for read_csv; integers are read as int64 (or float64 with gaps) and downcast after"""
+    return {column: kind for column, kind in CATALOG_SCHEMA.items() if kind in (TEXT, CATEGORY, FLOAT)}
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    for column, kind in CATALOG_SCHEMA.items():
+        if kind == INTEGER and column in df and pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+
+def _concat(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks, merging the categories of each categorical column"""
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for column in chunks[0].columns:
+        parts = [chunk[column] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[column] = pd.Series(union_categoricals(parts, sort_categories=True), name=column)
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_catalog(source: Any, chunk_rows: int = None) -> pd.DataFrame:
+    """Read a plumber CSV (path or file object) with the declared column types
+
+    Columns not in CATALOG_SCHEMA keep pandas' inferred types.  Paths of
+    files over CHUNKED_FILE_BYTES are read CHUNK_ROWS rows at a time
+    unless chunk_rows is given.
+    """
+    if chunk_rows is None and isinstance(source, (str, os.PathLike)) \
+            and os.path.getsize(source) > CHUNKED_FILE_BYTES:
+        chunk_rows = CHUNK_ROWS
+    if not chunk_rows:
+        return _downcast(pd.read_csv(source, dtype=_read_dtypes()))
+    with pd.read_csv(source, dtype=_read_dtypes(), chunksize=chunk_rows) as reader:
+        chunks = [_downcast(chunk) for chunk in reader]
+    # Chunks can disagree on the narrowest integer type; the widest wins
+    return _downcast(_concat(chunks))
+
+
+def bytes_per_plumber(df: pd.DataFrame) -> float:
+    """Memory held by a frame per row, counting the strings in text columns"""
+    return df.memory_usage(deep=True).sum() / max(len(df), 1)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Report the memory held per plumber by each way of loading the catalog')
+    parser.add_argument('--dataset', default='enhanced_plumbers_dataset.csv', help='plumber catalog CSV')
+    args = parser.parse_args(argv)
+
+    from plumber_store import PlumberStore
+    default = pd.read_csv(args.dataset)
+    typed = read_catalog(args.dataset)
+    store = PlumberStore(typed)
+    print(f"{len(typed)} plumbers, bytes per plumber:", file=sys.stderr)
+    print(f"  pd.read_csv defaults  {bytes_per_plumber(default):8.0f}", file=sys.stderr)
+    print(f"  read_catalog          {bytes_per_plumber(typed):8.0f}", file=sys.stderr)
+    print(f"  PlumberStore          {store.nbytes() / max(len(store), 1):8.0f}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
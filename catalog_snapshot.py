@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Binary snapshot of the compiled plumber catalog
+
+The snapshot holds everything PlumberStore and ScoringEngine derive from
+the CSV (value codes, numeric columns, list vocabularies, posting lists, tier
+tables and the spatial grid) as raw arrays behind a JSON header.  Loading
+memory-maps the file and uses the arrays in place, so startup does no
+parsing and every worker process shares the same physical pages.
+
+A snapshot records the size and SHA-256 of the CSV it was compiled from
+and is ignored once the CSV changes.  Compile it after each dataset update:
+
+    python catalog_snapshot.py --dataset enhanced_plumbers_dataset.csv
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+import numpy as np
+from typing import Dict, Any, Tuple, List
+from plumber_store import PlumberStore
+from dataset_reloader import file_digest
+
+MAGIC = b'PLMBSNAP'
+# Bump whenever the layout or the meaning of any stored array changes
+FORMAT_VERSION = 2
+# Magic bytes followed by the length of the JSON header
+PREAMBLE = struct.Struct('<8sQ')
+# Arrays start on cache-line boundaries
+ALIGNMENT = 64
+
+
+def snapshot_path(dataset_path: str) -> str:
+    """Default snapshot location for a dataset CSV"""
+    return os.path.splitext(dataset_path)[0] + '.snapshot'
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot(path: str, dataset_path: str, store: PlumberStore, engine) -> Dict[str, Any]:
+    """Write the store and the engine's catalog tables to path, replacing it atomically"""
+    store_meta, store_arrays = store.to_snapshot()
+    engine_meta, engine_arrays = engine.to_snapshot()
+    arrays = {f'store/{name}': array for name, array in store_arrays.items()}
+    arrays.update({f'engine/{name}': array for name, array in engine_arrays.items()})
+
+    directory = {}
+    offset = 0
+    for name, array in arrays.items():
+        arrays[name] = array = np.ascontiguousarray(array)
+        directory[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+    header = {
+        'format': FORMAT_VERSION,
+        'source': {'size': os.path.getsize(dataset_path), 'sha256': file_digest(dataset_path)},
+        'store': store_meta,
+        'engine': engine_meta,
+        'arrays': directory
+    }
+    encoded = json.dumps(header).encode('utf-8')
+    data_start = _aligned(PREAMBLE.size + len(encoded))
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(data_start + directory[name]['offset'])
+            array.tofile(f)
+        f.truncate(data_start + offset)
+    os.replace(temporary_path, path)
+    return header
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Header and read-only, memory-mapped arrays of a snapshot file"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, header_length = PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a plumber catalog snapshot")
+    header = json.loads(buffer[PREAMBLE.size:PREAMBLE.size + header_length])
+    data_start = _aligned(PREAMBLE.size + header_length)
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+            continue
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + entry['offset']).reshape(shape)
+    return header, arrays
+
+
+def is_current(header: Dict[str, Any], dataset_path: str) -> bool:
+    """Whether a snapshot header matches this code's format and the CSV's current contents"""
+    if header.get('format') != FORMAT_VERSION:
+        return False
+    source = header.get('source', {})
+    try:
+        if os.path.getsize(dataset_path) != source.get('size'):
+            return False
+        return file_digest(dataset_path) == source.get('sha256')
+    except OSError:
+        return False
+
+
+def load_snapshot(path: str, dataset_path: str) -> Tuple[PlumberStore, Dict[str, Any], Dict[str, np.ndarray]]:
+    """The store and the engine tables from a snapshot, or None if it is missing, unreadable or stale"""
+    try:
+        header, arrays = read_snapshot(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if not is_current(header, dataset_path):
+        return None
+    store_arrays = {name[len('store/'):]: array for name, array in arrays.items() if name.startswith('store/')}
+    engine_arrays = {name[len('engine/'):]: array for name, array in arrays.items() if name.startswith('engine/')}
+    return PlumberStore.from_snapshot(header['store'], store_arrays), header['engine'], engine_arrays
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Compile the plumber catalog CSV into a memory-mappable snapshot')
+    parser.add_argument('--dataset', default='enhanced_plumbers_dataset.csv', help='plumber catalog CSV')
+    parser.add_argument('--output', default=None, help='snapshot file (default: next to the CSV)')
+    args = parser.parse_args(argv)
+
+    from attribute_system import DynamicAttributeSystem
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset(args.dataset)
+    output = args.output or snapshot_path(args.dataset)
+    header = write_snapshot(output, args.dataset, attribute_system.get_store(), attribute_system.get_engine())
+    print(f"Wrote {output}: {header['store']['size']} plumbers, {len(header['arrays'])} arrays, "
+          f"{os.path.getsize(output) / 1e6:.1f} MB", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import io
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Tuple
+from catalog_schema import read_catalog
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file's contents"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def diff_by_name(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Match the rows of new_df to unchanged rows of old_df by Name
+
+    Returns source_rows for PlumberStore.updated (the old row of each
+    unchanged plumber, -1 for inserted or updated ones) and the counts of
+    inserted, updated and deleted plumbers.  Returns None for source_rows
+    when the two frames can't be diffed row by row (different columns or
+    dtypes, or duplicate names).  Categorical columns only need the same
+    kind of dtype; their values are compared, not their categories.
+    """
+    if list(old_df.columns) != list(new_df.columns) or 'Name' not in new_df.columns \
+            or not old_df['Name'].is_unique or not new_df['Name'].is_unique \
+            or any(str(old_df[column].dtype) != str(new_df[column].dtype) for column in new_df.columns):
+        return None, {'inserted': len(new_df), 'updated': 0, 'deleted': len(old_df)}
+
+    old_rows = pd.Index(old_df['Name']).get_indexer(new_df['Name'])
+    matched = np.flatnonzero(old_rows >= 0)
+    same = np.ones(len(matched), dtype=bool)
+    for column in new_df.columns:
+        old_values = old_df[column].to_numpy()[old_rows[matched]]
+        new_values = new_df[column].to_numpy()[matched]
+        differs = np.flatnonzero(old_values != new_values)
+        # Missing values never compare equal, so only the differing cells need a NaN check
+        both_missing = pd.isna(old_values[differs]) & pd.isna(new_values[differs])
+        same[differs[~both_missing]] = False
+
+    source_rows = np.full(len(new_df), -1, dtype=np.int64)
+    source_rows[matched[same]] = old_rows[matched[same]]
+    return source_rows, {
+        'inserted': len(new_df) - len(matched),
+        'updated': int((~same).sum()),
+        'deleted': len(old_df) - len(matched)
+    }
+
+
+class DatasetReloader:
+    """Reloads the plumber CSV into a DynamicAttributeSystem when it changes
+
+    Changes are detected by modification time and size, confirmed with a
+    content hash, and applied as a diff by plumber Name so only inserted
+    and updated plumbers are re-encoded.  The new catalog replaces the old
+    one in a single swap.
+    """
+
+    def __init__(self, attribute_system, file_path: str, min_interval_seconds: float = 5.0):
+        self.attribute_system = attribute_system
+        self.file_path = file_path
+        self.min_interval_seconds = min_interval_seconds
+        self._signature = self._stat()
+        self._digest = file_digest(file_path) if self._signature else None
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self.last_reload = None
+
+    def _stat(self) -> Tuple[int, int]:
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self) -> bool:
+        """Whether the file's contents differ from the last loaded version"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        digest = file_digest(self.file_path)
+        if digest == self._digest:
+            # Touched but not modified
+            self._signature = signature
+            return False
+        return True
+
+    def maybe_reload(self) -> Dict[str, Any]:
+        """Reload if the file changed, at most once per min_interval_seconds
+
+        Returns the reload summary, or None when nothing was reloaded.  Only
+        one caller reloads at a time; the others carry on with the current
+        catalog.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.min_interval_seconds:
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            self._last_check = now
+            if not self.changed():
+                return None
+            return self._reload()
+        finally:
+            self._lock.release()
+
+    def reload(self) -> Dict[str, Any]:
+        """Reload the file now, whether or not it changed"""
+        with self._lock:
+            return self._reload()
+
+    def _reload(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        signature = self._stat()
+        with open(self.file_path, 'rb') as f:
+            contents = f.read()
+        digest = hashlib.sha256(contents).hexdigest()
+        new_df = read_catalog(io.BytesIO(contents))
+
+        old_df = self.attribute_system.df
+        if old_df is None:
+            source_rows, summary = None, {'inserted': len(new_df), 'updated': 0, 'deleted': 0}
+        else:
+            source_rows, summary = diff_by_name(old_df, new_df)
+        if source_rows is not None and len(new_df) == len(old_df) \
+                and (source_rows == np.arange(len(new_df))).all():
+            summary['mode'] = 'unchanged'
+        else:
+            summary['mode'] = 'full' if source_rows is None else 'incremental'
+            self.attribute_system.apply_dataset(new_df, source_rows)
+
+        self._signature, self._digest = signature, digest
+        summary['plumbers'] = len(new_df)
+        summary['seconds'] = round(time.perf_counter() - started, 4)
+        self.last_reload = summary
+        return summary
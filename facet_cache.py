@@ -0,0 +1,172 @@
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Any
+from models import db, PlumberProfile, PlumberFacetVersion
+from availability import slot_options
+
+
+def _list_items(value: Any) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()] if isinstance(value, str) else []
+
+
+def _single_item(value: Any) -> List[str]:
+    return [value] if value else []
+
+
+# Catalog column behind each facet, and how one value splits into facet items.  Time slots
+# are offered as the bookable slots parse_slot() accepts, so unreadable items are left out
+CATALOG_FACETS = {
+    'locations': ('District', _single_item),
+    'work_types': ('Work_Specialization', _single_item),
+    'time_slots': ('Free_Time_Slots', slot_options),
+    'languages': ('Languages_Spoken', _list_items)
+}
+# PlumberProfile column behind each facet, and how one value splits into facet items
+PROFILE_FACETS = {
+    'work_types': ('specialization', _single_item),
+    'time_slots': ('free_time_slots', slot_options),
+    'languages': ('languages', _list_items)
+}
+
+
+@dataclass(frozen=True)
+class FacetSet:
+    """Sorted values of each facet; tag changes whenever any value list does"""
+    version: int
+    tag: str
+    values: Dict[str, List[str]]
+
+
+def _facet_set(version: int, values: Dict[str, List[str]]) -> FacetSet:
+    tag = hashlib.sha1(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return FacetSet(version, tag, values)
+
+
+def profile_values(profile: Any) -> Dict[str, List[str]]:
+    """Facet values one plumber profile (or a row with the same columns) contributes"""
+    return {facet: split(getattr(profile, column)) for facet, (column, split) in PROFILE_FACETS.items()}
+
+
+class FacetCache:
+    """Dropdown value lists of the CSV catalog and of registered plumber profiles, served from memory
+
+    Catalog facets are rebuilt from the PlumberStore when the attribute
+    system's version moves.  Profile facets keep a count per value, so
+    save_profile() applies a registration or availability change in place.
+    Each profile write bumps a version row in the same transaction, and
+    other workers reload the counts when they see it move, checking at
+    most once per min_interval_seconds.  Profile methods must be used
+    inside an application context.
+    """
+
+    def __init__(self, attribute_system, min_interval_seconds: float = 1.0):
+        self.attribute_system = attribute_system
+        self.min_interval_seconds = min_interval_seconds
+        self._catalog = None
+        self._profile_counts = {facet: Counter() for facet in PROFILE_FACETS}
+        self._profiles = None
+        self._profile_version = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def catalog_facets(self) -> FacetSet:
+        """Facets of the CSV catalog: locations, work_types, time_slots and languages"""
+        catalog = self._catalog
+        # Read the version before the store; a store newer than its label is simply rebuilt again
+        version = self.attribute_system.version
+        if catalog is None or catalog.version != version:
+            store = self.attribute_system.get_store()
+            catalog = _facet_set(version, {
+                facet: sorted({item for value in store.distinct_values(column) for item in split(value)})
+                for facet, (column, split) in CATALOG_FACETS.items()
+            })
+            self._catalog = catalog
+        return catalog
+
+    def profile_facets(self) -> FacetSet:
+        """Facets of registered plumbers: work_types, time_slots and languages"""
+        self.sync()
+        with self._lock:
+            if self._profiles is None:
+                self._profiles = _facet_set(self._profile_version, {
+                    facet: sorted(counts) for facet, counts in self._profile_counts.items()
+                })
+            return self._profiles
+
+    def _version_row(self) -> PlumberFacetVersion:
+        row = db.session.get(PlumberFacetVersion, 1)
+        if row is None:
+            row = PlumberFacetVersion(id=1, version=0)
+            db.session.add(row)
+        return row
+
+    def _apply(self, values: Dict[str, List[str]], sign: int):
+        for facet, items in values.items():
+            counts = self._profile_counts[facet]
+            for item in items:
+                counts[item] += sign
+                if counts[item] <= 0:
+                    del counts[item]
+        self._profiles = None
+
+    def load_profiles(self):
+        """Count the facet values of every profile afresh"""
+        with self._lock:
+            # Version first: a write landing in between only causes one more reload
+            version = self._version_row().version
+            db.session.commit()
+            columns = [getattr(PlumberProfile, column) for column, _ in PROFILE_FACETS.values()]
+            self._profile_counts = {facet: Counter() for facet in PROFILE_FACETS}
+            for row in db.session.query(*columns):
+                self._apply(profile_values(row), 1)
+            self._profile_version = version
+            self._last_check = time.monotonic()
+
+    def sync(self) -> bool:
+        """Reload the profile counts if another worker wrote since, at most once per min_interval_seconds"""
+        if self._profile_version is None:
+            self.load_profiles()
+            return True
+        now = time.monotonic()
+        if now - self._last_check < self.min_interval_seconds:
+            return False
+        self._last_check = now
+        row = db.session.get(PlumberFacetVersion, 1)
+        version = row.version if row is not None else 0
+        db.session.commit()
+        if version == self._profile_version:
+            return False
+        self.load_profiles()
+        return True
+
+    def save_profile(self, profile: PlumberProfile, previous: Dict[str, List[str]] = None):
+        """Commit a new or edited profile together with a bump of the facet version
+
+        previous is profile_values(profile) from before the edit, or None
+        for a new profile.
+        """
+        with self._lock:
+            try:
+                db.session.add(profile)
+                row = self._version_row()
+                row.version += 1
+                row.updated_at = datetime.utcnow()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            if self._profile_version is None:
+                return
+            if row.version != self._profile_version + 1:
+                # Another worker wrote in between; recount on the next read
+                self._profile_version = None
+                return
+            if previous is not None:
+                self._apply(previous, -1)
+            self._apply(profile_values(profile), 1)
+            self._profile_version = row.version
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+from typing import Tuple
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+# Distance methods accepted by distances(); equirectangular is within about 0.2% below 100 km
+HAVERSINE = 'haversine'
+EQUIRECTANGULAR = 'equirectangular'
+METHODS = (HAVERSINE, EQUIRECTANGULAR)
+
+
+def haversine_array(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Haversine distance in km from one point to arrays of points (or between broadcast arrays)"""
+    phi1 = np.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = np.radians(lats - lat)
+    dlambda = np.radians(lons - lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def equirectangular_array(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Flat-earth approximation of the distance in km, one cosine per origin point"""
+    dlon = (lons - lon) * np.cos(np.radians(lat))
+    return KM_PER_DEGREE * np.hypot(lats - lat, dlon)
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lon_min, lon_max) enclosing every point within radius_km
+
+    The longitude span is taken at the latitude furthest from the equator,
+    and covers every longitude near the poles.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    widest_lat = min(abs(lat) + dlat, 90.0)
+    cos_lat = math.cos(math.radians(widest_lat))
+    dlon = radius_km / (KM_PER_DEGREE * cos_lat) if cos_lat > 1e-9 else 360.0
+    if dlon >= 180:
+        return lat - dlat, lat + dlat, -math.inf, math.inf
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def in_bounding_box(lat: float, lon: float, radius_km: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Mask of the points inside the bounding box of the circle, using comparisons only"""
+    lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+    return (lats >= lat_min) & (lats <= lat_max) & (lons >= lon_min) & (lons <= lon_max)
+
+
+def distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray,
+              method: str = HAVERSINE, max_km: float = None) -> np.ndarray:
+    """Distance in km from one point to arrays of points
+
+    With max_km, points outside the bounding box of that radius are given
+    inf without computing their distance.  Missing coordinates give nan.
+    """
+    if method == HAVERSINE:
+        distance_function = haversine_array
+    elif method == EQUIRECTANGULAR:
+        distance_function = equirectangular_array
+    else:
+        raise ValueError(f"Unknown distance method '{method}', expected one of {list(METHODS)}")
+    if max_km is None:
+        return distance_function(lat, lon, lats, lons)
+
+    inside = np.flatnonzero(in_bounding_box(lat, lon, max_km, lats, lons))
+    result = np.full(len(lats), np.inf)
+    result[np.isnan(lats) | np.isnan(lons)] = np.nan
+    result[inside] = distance_function(lat, lon, lats[inside], lons[inside])
+    return result
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float, method: str = HAVERSINE) -> float:
+    """Distance in km between two points"""
+    return float(distances(lat1, lon1, np.array([lat2]), np.array([lon2]), method)[0])
@@ -0,0 +1,120 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Tuple
+
+# Preference keys holding client coordinates, quantized before keying
+COORDINATE_KEYS = ('client_lat', 'client_lon')
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable, order-independent form of a preference value"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def copy_results(results: List[Dict]) -> List[Dict]:
+    """Copy match results so callers can annotate them without touching the cache"""
+    copies = []
+    for plumber in results:
+        plumber = dict(plumber)
+        if isinstance(plumber.get('Attribute_Scores'), dict):
+            plumber['Attribute_Scores'] = dict(plumber['Attribute_Scores'])
+        copies.append(plumber)
+    return copies
+
+
+class MatchCache:
+    """Bounded LRU cache of match results with a time-to-live
+
+    Keys are canonicalized preference dicts: preference order does not
+    matter and client coordinates are snapped to a grid of grid_degrees,
+    so requests from a few hundred metres apart share an entry.  A
+    grid_degrees of 0 keys on the exact coordinates.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300, grid_degrees: float = 0.005):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.grid_degrees = grid_degrees
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _quantize(self, value: Any) -> Any:
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return _freeze(value)
+        if not self.grid_degrees:
+            return value
+        return round(value / self.grid_degrees)
+
+    def make_key(self, preferences: Dict[str, Any], *context: Any) -> Tuple:
+        """Canonical cache key for a preference dict plus any extra arguments"""
+        items = []
+        for name in sorted(preferences, key=str):
+            value = preferences[name]
+            if name in COORDINATE_KEYS:
+                value = self._quantize(value)
+            else:
+                value = _freeze(value)
+            items.append((str(name), type(value).__name__, value))
+        return tuple(items), _freeze(context)
+
+    def get(self, key: Tuple) -> Any:
+        """Cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: Any):
+        """Store value under key, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'grid_degrees': self.grid_degrees
+        }
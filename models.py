@@ -3,9 +3,13 @@ from flask_login import UserMixin
 from datetime import datetime
 import secrets
 import hashlib
+from availability import parse_availability, availability_bitmap, SLOTS_PER_DAY, DAYS
 
 db = SQLAlchemy()
 
+# Size of a stored weekly availability bitmap
+AVAILABILITY_BYTES = SLOTS_PER_DAY * len(DAYS) // 8
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -25,6 +29,39 @@ class PlumberProfile(db.Model):
     lat = db.Column(db.Float)
     lon = db.Column(db.Float)
     bookings = db.relationship('Booking', backref='plumber_profile', foreign_keys='Booking.plumber_id')
+    availability = db.relationship('PlumberAvailability', backref='plumber', uselist=False,
+                                   cascade='all, delete-orphan')
+
+    def set_free_time_slots(self, text):
+        """Store free-text availability with its bitmap; raises ValueError if the text can't be read"""
+        bitmap = availability_bitmap(parse_availability(text))
+        self.free_time_slots = text
+        if self.availability is None:
+            self.availability = PlumberAvailability()
+        self.availability.bitmap = bitmap
+
+    def weekly_availability(self):
+        """Weekly availability bitmap, parsed from the text for profiles saved before bitmaps; None if unreadable"""
+        if self.availability is not None:
+            return self.availability.bitmap
+        try:
+            return availability_bitmap(parse_availability(self.free_time_slots))
+        except ValueError:
+            return None
+
+class PlumberAvailability(db.Model):
+    """Weekly availability of one plumber profile as a bitmap of time slots (see availability)"""
+    plumber_id = db.Column(db.Integer, db.ForeignKey('plumber_profile.id'), primary_key=True)
+    bits = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def bitmap(self):
+        return int.from_bytes(self.bits, 'little')
+
+    @bitmap.setter
+    def bitmap(self, value):
+        self.bits = value.to_bytes(AVAILABILITY_BYTES, 'little')
 
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -74,4 +111,30 @@ class APIKey(db.Model):
     
     def check_key(self, key):
         """Check if the provided key matches this API key"""
-        return self.key_hash == self.hash_key(key) 
\ No newline at end of file
+        return self.key_hash == self.hash_key(key) 
+
+class AttributeRecord(db.Model):
+    """One persisted attribute definition of the shared attribute registry"""
+    name = db.Column(db.String(100), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    display_name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(20), nullable=False)
+    type = db.Column(db.String(20), nullable=False)
+    weight = db.Column(db.Float, nullable=False)
+    description = db.Column(db.Text)
+    possible_values = db.Column(db.Text)  # JSON list
+    min_value = db.Column(db.Float)
+    max_value = db.Column(db.Float)
+    unit = db.Column(db.String(50))
+
+class AttributeRegistryVersion(db.Model):
+    """Single row counting writes to the attribute registry"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PlumberFacetVersion(db.Model):
+    """Single row counting writes to plumber profiles that can change the facet lists"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,417 @@
+import re
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Any, Tuple
+from text_index import TrigramIndex
+
+# Comma/slash separated list columns and the separator each one uses
+MULTI_VALUED_COLUMNS = {
+    'Current_Tasks': ',',
+    'Free_Time_Slots': ',',
+    'Languages_Spoken': ',',
+    'Equipment_Available': ',',
+    'Payment_Methods': '/',
+    'Specializations_Detailed': ',',
+    'Languages_Detailed': ',',
+    'Equipment_List': ',',
+    'Service_Areas': ',',
+    'Certifications': ',',
+}
+
+# Columns with posting-list indexes built at load time (others are built on first use)
+INDEXED_COLUMNS = ['Work_Specialization', 'District', 'Languages_Spoken', 'Service_Areas']
+
+# Free-text columns with trigram indexes built at load time (Name is indexed on first search)
+TEXT_INDEXED_COLUMNS = ['Work_Specialization', 'Specializations_Detailed', 'Languages_Spoken',
+                        'Payment_Methods', 'Equipment_Available', 'Certifications', 'Service_Areas']
+
+
+def split_values(value: Any, separator: str = ',') -> List[str]:
+    """Split a list column value into its stripped, non-empty items"""
+    if not isinstance(value, str):
+        return []
+    return [item.strip() for item in value.split(separator) if item.strip()]
+
+
+def intersect_postings(*posting_lists: np.ndarray) -> np.ndarray:
+    """Plumber ids present in every posting list, smallest list first"""
+    if not posting_lists:
+        return np.empty(0, dtype=np.int32)
+    ordered = sorted(posting_lists, key=len)
+    result = ordered[0]
+    for postings in ordered[1:]:
+        if len(result) == 0:
+            break
+        result = np.intersect1d(result, postings, assume_unique=True)
+    return result
+
+
+# Set bits in every byte value, for counting packed bitsets
+_BYTE_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> int:
+    """Number of plumbers in a bitset packed with np.packbits"""
+    return int(_BYTE_POPCOUNT[bits].sum())
+
+
+class PlumberStore:
+    """Compact, array-backed copy of the plumber catalog
+
+    Single-valued text columns are kept as int32 codes into a table of
+    distinct values (-1 for missing), list columns additionally get a
+    vocabulary of their items with posting lists per item, and numeric
+    columns are float32 wherever that is lossless.  The DataFrame itself
+    is not kept; to_frame() rebuilds it when needed.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        self.columns = list(df.columns)
+        self.dtypes = {column: str(df[column].dtype) for column in self.columns}
+        self.codes = {}
+        self.categories = {}
+        self.numeric = {}
+        self.int_columns = set()
+        self.vocabularies = {}
+        self._category_codes = {}
+        self._postings = {}
+        self._token_postings = {}
+        self._text_indexes = {}
+
+        for column in self.columns:
+            series = df[column]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                self._add_numeric(column, series)
+            else:
+                self._add_categorical(column, series)
+                if column in MULTI_VALUED_COLUMNS:
+                    self._add_multi_valued(column, MULTI_VALUED_COLUMNS[column])
+
+        for column in INDEXED_COLUMNS:
+            if column in self.codes:
+                self._build_postings(column)
+                if column in self.vocabularies:
+                    self._build_token_postings(column)
+        for column in TEXT_INDEXED_COLUMNS:
+            if column in self.codes:
+                self.text_index(column)
+
+    def _add_numeric(self, column: str, series: pd.Series):
+        values = series.to_numpy(dtype=np.float64)
+        compact = values.astype(np.float32)
+        lossless = np.array_equal(compact.astype(np.float64), values, equal_nan=True)
+        self.numeric[column] = compact if lossless else values
+        if pd.api.types.is_integer_dtype(series):
+            self.int_columns.add(column)
+
+    def _add_categorical(self, column: str, series: pd.Series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        self.codes[column] = codes.astype(np.int32)
+        self.categories[column] = list(uniques)
+        self._category_codes[column] = {value: code for code, value in enumerate(self.categories[column])}
+
+    def _add_multi_valued(self, column: str, separator: str):
+        vocabulary = {}
+        live = self._live_codes(column)
+        for code, value in enumerate(self.categories[column]):
+            # Values no plumber has any more (after updated()) contribute no items
+            if live[code]:
+                for token in split_values(value, separator):
+                    vocabulary.setdefault(token, len(vocabulary))
+        self.vocabularies[column] = list(vocabulary)
+
+    def _live_codes(self, column: str) -> np.ndarray:
+        """Which value codes of a column at least one plumber has"""
+        codes = self.codes[column]
+        return np.bincount(codes[codes >= 0], minlength=len(self.categories[column])) > 0
+
+    def updated(self, df: pd.DataFrame, source_rows: np.ndarray) -> 'PlumberStore':
+        """New store for df that reuses this store's encoding of unchanged plumbers
+
+        source_rows[i] is the row of this store holding plumber i of df
+        unchanged, or -1 for inserted and updated plumbers, which are the
+        only rows encoded from scratch.  df must have this store's columns
+        and dtypes.  This store is left untouched.
+        """
+        store = PlumberStore.__new__(PlumberStore)
+        store.size = len(df)
+        store.columns = list(df.columns)
+        store.dtypes = {column: str(df[column].dtype) for column in store.columns}
+        store.codes = {}
+        store.categories = {}
+        store.numeric = {}
+        store.int_columns = set(self.int_columns)
+        store.vocabularies = {}
+        store._category_codes = {}
+        store._postings = {}
+        store._token_postings = {}
+        store._text_indexes = {}
+
+        source_rows = np.asarray(source_rows)
+        kept = np.flatnonzero(source_rows >= 0)
+        changed = np.flatnonzero(source_rows < 0)
+        from_rows = source_rows[kept]
+
+        for column in store.columns:
+            fresh = df[column].iloc[changed]
+            if column in self.numeric:
+                fresh = fresh.to_numpy(dtype=np.float64)
+                dtype = self.numeric[column].dtype
+                if dtype == np.float32 and not np.array_equal(
+                        fresh.astype(np.float32).astype(np.float64), fresh, equal_nan=True):
+                    dtype = np.float64
+                values = np.empty(store.size, dtype=dtype)
+                values[kept] = self.numeric[column][from_rows]
+                values[changed] = fresh
+                store.numeric[column] = values
+                continue
+
+            categories = list(self.categories[column])
+            category_codes = dict(self._category_codes[column])
+            codes = np.empty(store.size, dtype=np.int32)
+            codes[kept] = self.codes[column][from_rows]
+            for position, value in zip(changed.tolist(), fresh.tolist()):
+                if pd.isna(value):
+                    codes[position] = -1
+                    continue
+                if value not in category_codes:
+                    category_codes[value] = len(categories)
+                    categories.append(value)
+                codes[position] = category_codes[value]
+            store.codes[column] = codes
+            store.categories[column] = categories
+            store._category_codes[column] = category_codes
+            if column in MULTI_VALUED_COLUMNS:
+                store._add_multi_valued(column, MULTI_VALUED_COLUMNS[column])
+            if column in self._text_indexes:
+                store._text_indexes[column] = self._text_indexes[column].extended(categories)
+
+        for column in INDEXED_COLUMNS:
+            if column in store.codes:
+                store._build_postings(column)
+                if column in store.vocabularies:
+                    store._build_token_postings(column)
+        return store
+
+    def to_snapshot(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """JSON-serializable metadata and the named arrays that make up this store"""
+        for column in INDEXED_COLUMNS:
+            if column in self.vocabularies and column not in self._token_postings:
+                self._build_token_postings(column)
+        meta = {
+            'size': self.size,
+            'columns': self.columns,
+            'dtypes': self.dtypes,
+            'int_columns': sorted(self.int_columns),
+            'categories': {column: [value.item() if isinstance(value, np.generic) else value for value in values]
+                           for column, values in self.categories.items()},
+            'vocabularies': self.vocabularies,
+            'postings': sorted(self._postings),
+            'token_postings': sorted(self._token_postings)
+        }
+        arrays = {}
+        for column, codes in self.codes.items():
+            arrays[f'codes/{column}'] = codes
+        for column, values in self.numeric.items():
+            arrays[f'numeric/{column}'] = values
+        for kind, postings in (('postings', self._postings), ('token_postings', self._token_postings)):
+            for column, (order, offsets) in postings.items():
+                arrays[f'{kind}/{column}/order'] = order
+                arrays[f'{kind}/{column}/offsets'] = np.asarray(offsets, dtype=np.int64)
+        return meta, arrays
+
+    @classmethod
+    def from_snapshot(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> 'PlumberStore':
+        """Store over arrays from to_snapshot(), used as they are (e.g. memory-mapped and read-only)"""
+        store = cls.__new__(cls)
+        store.size = meta['size']
+        store.columns = meta['columns']
+        store.dtypes = meta['dtypes']
+        store.int_columns = set(meta['int_columns'])
+        store.categories = meta['categories']
+        store.vocabularies = meta['vocabularies']
+        store._category_codes = {column: {value: code for code, value in enumerate(values)}
+                                 for column, values in store.categories.items()}
+        store.codes = {column: arrays[f'codes/{column}'] for column in store.categories}
+        store.numeric = {column: arrays[f'numeric/{column}'] for column in store.columns
+                         if column not in store.categories}
+        store._postings = {column: (arrays[f'postings/{column}/order'], arrays[f'postings/{column}/offsets'])
+                           for column in meta['postings']}
+        store._token_postings = {column: (arrays[f'token_postings/{column}/order'],
+                                          arrays[f'token_postings/{column}/offsets'])
+                                 for column in meta['token_postings']}
+        store._text_indexes = {}
+        return store
+
+    def to_frame(self) -> pd.DataFrame:
+        """The catalog as a DataFrame with the dtypes it was loaded with"""
+        data = {}
+        for column in self.columns:
+            if column in self.numeric:
+                data[column] = pd.Series(self.numeric[column], dtype=self.dtypes[column])
+            else:
+                # Code -1 picks the trailing missing value
+                values = np.array(self.categories[column] + [np.nan], dtype=object)
+                data[column] = pd.Series(values[self.codes[column]], dtype=self.dtypes[column])
+        return pd.DataFrame(data, columns=self.columns)
+
+    def _build_postings(self, column: str):
+        """CSR posting lists: plumber ids grouped by value code, ascending within each value"""
+        codes = self.codes[column]
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        offsets = np.searchsorted(codes[order], np.arange(len(self.categories[column]) + 1), side='left')
+        self._postings[column] = (order, offsets)
+
+    def _build_token_postings(self, column: str):
+        """CSR posting lists from each list item to the plumbers having it"""
+        vocabulary = {token: bit for bit, token in enumerate(self.vocabularies[column])}
+        separator = MULTI_VALUED_COLUMNS[column]
+        token_codes = [[] for _ in vocabulary]
+        live = self._live_codes(column)
+        for code, value in enumerate(self.categories[column]):
+            # Same values as the vocabulary: ones no plumber has any more (after updated()) are skipped
+            if not live[code]:
+                continue
+            for token in set(split_values(value, separator)):
+                token_codes[vocabulary[token]].append(code)
+
+        lists = [np.sort(np.concatenate([self.postings(column, code) for code in codes]))
+                 if codes else np.empty(0, dtype=np.int32) for codes in token_codes]
+        offsets = np.cumsum([0] + [len(ids) for ids in lists])
+        order = np.concatenate(lists).astype(np.int32) if lists else np.empty(0, dtype=np.int32)
+        self._token_postings[column] = (order, offsets)
+
+    def postings(self, column: str, code: int) -> np.ndarray:
+        """Plumber ids whose column has the value with this code"""
+        if column not in self._postings:
+            self._build_postings(column)
+        order, offsets = self._postings[column]
+        return order[offsets[code]:offsets[code + 1]]
+
+    def lookup(self, column: str, value: Any) -> np.ndarray:
+        """Plumber ids whose column equals value"""
+        code = self._category_codes.get(column, {}).get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self.postings(column, code)
+
+    def lookup_token(self, column: str, token: str) -> np.ndarray:
+        """Plumber ids whose list column includes token as one of its items"""
+        if column not in self.vocabularies:
+            return np.empty(0, dtype=np.int32)
+        if column not in self._token_postings:
+            self._build_token_postings(column)
+        if token not in self.vocabularies[column]:
+            return np.empty(0, dtype=np.int32)
+        bit = self.vocabularies[column].index(token)
+        order, offsets = self._token_postings[column]
+        return order[offsets[bit]:offsets[bit + 1]]
+
+    def lookup_contains(self, column: str, pattern: str) -> np.ndarray:
+        """Plumber ids whose column contains the regex pattern, like Series.str.contains"""
+        matching = [code for code, value in enumerate(self.categories.get(column, []))
+                    if isinstance(value, str) and re.search(pattern, value)]
+        if not matching:
+            return np.empty(0, dtype=np.int32)
+        if len(matching) == 1:
+            return self.postings(column, matching[0])
+        return np.sort(np.concatenate([self.postings(column, code) for code in matching]))
+
+    def text_index(self, column: str) -> TrigramIndex:
+        """Trigram index over the distinct values of a text column"""
+        if column not in self._text_indexes:
+            self._text_indexes[column] = TrigramIndex(self.categories[column])
+        return self._text_indexes[column]
+
+    def search_text(self, column: str, token: str, case_sensitive: bool = False) -> np.ndarray:
+        """Plumber ids whose column contains token, using the trigram index"""
+        index = self.text_index(column)
+        codes = index.search_case_sensitive(token) if case_sensitive else index.search(token)
+        if len(codes) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate([self.postings(column, code) for code in codes.tolist()]))
+
+    def find_by_name(self, name: str) -> np.ndarray:
+        """Plumber ids with this name, falling back to a case-insensitive match"""
+        ids = self.lookup('Name', name)
+        if len(ids) or not isinstance(name, str) or 'Name' not in self.codes:
+            return ids
+        index = self.text_index('Name')
+        codes = [code for code in index.search(name).tolist() if index.lowered[code] == name.lower()]
+        if not codes:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate([self.postings('Name', code) for code in codes]))
+
+    def mask(self, ids: np.ndarray) -> np.ndarray:
+        """Boolean mask over all plumbers from a list of ids"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.codes or column in self.numeric
+
+    def is_numeric(self, column: str) -> bool:
+        return column in self.numeric
+
+    def numeric_column(self, column: str) -> np.ndarray:
+        """Numeric column as float64 for scoring"""
+        return self.numeric[column].astype(np.float64)
+
+    def value(self, column: str, idx: int) -> Any:
+        """Original value of one cell"""
+        if column in self.numeric:
+            value = self.numeric[column][idx]
+            if column in self.int_columns:
+                return int(value)
+            return float(value)
+        code = self.codes[column][idx]
+        return self.categories[column][code] if code >= 0 else float('nan')
+
+    def record(self, idx: int) -> Dict[str, Any]:
+        """One plumber as a dict keyed by dataset column"""
+        return {column: self.value(column, idx) for column in self.columns}
+
+    def distinct_values(self, column: str) -> List[str]:
+        """Distinct non-missing values of a text column"""
+        if column not in self.codes:
+            return []
+        return [value for value, live in zip(self.categories[column], self._live_codes(column)) if live]
+
+    def distinct_tokens(self, column: str) -> List[str]:
+        """Distinct items of a list column"""
+        return list(self.vocabularies.get(column, []))
+
+    def equals_mask(self, column: str, value: Any) -> np.ndarray:
+        """Plumbers whose column equals value"""
+        return self.mask(self.lookup(column, value))
+
+    def contains_mask(self, column: str, pattern: str) -> np.ndarray:
+        """Plumbers whose column contains the regex pattern, like Series.str.contains"""
+        return self.mask(self.lookup_contains(column, pattern))
+
+    def factorize(self, columns: Tuple[str, ...]) -> Tuple[np.ndarray, List[Dict]]:
+        """Codes for each distinct combination of values across text columns"""
+        codes = np.zeros(self.size, dtype=np.int64)
+        for column in columns:
+            if column in self.numeric:
+                values, column_codes = np.unique(self.numeric[column], return_inverse=True)
+                codes = codes * len(values) + column_codes.reshape(-1)
+            else:
+                codes = codes * (len(self.categories[column]) + 1) + (self.codes[column] + 1)
+        _, first_rows, codes = np.unique(codes, return_index=True, return_inverse=True)
+        uniques = [{column: self.value(column, idx) for column in columns} for idx in first_rows]
+        return codes.reshape(-1), uniques
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's arrays and value tables"""
+        total = sum(arr.nbytes for arr in self.codes.values())
+        total += sum(arr.nbytes for arr in self.numeric.values())
+        total += sum(order.nbytes + offsets.nbytes for order, offsets in self._postings.values())
+        total += sum(order.nbytes + offsets.nbytes for order, offsets in self._token_postings.values())
+        total += sum(len(str(v)) for values in self.categories.values() for v in values)
+        return total
@@ -0,0 +1,75 @@
+from typing import Dict, List, Any, Callable, Tuple
+
+# AttributeType values the planner treats specially
+REQUIRED = 'required'
+NEGATIVE = 'negative'
+
+
+def is_negative(attr) -> bool:
+    """Whether a match on this attribute lowers the score"""
+    return attr.type.value == NEGATIVE
+
+
+class QueryPlan:
+    """Evaluation order for one preference dict
+
+    Stages run in order: the catalog (or the plumbers within the search
+    radius), REQUIRED attributes as hard filters with the most selective
+    first, soft scoring of the remaining attributes on the survivors,
+    NEGATIVE attributes as penalties, and finally the distance penalty.
+    The engine records the number of candidates left after each stage.
+    """
+
+    def __init__(self, preferences: Dict[str, Any], required: List[Tuple], soft: List[Tuple],
+                 negative: List[Tuple]):
+        self.preferences = preferences
+        self.required = required
+        self.soft = soft
+        self.negative = negative
+        self.located = 'client_lat' in preferences and 'client_lon' in preferences
+        self.stages = []
+
+    def record(self, stage: str, candidates: int, **details: Any):
+        """Note the candidates left after a stage"""
+        self.stages.append({'stage': stage, **details, 'candidates': int(candidates)})
+
+    def explain(self) -> Dict[str, Any]:
+        """The chosen plan and the candidate count after each executed stage"""
+        return {
+            'required': [attr_name for attr_name, _, _ in self.required],
+            'soft': [attr_name for attr_name, _, _ in self.soft],
+            'negative': [attr_name for attr_name, _, _ in self.negative],
+            'distance_penalty': self.located,
+            'stages': self.stages
+        }
+
+
+def plan_query(customer_preferences: Dict[str, Any], attributes: Dict,
+               estimate: Callable[[str, Any, Any], int] = None) -> QueryPlan:
+    """Split preferences into hard filters, soft scores and penalties
+
+    estimate(attr_name, attr, value) gives the expected number of plumbers
+    passing a REQUIRED attribute, or None when it can't be evaluated as a
+    filter (it is then scored like any other attribute).  Filters run in
+    ascending order of that estimate.  A REQUIRED attribute with the value
+    'Any' matches every plumber and is only scored.
+    """
+    required, soft, negative = [], [], []
+    estimates = {}
+    for attr_name, customer_value in customer_preferences.items():
+        if attr_name not in attributes or customer_value is None:
+            continue
+        attr = attributes[attr_name]
+        item = (attr_name, attr, customer_value)
+        if is_negative(attr):
+            negative.append(item)
+        elif attr.type.value == REQUIRED and customer_value != 'Any':
+            estimates[attr_name] = estimate(*item) if estimate is not None else 0
+            if estimates[attr_name] is None:
+                soft.append(item)
+            else:
+                required.append(item)
+        else:
+            soft.append(item)
+    required.sort(key=lambda item: estimates[item[0]])
+    return QueryPlan(customer_preferences, required, soft, negative)
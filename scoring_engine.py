@@ -0,0 +1,675 @@
+import numpy as np
+from typing import Dict, List, Any, Callable, Tuple, Iterator
+from plumber_store import PlumberStore, TEXT_INDEXED_COLUMNS, popcount
+from spatial_index import SpatialIndex
+from availability_index import AvailabilityIndex
+from geo import HAVERSINE, distances, haversine_array
+from query_planner import QueryPlan, plan_query, is_negative
+
+# Numeric attributes where a lower plumber value is better for the customer
+LOWER_IS_BETTER = ['response_time', 'max_distance', 'max_cost']
+# Numeric attributes where a higher plumber value is better for the customer
+HIGHER_IS_BETTER = ['experience_years', 'min_rating', 'min_success_rate', 'guarantee_period']
+# Upper bound on queries x plumbers distances held in memory at once by match_batch
+BATCH_DISTANCE_CELLS = 2_000_000
+# Plumber dicts materialized at a time when iterating over a ranking
+RANKING_CHUNK_SIZE = 100
+# Match tiers of a text preference, each worth weight * (0, 0.6, 0.7, 0.8, 1.0)
+TIER_NONE, TIER_CASE_INSENSITIVE, TIER_DETAILED, TIER_SUBSTRING, TIER_EXACT = range(5)
+# Percentiles given for each attribute and for the match score in reports
+REPORT_PERCENTILES = (25, 50, 75, 90)
+
+
+def round_scores(values: np.ndarray, ndigits: int = 2) -> np.ndarray:
+    """Round an array exactly like the builtin round()"""
+    scaled = values * 10 ** ndigits
+    rounded = np.round(values, ndigits)
+    # np.round can disagree with round() only right next to a .5 boundary
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+def score_statistics(matrix: np.ndarray, percentiles: Tuple[int, ...] = REPORT_PERCENTILES) -> List[Dict[str, float]]:
+    """Mean, min, max and percentiles of every column of a score matrix, rounded to 2 decimals"""
+    if matrix.shape[0] == 0:
+        return [{} for _ in range(matrix.shape[1])]
+    stats = {
+        'average_score': matrix.mean(axis=0),
+        'max_score': matrix.max(axis=0),
+        'min_score': matrix.min(axis=0)
+    }
+    if percentiles:
+        for percentile, values in zip(percentiles, np.percentile(matrix, percentiles, axis=0)):
+            stats[f'p{percentile}'] = values
+    rounded = {key: np.round(values, 2).tolist() for key, values in stats.items()}
+    return [{key: values[column] for key, values in rounded.items()} for column in range(matrix.shape[1])]
+
+
+class Ranking:
+    """Every matching plumber for one query, scored but not yet materialized
+
+    Only plumber ids and their rounded match scores are kept; distances and
+    per-attribute scores are recomputed for the plumbers of a page when it
+    is read.
+    """
+
+    def __init__(self, preferences: Dict[str, Any], ids: np.ndarray, scores: np.ndarray,
+                 no_preferences: bool = False):
+        self.preferences = dict(preferences)
+        self.ids = ids
+        self.scores = scores
+        self.no_preferences = no_preferences
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.scores.nbytes
+
+
+class ScoringEngine:
+    """Columnar scoring of one attribute across the whole plumber catalog"""
+
+    def __init__(self, store: PlumberStore, column_mapping: Dict[str, str],
+                 scalar_score: Callable[[Dict, str, Any, Any], float]):
+        self.store = store
+        self.size = len(store)
+        self.column_mapping = column_mapping
+        self.scalar_score = scalar_score
+        self._factorized = {}
+        self._tier_tables = {}
+        self._tier_counts = {}
+        self._value_bitsets = {}
+        self.latitudes = store.numeric_column('Latitude') if 'Latitude' in store else None
+        self.longitudes = store.numeric_column('Longitude') if 'Longitude' in store else None
+        self._spatial_index = None
+        self._availability = None
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """Grid index over plumber locations, built on first use"""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.latitudes, self.longitudes)
+        return self._spatial_index
+
+    @property
+    def availability(self) -> AvailabilityIndex:
+        """Free_Time_Slots bitmaps, built on first use"""
+        if self._availability is None:
+            self._availability = AvailabilityIndex.from_store(self.store)
+        return self._availability
+
+    def warm_up(self):
+        """Build the indexes that are otherwise built on first use"""
+        if self.latitudes is not None and self.longitudes is not None:
+            self.spatial_index
+        self.availability
+        for column in TEXT_INDEXED_COLUMNS:
+            if column in self.store.codes:
+                self.store.text_index(column)
+
+    def _size(self, rows) -> int:
+        return self.size if rows is None else len(rows)
+
+    def _factorize(self, columns: Tuple[str, ...]) -> Tuple[np.ndarray, List[Dict]]:
+        """Map every plumber to the distinct combination of values in columns"""
+        if columns not in self._factorized:
+            self._factorized[columns] = self.store.factorize(columns)
+        return self._factorized[columns]
+
+    def _uses_detailed(self, attribute_name: str, column: str) -> bool:
+        """Whether work_type falls back to Specializations_Detailed for this column"""
+        detailed = 'Specializations_Detailed'
+        return attribute_name == 'work_type' and column != detailed and detailed in self.store.codes
+
+    def _text_tiers(self, attribute_name: str, column: str, customer_value: str,
+                    rows: np.ndarray = None) -> np.ndarray:
+        """Match tier of each plumber for a text preference, found through the trigram indexes
+
+        Same tiers as calculate_attribute_score: exact match, substring,
+        case-insensitive substring and, for work_type only, a case-insensitive
+        hit in Specializations_Detailed.
+        """
+        index = self.store.text_index(column)
+        # One slot per distinct value plus a trailing slot for missing values (code -1)
+        value_tiers = np.zeros(len(index.values) + 1, dtype=np.uint8)
+        value_tiers[index.search(customer_value)] = TIER_CASE_INSENSITIVE
+        value_tiers[index.search_case_sensitive(customer_value)] = TIER_SUBSTRING
+        exact_code = self.store._category_codes[column].get(customer_value)
+        if exact_code is not None:
+            value_tiers[exact_code] = TIER_EXACT
+
+        codes = self.store.codes[column] if rows is None else self.store.codes[column][rows]
+        tiers = value_tiers[codes]
+
+        if self._uses_detailed(attribute_name, column):
+            detailed = 'Specializations_Detailed'
+            detailed_index = self.store.text_index(detailed)
+            detailed_tiers = np.zeros(len(detailed_index.values) + 1, dtype=np.uint8)
+            detailed_tiers[detailed_index.search(customer_value)] = TIER_DETAILED
+            detailed_codes = self.store.codes[detailed] if rows is None else self.store.codes[detailed][rows]
+            # Only plumbers whose primary specialization is text that did not match fall back
+            unmatched = index.is_text[codes] & (tiers == TIER_NONE)
+            tiers = np.where(unmatched, detailed_tiers[detailed_codes], tiers)
+        return tiers
+
+    def tier_table(self, attribute_name: str, column: str, customer_value: str) -> np.ndarray:
+        """Per-plumber match tiers for one customer value, computed once per catalog"""
+        key = (column, self._uses_detailed(attribute_name, column), customer_value)
+        table = self._tier_tables.get(key)
+        if table is None:
+            table = self._tier_tables[key] = self._text_tiers(attribute_name, column, customer_value)
+        return table
+
+    def precompute_tier_tables(self, attributes: Dict):
+        """Build the tier tables for every possible value of the categorical attributes"""
+        for attribute_name, attr in attributes.items():
+            column = self.column_mapping.get(attribute_name, attribute_name)
+            if not attr.possible_values or column not in self.store.codes:
+                continue
+            for value in attr.possible_values:
+                if isinstance(value, str) and value != 'Any':
+                    self.tier_table(attribute_name, column, value)
+
+    def value_bitset(self, attribute_name: str, column: str, value: str) -> np.ndarray:
+        """Packed bitset of the plumbers scoring above zero on one value of a categorical attribute"""
+        key = (column, self._uses_detailed(attribute_name, column), value)
+        bits = self._value_bitsets.get(key)
+        if bits is None:
+            bits = self._value_bitsets[key] = np.packbits(self.tier_table(attribute_name, column, value) > 0)
+        return bits
+
+    def facet_counts(self, customer_preferences: Dict[str, Any], attributes: Dict,
+                     rows: np.ndarray = None) -> Dict[str, Any]:
+        """Matching plumbers for every value of every categorical attribute
+
+        The plumbers rank() matches form a bitset, and the count for a value
+        is the popcount of its intersection with value_bitset().  An
+        attribute the customer already set is counted against the plumbers
+        matching the other preferences, so its alternatives get counts too.
+        """
+        matched = {}
+
+        def matched_bits(preferences: Dict[str, Any]) -> np.ndarray:
+            key = tuple(sorted(preferences))
+            if key not in matched:
+                ids = self.rank(preferences, attributes, rows).ids
+                matched[key] = np.packbits(self.store.mask(ids))
+            return matched[key]
+
+        facets = {}
+        for attribute_name, attr in attributes.items():
+            column = self.column_mapping.get(attribute_name, attribute_name)
+            if not attr.possible_values or column not in self.store.codes:
+                continue
+            others = {name: value for name, value in customer_preferences.items() if name != attribute_name}
+            base = matched_bits(others)
+            facets[attribute_name] = {
+                value: popcount(base & self.value_bitset(attribute_name, column, value))
+                for value in attr.possible_values if isinstance(value, str) and value != 'Any'
+            }
+        return {'total': popcount(matched_bits(customer_preferences)), 'facets': facets}
+
+    def to_snapshot(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Tier tables and the spatial grid, which only depend on the catalog"""
+        keys = list(self._tier_tables)
+        meta = {'tier_tables': [list(key) for key in keys], 'spatial_index': None}
+        arrays = {f'tier_tables/{i}': self._tier_tables[key] for i, key in enumerate(keys)}
+        if self.latitudes is not None and self.longitudes is not None:
+            meta['spatial_index'], spatial_arrays = self.spatial_index.to_snapshot()
+            arrays.update({f'spatial_index/{name}': array for name, array in spatial_arrays.items()})
+        return meta, arrays
+
+    def load_snapshot(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        """Reuse tables from to_snapshot() of an engine over the same catalog"""
+        for i, (column, uses_detailed, customer_value) in enumerate(meta['tier_tables']):
+            self._tier_tables[(column, uses_detailed, customer_value)] = arrays[f'tier_tables/{i}']
+        if meta['spatial_index'] is not None:
+            spatial_arrays = {name: arrays[f'spatial_index/{name}'] for name in ('ids', 'cells')}
+            self._spatial_index = SpatialIndex.from_snapshot(self.latitudes, self.longitudes,
+                                                             meta['spatial_index'], spatial_arrays)
+
+    def _score_text(self, attribute_name: str, column: str, customer_value: str, attr,
+                    rows: np.ndarray = None) -> np.ndarray:
+        """Categorical scoring of a text preference as a lookup of each plumber's match tier
+
+        Possible values of the attribute are looked up in their precomputed
+        tier table; any other value is matched on the fly.
+        """
+        if customer_value == 'Any':
+            return np.full(self._size(rows), attr.weight)
+
+        if customer_value in attr.possible_values:
+            tiers = self.tier_table(attribute_name, column, customer_value)
+            if rows is not None:
+                tiers = tiers[rows]
+        else:
+            tiers = self._text_tiers(attribute_name, column, customer_value, rows)
+        weight = attr.weight
+        tier_scores = np.array([0.0, weight * 0.6, weight * 0.7, weight * 0.8, weight])
+        return tier_scores[tiers]
+
+    def _score_by_value(self, attribute_name: str, column: str, customer_value: Any, attr,
+                        rows: np.ndarray = None) -> np.ndarray:
+        """Score each distinct plumber value once and broadcast it to every plumber"""
+        if isinstance(customer_value, str) and column in self.store.codes:
+            return self._score_text(attribute_name, column, customer_value, attr, rows)
+        columns = (column,)
+        if attribute_name == 'work_type' and column != 'Specializations_Detailed' \
+                and 'Specializations_Detailed' in self.store:
+            columns = (column, 'Specializations_Detailed')
+        codes, uniques = self._factorize(columns)
+        value_scores = np.array([
+            self.scalar_score(plumber_data, attribute_name, customer_value, attr.type, attr=attr)
+            for plumber_data in uniques
+        ], dtype=np.float64)
+        return value_scores[codes if rows is None else codes[rows]]
+
+    def _score_numeric(self, attribute_name: str, column: str, customer_value: Any, attr,
+                       rows: np.ndarray = None) -> np.ndarray:
+        """Vectorized version of the numerical branch of calculate_attribute_score"""
+        scores = np.zeros(self._size(rows))
+        if attribute_name not in LOWER_IS_BETTER and attribute_name not in HIGHER_IS_BETTER:
+            return scores
+        try:
+            customer_val = float(customer_value)
+        except (ValueError, TypeError):
+            return scores
+
+        plumber_vals = self.store.numeric_column(column)
+        if rows is not None:
+            plumber_vals = plumber_vals[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if attribute_name in LOWER_IS_BETTER:
+                full_match = plumber_vals <= customer_val
+                partial = attr.weight * (1 - (plumber_vals - customer_val) / customer_val)
+            else:
+                full_match = plumber_vals >= customer_val
+                partial = attr.weight * (plumber_vals / customer_val)
+
+        if customer_val == 0 and not full_match.all():
+            # Keep the per-row behaviour, which divides by the customer value
+            raise ZeroDivisionError('float division by zero')
+
+        partial = np.where(partial > 0, partial, 0.0)
+        return np.where(full_match, attr.weight, partial)
+
+    def score_attribute(self, attribute_name: str, attr, customer_value: Any,
+                        rows: np.ndarray = None) -> np.ndarray:
+        """Score every plumber (or the given rows) for one attribute, matching calculate_attribute_score"""
+        column = self.column_mapping.get(attribute_name, attribute_name)
+        if column not in self.store:
+            return np.zeros(self._size(rows))
+
+        if attr.possible_values:
+            return self._score_by_value(attribute_name, column, customer_value, attr, rows)
+        if attr.min_value is not None:
+            if self.store.is_numeric(column):
+                return self._score_numeric(attribute_name, column, customer_value, attr, rows)
+            return self._score_by_value(attribute_name, column, customer_value, attr, rows)
+        return np.zeros(self._size(rows))
+
+    def max_score(self, attribute_name: str, attr, customer_value: Any) -> float:
+        """Highest score_attribute() any plumber can get, the bound used when pruning
+
+        Partial credit of a numeric attribute divides by the customer value,
+        so a negative value can score above the weight; it gets no bound.
+        """
+        column = self.column_mapping.get(attribute_name, attribute_name)
+        if column not in self.store or attr.possible_values or attr.min_value is None:
+            return attr.weight
+        try:
+            return np.inf if float(customer_value) < 0 else attr.weight
+        except (ValueError, TypeError):
+            return attr.weight
+
+    def signed_score(self, attribute_name: str, attr, customer_value: Any,
+                     rows: np.ndarray = None) -> np.ndarray:
+        """Contribution of one attribute to the total, negated for NEGATIVE attributes"""
+        scores = self.score_attribute(attribute_name, attr, customer_value, rows)
+        return -scores if is_negative(attr) else scores
+
+    def _estimate(self, attribute_name: str, attr, customer_value: Any) -> int:
+        """Expected plumbers passing a REQUIRED filter, or None if its column is missing"""
+        column = self.column_mapping.get(attribute_name, attribute_name)
+        if column not in self.store:
+            return None
+        if isinstance(customer_value, str) and column in self.store.codes \
+                and customer_value in (attr.possible_values or []):
+            key = (column, self._uses_detailed(attribute_name, column), customer_value)
+            if key not in self._tier_counts:
+                table = self.tier_table(attribute_name, column, customer_value)
+                self._tier_counts[key] = int(np.count_nonzero(table))
+            return self._tier_counts[key]
+        # Unknown selectivity: run after the filters with a tier table
+        return self.size
+
+    def plan(self, customer_preferences: Dict[str, Any], attributes: Dict) -> QueryPlan:
+        """Query plan with the REQUIRED filters ordered by their tier table counts"""
+        return plan_query(customer_preferences, attributes, self._estimate)
+
+    def _filter(self, plan: QueryPlan, rows: np.ndarray = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Run the hard filters of plan over the catalog or the given rows
+
+        Returns the surviving rows (None when nothing was filtered out) and
+        the scores of the REQUIRED attributes for those rows.  A plumber
+        passes a REQUIRED attribute when it scores above zero on it.
+        """
+        plan.record('catalog' if rows is None else 'radius', self._size(rows))
+        required_scores = {}
+        for attr_name, attr, customer_value in plan.required:
+            scores = self.score_attribute(attr_name, attr, customer_value, rows)
+            keep = scores > 0
+            if not keep.all():
+                rows = np.flatnonzero(keep) if rows is None else np.asarray(rows)[keep]
+                required_scores = {name: values[keep] for name, values in required_scores.items()}
+                scores = scores[keep]
+            required_scores[attr_name] = scores
+            plan.record('required', self._size(rows), attribute=attr_name, value=customer_value)
+        return rows, required_scores
+
+    def distances(self, client_lat: float, client_lon: float, rows: np.ndarray = None,
+                  method: str = HAVERSINE) -> np.ndarray:
+        """Distance in km from the client to every plumber (or the given rows)"""
+        if rows is None:
+            return distances(client_lat, client_lon, self.latitudes, self.longitudes, method)
+        return distances(client_lat, client_lon, self.latitudes[rows], self.longitudes[rows], method)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, max_results) -> np.ndarray:
+        """Positions of the best scores, highest first and ties in catalog order"""
+        if not isinstance(max_results, (int, np.integer)) or max_results < 0 or len(scores) <= max_results:
+            return np.argsort(-scores, kind='stable')[:max_results]
+        if max_results == 0:
+            return np.empty(0, dtype=np.int64)
+        kth_best = -np.partition(-scores, max_results - 1)[max_results - 1]
+        selected = np.flatnonzero(scores >= kth_best)
+        return selected[np.argsort(-scores[selected], kind='stable')][:max_results]
+
+    @staticmethod
+    def _prune(partial: np.ndarray, remaining: float, penalty: np.ndarray, k: int) -> np.ndarray:
+        """Mask of plumbers that can still reach the current k-th best score, or None"""
+        if np.isinf(remaining):
+            return None
+        lower = partial if penalty is None else partial * penalty
+        upper = partial + remaining
+        if penalty is not None:
+            upper = upper * penalty
+        matched = lower[partial > 0]
+        if len(matched) < k:
+            return None
+        kth_best = np.partition(matched, len(matched) - k)[len(matched) - k]
+        # Scores are compared after rounding to 2 decimals, so keep a one-cent margin
+        keep = upper >= kth_best - 0.01 - 1e-9
+        return None if keep.all() else keep
+
+    def match(self, customer_preferences: Dict[str, Any], attributes: Dict,
+              max_results: int = 10, rows: np.ndarray = None, explain: bool = False) -> List[Dict]:
+        """Score the catalog, or only the candidate rows, and return the top plumber dicts
+
+        REQUIRED attributes first narrow the candidates (see _filter).  The
+        other attributes are then scored, NEGATIVE ones first and the rest
+        heaviest first; after each one, plumbers whose best possible final
+        score (see max_score) is already below the k-th best lower bound are
+        dropped so later attributes are only scored for plumbers that can
+        still make the top k.
+        Attribute_Scores is only added to the results when explain is set.
+        """
+        active = self._active(customer_preferences, attributes)
+        if self._has_no_preferences(customer_preferences):
+            # Every plumber gets the base score, so catalog order decides
+            ids = np.arange(self.size) if rows is None else np.asarray(rows)
+            distance = None
+            if 'client_lat' in customer_preferences and 'client_lon' in customer_preferences:
+                distance = self.distances(customer_preferences['client_lat'],
+                                          customer_preferences['client_lon'], rows)
+            order = np.arange(len(ids))[:max_results]
+            return self._build_results(ids, order, np.full(len(ids), 0.1), distance, {} if explain else None)
+
+        plan = self.plan(customer_preferences, attributes)
+        subset, attribute_scores = self._filter(plan, rows)
+        ids = np.arange(self.size) if subset is None else np.asarray(subset)
+
+        distance = penalty = None
+        if plan.located:
+            distance = self.distances(customer_preferences['client_lat'],
+                                      customer_preferences['client_lon'], subset)
+            penalty = self._distance_penalty(distance)
+
+        can_prune = isinstance(max_results, (int, np.integer)) and max_results > 0 \
+            and all(attr.weight >= 0 for _, attr, _ in active)
+        # Penalties go first so the partial totals are lower bounds once they are applied
+        scoring_order = plan.negative + sorted(plan.soft, key=lambda item: -item[1].weight)
+        partial = np.zeros(len(ids))
+        for scores in attribute_scores.values():
+            partial = partial + scores
+
+        for position, (attr_name, attr, customer_value) in enumerate(scoring_order):
+            score = self.signed_score(attr_name, attr, customer_value, subset)
+            attribute_scores[attr_name] = score
+            partial = partial + score
+            if not can_prune or position < len(plan.negative) - 1 or len(ids) <= max_results:
+                continue
+            remaining = sum(self.max_score(*item) for item in scoring_order[position + 1:])
+            keep = self._prune(partial, remaining, penalty, max_results)
+            if keep is None:
+                continue
+            ids = subset = ids[keep]
+            partial = partial[keep]
+            attribute_scores = {name: values[keep] for name, values in attribute_scores.items()}
+            if penalty is not None:
+                penalty = penalty[keep]
+                distance = distance[keep]
+
+        return self._rank(ids, active, attribute_scores, distance, penalty, max_results, explain)
+
+    def rank(self, customer_preferences: Dict[str, Any], attributes: Dict,
+             rows: np.ndarray = None, plan: QueryPlan = None) -> Ranking:
+        """Score the catalog, or only the candidate rows, without materializing any results
+
+        Pass a plan from plan() to have the candidate count after each stage
+        recorded on it.
+        """
+        if self._has_no_preferences(customer_preferences):
+            ids = np.arange(self.size, dtype=np.int32) if rows is None else np.asarray(rows, dtype=np.int32)
+            return Ranking(customer_preferences, ids, np.full(len(ids), 0.1), no_preferences=True)
+
+        plan = plan or self.plan(customer_preferences, attributes)
+        rows, attribute_scores = self._filter(plan, rows)
+        ids = np.arange(self.size, dtype=np.int32) if rows is None else np.asarray(rows, dtype=np.int32)
+
+        total_score = np.zeros(len(ids))
+        for attr_name, attr, customer_value in self._active(customer_preferences, attributes):
+            if attr_name in attribute_scores:
+                total_score += attribute_scores[attr_name]
+            else:
+                total_score += self.signed_score(attr_name, attr, customer_value, rows)
+        if plan.soft:
+            plan.record('score', len(ids), attributes=[attr_name for attr_name, _, _ in plan.soft])
+        if plan.negative:
+            plan.record('penalty', len(ids), attributes=[attr_name for attr_name, _, _ in plan.negative])
+        if plan.located:
+            penalty = self._distance_penalty(self.distances(customer_preferences['client_lat'],
+                                                            customer_preferences['client_lon'], rows))
+            total_score = np.where(total_score > 0, total_score * penalty, total_score)
+
+        matched = np.flatnonzero(total_score > 0)
+        plan.record('matched', len(matched))
+        return Ranking(customer_preferences, ids[matched], round_scores(total_score[matched]))
+
+    def score_matrix(self, customer_preferences: Dict[str, Any], attributes: Dict,
+                     rows: np.ndarray = None) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Every matching plumber's score on each preference, for reports
+
+        Returns the plumber ids, the attribute names, a (plumbers x
+        attributes) matrix of their signed scores, the match scores as
+        rank() computes them and the client distances (None without a
+        location).  Only plumbers with a match score above zero are kept.
+        """
+        active = self._active(customer_preferences, attributes)
+        names = [attr_name for attr_name, _, _ in active]
+        if self._has_no_preferences(customer_preferences):
+            ids = np.arange(self.size) if rows is None else np.asarray(rows)
+            total_score = np.full(len(ids), 0.1)
+            matrix = np.zeros((len(ids), len(names)))
+        else:
+            plan = self.plan(customer_preferences, attributes)
+            rows, required_scores = self._filter(plan, rows)
+            ids = np.arange(self.size) if rows is None else np.asarray(rows)
+            matrix = np.empty((len(ids), len(names)))
+            total_score = np.zeros(len(ids))
+            for column, (attr_name, attr, customer_value) in enumerate(active):
+                if attr_name in required_scores:
+                    matrix[:, column] = required_scores[attr_name]
+                else:
+                    matrix[:, column] = self.signed_score(attr_name, attr, customer_value, rows)
+                total_score += matrix[:, column]
+
+        distance = None
+        if 'client_lat' in customer_preferences and 'client_lon' in customer_preferences:
+            distance = self.distances(customer_preferences['client_lat'], customer_preferences['client_lon'], rows)
+            if not self._has_no_preferences(customer_preferences):
+                total_score = np.where(total_score > 0, total_score * self._distance_penalty(distance), total_score)
+
+        matched = np.flatnonzero(total_score > 0)
+        return (ids[matched], names, matrix[matched], round_scores(total_score[matched]),
+                None if distance is None else distance[matched])
+
+    def iter_ranking(self, ranking: Ranking, attributes: Dict, start: int = 0,
+                     count: int = None, explain: bool = False) -> Iterator[Dict]:
+        """Plumber dicts for ranks start to start + count, best first, built a chunk at a time"""
+        positions = self.ranked_positions(ranking, start, count)
+        if len(positions) == 0:
+            return
+
+        preferences = ranking.preferences
+        active = [] if ranking.no_preferences or not explain else self._active(preferences, attributes)
+        for chunk_start in range(0, len(positions), RANKING_CHUNK_SIZE):
+            chunk = positions[chunk_start:chunk_start + RANKING_CHUNK_SIZE]
+            ids = ranking.ids[chunk]
+            distance = None
+            if 'client_lat' in preferences and 'client_lon' in preferences:
+                distance = self.distances(preferences['client_lat'], preferences['client_lon'], ids)
+            attribute_scores = None
+            if explain:
+                attribute_scores = {attr_name: self.signed_score(attr_name, attr, customer_value, ids)
+                                    for attr_name, attr, customer_value in active}
+            yield from self._build_results(ids, np.arange(len(ids)), ranking.scores[chunk],
+                                           distance, attribute_scores)
+
+    def ranked_positions(self, ranking: Ranking, start: int = 0, count: int = None) -> np.ndarray:
+        """Positions in ranking.ids of ranks start to start + count, best first"""
+        stop = len(ranking) if count is None else min(start + count, len(ranking))
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+        if ranking.no_preferences:
+            return np.arange(start, stop)
+        return self._top_k(ranking.scores, stop)[start:]
+
+    @staticmethod
+    def _active(customer_preferences: Dict[str, Any], attributes: Dict) -> List[Tuple]:
+        """The (name, definition, value) of every preference that is a known attribute"""
+        return [(attr_name, attributes[attr_name], customer_value)
+                for attr_name, customer_value in customer_preferences.items()
+                if attr_name in attributes and customer_value is not None]
+
+    def match_batch(self, preference_list: List[Dict[str, Any]], attributes: Dict,
+                    max_results: int = 10, explain: bool = False) -> List[List[Dict]]:
+        """Match many preference dicts at once, sharing work between them
+
+        Queries run a block at a time: client distances are computed as a
+        (queries x plumbers) matrix per block, and each distinct (attribute,
+        value) pair is scored once per block, so the shared score arrays are
+        freed with the block instead of piling up over the whole batch.
+        """
+        ids = np.arange(self.size)
+        results = []
+        block = max(1, BATCH_DISTANCE_CELLS // max(self.size, 1))
+        for start in range(0, len(preference_list), block):
+            queries = preference_list[start:start + block]
+            shared_scores = {}
+            located = [i for i, preferences in enumerate(queries)
+                       if 'client_lat' in preferences and 'client_lon' in preferences]
+            distance_matrix = None
+            if located:
+                lats = np.array([float(queries[i]['client_lat']) for i in located])[:, None]
+                lons = np.array([float(queries[i]['client_lon']) for i in located])[:, None]
+                distance_matrix = haversine_array(lats, lons, self.latitudes, self.longitudes)
+            matrix_rows = {query: row for row, query in enumerate(located)}
+
+            for i, customer_preferences in enumerate(queries):
+                distance = penalty = None
+                if i in matrix_rows:
+                    distance = distance_matrix[matrix_rows[i]]
+                    penalty = self._distance_penalty(distance)
+                if self._has_no_preferences(customer_preferences):
+                    order = ids[:max_results]
+                    results.append(self._build_results(ids, order, np.full(self.size, 0.1), distance,
+                                                       {} if explain else None))
+                    continue
+
+                active = self._active(customer_preferences, attributes)
+                attribute_scores = {}
+                for attr_name, attr, customer_value in active:
+                    key = (attr_name, repr(customer_value))
+                    if key not in shared_scores:
+                        shared_scores[key] = self.signed_score(attr_name, attr, customer_value)
+                    attribute_scores[attr_name] = shared_scores[key]
+                required = self.plan(customer_preferences, attributes).required
+                query_ids = ids
+                if required:
+                    keep = np.logical_and.reduce([attribute_scores[attr_name] > 0 for attr_name, _, _ in required])
+                    query_ids = np.flatnonzero(keep)
+                    attribute_scores = {name: values[query_ids] for name, values in attribute_scores.items()}
+                    if distance is not None:
+                        distance, penalty = distance[query_ids], penalty[query_ids]
+                results.append(self._rank(query_ids, active, attribute_scores, distance, penalty,
+                                          max_results, explain))
+        return results
+
+    @staticmethod
+    def _distance_penalty(distance: np.ndarray) -> np.ndarray:
+        """Score multiplier falling from 1 to 0.1 as distance grows to 90 km"""
+        penalty = 1 - (distance / 100)
+        return np.where(penalty > 0.1, penalty, 0.1)
+
+    @staticmethod
+    def _has_no_preferences(customer_preferences: Dict[str, Any]) -> bool:
+        return len([k for k, v in customer_preferences.items()
+                    if k not in ['client_lat', 'client_lon'] and v is not None]) == 0
+
+    def _rank(self, ids: np.ndarray, active: List[Tuple], attribute_scores: Dict[str, np.ndarray],
+              distance: np.ndarray, penalty: np.ndarray, max_results, explain: bool = False) -> List[Dict]:
+        """Total the attribute scores, apply the distance penalty and build the top results"""
+        # Sum in preference order so totals are bit-for-bit the per-row ones
+        attribute_scores = {attr_name: attribute_scores[attr_name] for attr_name, _, _ in active}
+        total_score = np.zeros(len(ids))
+        for attr_name, _, _ in active:
+            total_score += attribute_scores[attr_name]
+        if penalty is not None:
+            # Don't apply distance penalty if no other attributes matched
+            total_score = np.where(total_score > 0, total_score * penalty, total_score)
+
+        matched = np.flatnonzero(total_score > 0)
+        match_scores = np.zeros(len(ids))
+        match_scores[matched] = round_scores(total_score[matched])
+        order = matched[self._top_k(match_scores[matched], max_results)]
+        return self._build_results(ids, order, match_scores, distance, attribute_scores if explain else None)
+
+    def _build_results(self, ids: np.ndarray, order: np.ndarray, match_scores: np.ndarray,
+                       distance: np.ndarray, attribute_scores: Dict[str, np.ndarray] = None) -> List[Dict]:
+        """Materialize plumber dicts for the ranked positions only, explained when attribute_scores is given"""
+        results = []
+        for position in order.tolist():
+            plumber_dict = self.store.record(int(ids[position]))
+            if distance is not None:
+                plumber_dict['Distance_km'] = round(float(distance[position]), 2)
+            plumber_dict['Match_Score'] = float(match_scores[position])
+            if attribute_scores is not None:
+                plumber_dict['Attribute_Scores'] = {
+                    attr_name: float(score[position]) for attr_name, score in attribute_scores.items()
+                }
+            results.append(plumber_dict)
+        return results
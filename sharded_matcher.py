@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Parallel plumber matching over a catalog split across worker processes
+
+Each worker holds one shard of the catalog and ranks it locally; the
+parent merges the per-shard top-k lists by (score, catalog position), which
+gives exactly the ranking a single DynamicAttributeSystem would produce.
+
+Command line use scores a CSV of customer requests (one column per
+preference) and writes one NDJSON line per request:
+
+    python sharded_matcher.py --dataset enhanced_plumbers_dataset.csv \\
+        --requests customer_requests.csv --output matches.ndjson --workers 8
+"""
+
+import os
+import sys
+import csv
+import json
+import heapq
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+from attribute_system import DynamicAttributeSystem
+from catalog_schema import read_catalog
+
+# Queries sent to the shards per round trip
+CHUNK_SIZE = 64
+
+
+def shard_by_range(df: pd.DataFrame, n_shards: int) -> List[np.ndarray]:
+    """Contiguous, equally sized blocks of catalog rows"""
+    return [ids for ids in np.array_split(np.arange(len(df)), n_shards) if len(ids)]
+
+
+def shard_by_district(df: pd.DataFrame, n_shards: int) -> List[np.ndarray]:
+    """Whole districts per shard, largest districts first onto the emptiest shard"""
+    groups = sorted(df.groupby('District', dropna=False, sort=False, observed=True).indices.values(), key=len, reverse=True)
+    shards = [[] for _ in range(min(n_shards, len(groups)))]
+    heap = [(0, i) for i in range(len(shards))]
+    for rows in groups:
+        size, i = heapq.heappop(heap)
+        shards[i].append(rows)
+        heapq.heappush(heap, (size + len(rows), i))
+    return [np.sort(np.concatenate(rows)) for rows in shards if rows]
+
+
+SHARDING = {'range': shard_by_range, 'district': shard_by_district}
+
+
+def _match_shard(attribute_system: DynamicAttributeSystem, global_ids: np.ndarray,
+                 query: Tuple) -> List[Tuple[int, float, Dict]]:
+    """Local top-k of one shard as (catalog row, score, plumber dict)"""
+    preferences, max_results, radius_km, explain = query
+    engine = attribute_system.get_engine()
+    rows = None
+    if radius_km is not None and 'client_lat' in preferences and 'client_lon' in preferences:
+        rows, _ = engine.spatial_index.within(float(preferences['client_lat']),
+                                              float(preferences['client_lon']), float(radius_km))
+    ranking = engine.rank(preferences, attribute_system.attributes, rows)
+    positions = engine.ranked_positions(ranking, 0, max_results)
+    plumbers = engine.iter_ranking(ranking, attribute_system.attributes, 0, max_results, explain)
+    return [(int(global_ids[ranking.ids[position]]), float(ranking.scores[position]), plumber)
+            for position, plumber in zip(positions.tolist(), plumbers)]
+
+
+def _shard_worker(connection, df: pd.DataFrame, global_ids: np.ndarray, attributes: Dict):
+    """Worker loop: build the shard once, then answer chunks of queries until told to stop"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.attributes = attributes
+    attribute_system.match_cache = None
+    attribute_system.apply_dataset(df)
+    connection.send('ready')
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        try:
+            connection.send([_match_shard(attribute_system, global_ids, query) for query in message])
+        except Exception as e:
+            connection.send(e)
+    connection.close()
+
+
+def merge_top_k(partials: List[List[Tuple[int, float, Dict]]], max_results: int) -> List[Dict]:
+    """Merge per-shard top-k lists: best score first, ties in catalog order"""
+    merged = sorted((item for partial in partials for item in partial), key=lambda item: (-item[1], item[0]))
+    if max_results is not None:
+        merged = merged[:max_results]
+    return [plumber for _, _, plumber in merged]
+
+
+class ShardedMatcher:
+    """Pool of worker processes, each scoring one shard of the plumber catalog"""
+
+    def __init__(self, df: pd.DataFrame, n_workers: int = None, shard_by: str = 'range',
+                 attributes: Dict = None):
+        if shard_by not in SHARDING:
+            raise ValueError(f"Unknown sharding '{shard_by}', expected one of {sorted(SHARDING)}")
+        n_workers = n_workers or os.cpu_count() or 1
+        attributes = dict(attributes if attributes is not None else DynamicAttributeSystem().attributes)
+        self.shards = SHARDING[shard_by](df, n_workers)
+        self._connections = []
+        self._processes = []
+        for ids in self.shards:
+            parent_end, child_end = multiprocessing.Pipe()
+            shard_df = df.iloc[ids].reset_index(drop=True)
+            process = multiprocessing.Process(target=_shard_worker, args=(child_end, shard_df, ids, attributes),
+                                              daemon=True)
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+        for connection in self._connections:
+            connection.recv()
+
+    def _send(self, queries: List[Tuple]):
+        for connection in self._connections:
+            connection.send(queries)
+
+    def _receive(self, queries: List[Tuple]) -> List[List[Dict]]:
+        partials = []
+        for connection in self._connections:
+            reply = connection.recv()
+            if isinstance(reply, Exception):
+                raise reply
+            partials.append(reply)
+        return [merge_top_k([partial[i] for partial in partials], query[1])
+                for i, query in enumerate(queries)]
+
+    def match_plumbers(self, customer_preferences: Dict[str, Any], max_results: int = 10,
+                       radius_km: float = None, explain: bool = False) -> List[Dict]:
+        """Same results as DynamicAttributeSystem.match_plumbers, scored on every shard in parallel"""
+        return next(self.match_many([customer_preferences], max_results, radius_km, explain))
+
+    def match_many(self, preference_stream: Iterable[Dict[str, Any]], max_results: int = 10,
+                   radius_km: float = None, explain: bool = False) -> Iterator[List[Dict]]:
+        """Results for each preference dict in order, keeping one chunk in flight while merging the previous"""
+        pending = None
+        chunk = []
+        for preferences in preference_stream:
+            chunk.append((preferences, max_results, radius_km, explain))
+            if len(chunk) == CHUNK_SIZE:
+                self._send(chunk)
+                if pending is not None:
+                    yield from self._receive(pending)
+                pending, chunk = chunk, []
+        if chunk:
+            self._send(chunk)
+        if pending is not None:
+            yield from self._receive(pending)
+        if chunk:
+            yield from self._receive(chunk)
+
+    def close(self):
+        """Stop the worker processes"""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+                connection.close()
+            except (OSError, BrokenPipeError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._connections, self._processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_request(row: Dict[str, str], attributes: Dict) -> Dict[str, Any]:
+    """Preference dict from one CSV row, skipping empty cells and converting numbers"""
+    preferences = {}
+    for key, value in row.items():
+        if key is None or value is None or value.strip() == '':
+            continue
+        value = value.strip()
+        attr = attributes.get(key)
+        if key in ('client_lat', 'client_lon') or (attr is not None and attr.min_value is not None):
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        preferences[key] = value
+    return preferences
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Score a CSV of customer requests against the plumber catalog')
+    parser.add_argument('--dataset', default='enhanced_plumbers_dataset.csv', help='plumber catalog CSV')
+    parser.add_argument('--requests', default='-', help='customer requests CSV, one preference per column (- for stdin)')
+    parser.add_argument('--output', default='-', help='NDJSON output file (- for stdout)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--shard-by', choices=sorted(SHARDING), default='range')
+    parser.add_argument('--top-k', type=int, default=10, help='plumbers returned per request')
+    parser.add_argument('--radius-km', type=float, default=None, help='only consider plumbers this close')
+    parser.add_argument('--explain', action='store_true', help='include per-attribute scores')
+    args = parser.parse_args(argv)
+
+    attributes = DynamicAttributeSystem().attributes
+    df = read_catalog(args.dataset)
+    requests_file = sys.stdin if args.requests == '-' else open(args.requests, newline='')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        preference_stream = (parse_request(row, attributes) for row in csv.DictReader(requests_file))
+        with ShardedMatcher(df, args.workers, args.shard_by, attributes) as matcher:
+            for i, plumbers in enumerate(matcher.match_many(preference_stream, args.top_k,
+                                                            args.radius_km, args.explain)):
+                output_file.write(json.dumps({'request': i, 'plumbers': plumbers}) + '\n')
+    finally:
+        if requests_file is not sys.stdin:
+            requests_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import math
+import numpy as np
+from typing import Dict, Any, Tuple
+from geo import EARTH_RADIUS_KM, KM_PER_DEGREE, HAVERSINE, bounding_box, in_bounding_box, distances, haversine_array
+
+
+class SpatialIndex:
+    """Uniform latitude/longitude grid over plumber locations
+
+    Plumbers are sorted by grid cell so that the plumbers of a run of
+    neighbouring cells in one grid row form a contiguous slice.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_degrees: float = 0.1):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.cell_degrees = cell_degrees
+
+        located = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+        self.size = len(located)
+        if self.size == 0:
+            self.lat0 = self.lon0 = 0.0
+            self.n_rows = self.n_cols = 0
+            self._ids = located
+            self._cells = located
+            return
+
+        self.lat0 = float(latitudes[located].min())
+        self.lon0 = float(longitudes[located].min())
+        rows = self._row(latitudes[located])
+        cols = self._col(longitudes[located])
+        self.n_rows = int(rows.max()) + 1
+        self.n_cols = int(cols.max()) + 1
+
+        cells = rows * self.n_cols + cols
+        order = np.argsort(cells, kind='stable')
+        self._ids = located[order]
+        self._cells = cells[order]
+
+    def to_snapshot(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Grid parameters and the sorted plumber and cell arrays"""
+        meta = {'cell_degrees': self.cell_degrees, 'size': self.size, 'lat0': self.lat0, 'lon0': self.lon0,
+                'n_rows': self.n_rows, 'n_cols': self.n_cols}
+        return meta, {'ids': self._ids, 'cells': self._cells}
+
+    @classmethod
+    def from_snapshot(cls, latitudes: np.ndarray, longitudes: np.ndarray, meta: Dict[str, Any],
+                      arrays: Dict[str, np.ndarray]) -> 'SpatialIndex':
+        """Index over the same locations rebuilt from to_snapshot() without sorting again"""
+        index = cls.__new__(cls)
+        index.latitudes = latitudes
+        index.longitudes = longitudes
+        for name, value in meta.items():
+            setattr(index, name, value)
+        index._ids = arrays['ids']
+        index._cells = arrays['cells']
+        return index
+
+    def _row(self, lats):
+        return np.floor((lats - self.lat0) / self.cell_degrees).astype(np.int64)
+
+    def _col(self, lons):
+        return np.floor((lons - self.lon0) / self.cell_degrees).astype(np.int64)
+
+    def _bounding_box_ids(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Plumbers in the grid cells overlapping the bounding box of a circle"""
+        if self.size == 0:
+            return self._ids
+
+        lat_min, lat_max, lon_min, lon_max = bounding_box(lat, lon, radius_km)
+        row_lo = max(int(math.floor((lat_min - self.lat0) / self.cell_degrees)), 0)
+        row_hi = min(int(math.floor((lat_max - self.lat0) / self.cell_degrees)), self.n_rows - 1)
+        if math.isinf(lon_min):
+            col_lo, col_hi = 0, self.n_cols - 1
+        else:
+            col_lo = max(int(math.floor((lon_min - self.lon0) / self.cell_degrees)), 0)
+            col_hi = min(int(math.floor((lon_max - self.lon0) / self.cell_degrees)), self.n_cols - 1)
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.empty(0, dtype=np.int64)
+
+        row_starts = np.arange(row_lo, row_hi + 1) * self.n_cols
+        starts = np.searchsorted(self._cells, row_starts + col_lo, side='left')
+        ends = np.searchsorted(self._cells, row_starts + col_hi, side='right')
+        slices = [self._ids[start:end] for start, end in zip(starts, ends) if end > start]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               method: str = HAVERSINE) -> Tuple[np.ndarray, np.ndarray]:
+        """Plumbers within radius_km of a point, in catalog order, with their distances
+
+        Plumbers of the overlapping grid cells that fall outside the exact
+        bounding box are dropped before any distance is computed.
+        """
+        ids = np.sort(self._bounding_box_ids(lat, lon, radius_km))
+        lats, lons = self.latitudes[ids], self.longitudes[ids]
+        boxed = in_bounding_box(lat, lon, radius_km, lats, lons)
+        ids = ids[boxed]
+        ids_distances = distances(lat, lon, lats[boxed], lons[boxed], method)
+        inside = ids_distances <= radius_km
+        return ids[inside], ids_distances[inside]
+
+    def nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The k plumbers closest to a point, nearest first, with their distances"""
+        if k <= 0 or self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            ids, ids_distances = self.within(lat, lon, radius_km)
+            # Every plumber closer than radius_km has been seen once k are inside it
+            if len(ids) >= k or len(ids) == self.size or radius_km > math.pi * EARTH_RADIUS_KM:
+                break
+            radius_km *= 2
+
+        if len(ids) < k and len(ids) < self.size:
+            ids = self._ids
+            ids_distances = haversine_array(lat, lon, self.latitudes[ids], self.longitudes[ids])
+        order = np.lexsort((ids, ids_distances))[:k]
+        return ids[order], ids_distances[order]
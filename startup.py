@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+# When the app builds its matcher state (STARTUP_MODE environment variable)
+EAGER = 'eager'            # while app.py is imported
+LAZY = 'lazy'              # on the first request that needs it
+BACKGROUND = 'background'  # in a warm-up thread started at import
+STARTUP_MODES = (EAGER, LAZY, BACKGROUND)
+
+
+class StartupTimings:
+    """Wall-clock duration of each startup phase, in the order the phases finished"""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases.append((name, seconds))
+
+    def as_dict(self) -> Dict[str, float]:
+        """Milliseconds per phase"""
+        with self._lock:
+            return {name: round(seconds * 1000, 1) for name, seconds in self.phases}
+
+    def summary(self) -> str:
+        return ', '.join(f'{name} {ms:.0f}ms' for name, ms in self.as_dict().items())
+
+
+class Deferred:
+    """Stand-in for an object that is only built on first attribute access
+
+    Attribute reads are forwarded to the object, which factory() builds once;
+    concurrent first users wait for the same build.  If the build fails the
+    error is raised to the caller and the next access tries again.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._value = None
+        self._ready = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def resolve(self) -> Any:
+        """The object, building it now if needed"""
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._value = self._factory()
+                    self._ready = True
+        return self._value
+
+    def warm_up(self) -> threading.Thread:
+        """Build the object in a daemon thread, unless a build is already running there"""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._warm_up, name='warm-up', daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def _warm_up(self):
+        try:
+            self.resolve()
+        except Exception as e:
+            print(f"⚠️ Warm-up failed, will retry on first use: {e}")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+
+def load_warm_up_queries(path: str) -> List[Dict[str, Any]]:
+    """Recorded queries to replay before serving traffic, or none if the file doesn't exist
+
+    The file holds a JSON list of /api/v1/match request bodies: a
+    preferences object plus optional max_results, radius_km and explain.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def replay_queries(attribute_system, queries: List[Dict[str, Any]]) -> int:
+    """Run each query through match_plumbers so caches and first-call paths are warm; returns the number replayed"""
+    replayed = 0
+    for query in queries:
+        try:
+            attribute_system.match_plumbers(query.get('preferences', {}), max_results=query.get('max_results', 10),
+                                            radius_km=query.get('radius_km'), explain=query.get('explain', False))
+            replayed += 1
+        except Exception as e:
+            print(f"⚠️ Skipping warm-up query {query}: {e}")
+    return replayed
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite-backed attribute registry
+"""
+
+import os
+import tempfile
+import threading
+from flask import Flask
+from models import db
+from attribute_system import DynamicAttributeSystem, AttributeDefinition, AttributeCategory, AttributeType
+from attribute_registry import AttributeRegistry
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def test_writes_reach_other_workers():
+    """Edits are persisted and picked up by another registry on the same database"""
+    database_path = os.path.join(tempfile.mkdtemp(), 'registry.db')
+    app = make_app(database_path)
+    with app.app_context():
+        db.create_all()
+        first = AttributeRegistry(DynamicAttributeSystem(), min_interval_seconds=0)
+        first.load()
+        second = AttributeRegistry(DynamicAttributeSystem(), min_interval_seconds=0)
+        second.load()
+        assert first.version == second.version == 1
+        assert not second.sync()
+
+        attr = first.attribute_system.get_attribute('district')
+        attr.weight = 0.3
+        first.update('district', attr)
+        first.add(AttributeDefinition(name='parking', category=AttributeCategory.LOGISTICAL,
+                                      type=AttributeType.OPTIONAL, weight=0.2,
+                                      description='Parking available', possible_values=['Yes', 'No']))
+        first.remove('certifications')
+        assert first.version == 4
+
+        cache_version = second.attribute_system.version
+        assert second.sync() and second.version == 4
+        attributes = second.attribute_system.attributes
+        assert attributes['district'].weight == 0.3
+        assert attributes['parking'].possible_values == ('Yes', 'No')
+        assert 'certifications' not in attributes
+        assert list(attributes) == list(first.attribute_system.attributes)
+        assert second.attribute_system.version > cache_version
+
+        third = AttributeRegistry(DynamicAttributeSystem())
+        third.load()
+        assert third.attribute_system.export_configuration()['attributes'] == \
+            first.attribute_system.export_configuration()['attributes']
+    print("✅ Attribute edits are shared through the database")
+
+def test_concurrent_edits_are_not_lost():
+    """A worker editing from a stale copy keeps the other worker's write"""
+    app = make_app(os.path.join(tempfile.mkdtemp(), 'registry.db'))
+    with app.app_context():
+        db.create_all()
+        first = AttributeRegistry(DynamicAttributeSystem(), min_interval_seconds=3600)
+        first.load()
+        second = AttributeRegistry(DynamicAttributeSystem(), min_interval_seconds=3600)
+        second.load()
+
+        district = first.attribute_system.get_attribute('district')
+        first.update('district', AttributeDefinition(**{**district.__dict__, 'weight': 0.8}))
+        second.add(AttributeDefinition(name='parking', category=AttributeCategory.LOGISTICAL,
+                                       type=AttributeType.OPTIONAL, weight=0.2,
+                                       description='Parking available', possible_values=['Yes', 'No']))
+        assert second.attribute_system.attributes['district'].weight == 0.8
+        assert second.version == 3
+
+        try:
+            second.remove('no_such_attribute')
+            assert False
+        except KeyError:
+            pass
+        assert second.version == 3 and 'parking' in second.attribute_system.attributes
+
+        second.replace({'district': second.attribute_system.get_attribute('district')})
+        first.import_configuration({'attributes': [{'name': 'parking', 'category': 'logistical',
+                                                    'type': 'optional', 'weight': 0.1}]})
+        assert list(first.attribute_system.attributes) == ['district', 'parking']
+
+        third = AttributeRegistry(DynamicAttributeSystem())
+        third.load()
+        assert third.version == 5
+        assert third.attribute_system.export_configuration()['attributes'] == \
+            first.attribute_system.export_configuration()['attributes']
+        first._last_check = second._last_check = 0
+        assert not first.sync() and second.sync()
+        assert second.attribute_system.export_configuration()['attributes'] == \
+            first.attribute_system.export_configuration()['attributes']
+    print("✅ Concurrent attribute edits are not lost")
+
+def test_write_in_between_is_kept():
+    """A worker committing between another's read and write makes that write start over"""
+    app = make_app(os.path.join(tempfile.mkdtemp(), 'registry.db'))
+    with app.app_context():
+        db.create_all()
+        first = AttributeRegistry(DynamicAttributeSystem(), min_interval_seconds=3600)
+        first.load()
+    second = AttributeRegistry(DynamicAttributeSystem(), min_interval_seconds=3600)
+
+    def update_district():
+        with app.app_context():
+            district = first.attribute_system.get_attribute('district')
+            first.update('district', AttributeDefinition(**{**district.__dict__, 'weight': 0.3}))
+
+    attempts = []
+
+    def edit(attributes):
+        attempts.append(attributes['district'].weight)
+        if len(attempts) == 1:
+            # The other worker commits after this one has read the definitions
+            writer = threading.Thread(target=update_district)
+            writer.start()
+            writer.join()
+        del attributes['certifications']
+
+    with app.app_context():
+        second.load()
+        with second._lock:
+            second._change(edit)
+        assert attempts == [0.8, 0.3] and second.version == first.version + 1
+        third = AttributeRegistry(DynamicAttributeSystem())
+        third.load()
+        attributes = third.attribute_system.attributes
+        assert attributes['district'].weight == 0.3 and 'certifications' not in attributes
+    print("✅ Writes in between are not overwritten")
+
+if __name__ == "__main__":
+    test_writes_reach_other_workers()
+    test_concurrent_edits_are_not_lost()
+    test_write_in_between_is_kept()
@@ -81,7 +81,7 @@ def test_attribute_system():
     for key, value in advanced_preferences.items():
         print(f"  • {key}: {value}")
     
-    matched_plumbers = attribute_system.match_plumbers(advanced_preferences, max_results=5)
+    matched_plumbers = attribute_system.match_plumbers(advanced_preferences, max_results=5, explain=True)
     print(f"\nFound {len(matched_plumbers)} matching plumbers:")
     
     for i, plumber in enumerate(matched_plumbers, 1):
@@ -123,6 +123,15 @@ def test_attribute_system():
     for rec in report['recommendations']:
         print(f"  • {rec}")
     
+    catalog_report = attribute_system.generate_matching_report(advanced_preferences)
+    full_ranking = attribute_system.match_plumbers(advanced_preferences, max_results=None)
+    assert catalog_report['total_plumbers_found'] == len(full_ranking)
+    assert catalog_report['best_score'] == full_ranking[0]['Match_Score'] == report['best_score']
+    stats = catalog_report['score_statistics']
+    assert stats['min_score'] <= stats['p25'] <= stats['p50'] <= stats['p75'] <= stats['max_score']
+    print(f"\nWhole catalog: {catalog_report['total_plumbers_found']} plumbers, "
+          f"average score {catalog_report['average_score']}, median {stats['p50']}")
+    
     # Test 5: Attribute suggestions
     print("\n💡 Test 4: Attribute Suggestions")
     print("-" * 30)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for availability parsing and time-slot bitmaps
+"""
+
+import numpy as np
+from availability import parse_availability, availability_bitmap, parse_slot, is_available, slots_overlap, slot_options
+from availability_index import AvailabilityIndex
+from attribute_system import DynamicAttributeSystem
+
+def test_parse_availability():
+    """Both text formats parse into the same kind of canonical intervals, with optional weekdays"""
+    daily = parse_availability('9AM-11AM, 11AM-1PM, 3PM-5PM')
+    assert daily[0] == daily[6] == [(540, 780), (900, 1020)]
+    assert parse_availability('9am-1pm, 3pm-5pm') == daily
+    weekly = parse_availability('Mon-Fri 9:30am-1pm; Sat 10am-2pm, Sun 10pm-2am')
+    assert weekly[2] == [(570, 780)] and weekly[5] == [(600, 840)]
+    assert weekly[6] == [(1320, 1440)] and weekly[0] == [(0, 120), (570, 780)]
+    assert parse_availability(None) == {} and parse_availability('') == {}
+    for text in ['AM', 'Funday 9-5', '13pm-2pm', '9am-9am']:
+        try:
+            parse_availability(text)
+            assert False, text
+        except ValueError:
+            pass
+    print("✅ Availability text is parsed into canonical intervals")
+
+def test_slot_queries():
+    """Requested slots match by interval, not by text"""
+    bitmap = availability_bitmap(parse_availability('9AM-11AM, 11AM-1PM'))
+    assert is_available(bitmap, parse_slot('10AM-12PM'))
+    assert is_available(bitmap, parse_slot('9AM')) and not is_available(bitmap, parse_slot('1PM'))
+    assert not is_available(bitmap, parse_slot('12PM-2PM'))
+    weekdays = availability_bitmap(parse_availability('Mon-Fri 9am-5pm'))
+    assert is_available(weekdays, parse_slot('10am-11am'), 4) and not is_available(weekdays, parse_slot('10am-11am'), 5)
+    assert slots_overlap('9am-12pm', '11am-1pm') and not slots_overlap('9am-11am', '11am-1pm')
+    print("✅ Slot queries handle overlap")
+
+def test_overnight_slots():
+    """A requested slot past midnight needs the next weekday to be free too"""
+    saturday_night = availability_bitmap(parse_availability('Sat 10pm-12am'))
+    assert is_available(saturday_night, parse_slot('10PM-11PM'), 5)
+    assert not is_available(saturday_night, parse_slot('10PM-2AM'), 5)
+    into_sunday = availability_bitmap(parse_availability('Sat 10pm-2am'))
+    assert is_available(into_sunday, parse_slot('10PM-2AM'), 5) and not is_available(into_sunday, parse_slot('10PM-2AM'), 4)
+    assert is_available(into_sunday, parse_slot('1AM-2AM'), 6)
+    sunday_night = availability_bitmap(parse_availability('Sun 11pm-1am'))
+    assert is_available(sunday_night, parse_slot('11PM-1AM'), 6) and is_available(sunday_night, parse_slot('11PM-1AM'))
+
+    index = AvailabilityIndex(['Sat 10pm-12am', 'Sat 10pm-2am', 'Sun 11pm-1am'], np.array([0, 1, 2], dtype=np.int32))
+    assert index.available(parse_slot('10PM-2AM'), 5).tolist() == [False, True, False]
+    assert index.available(parse_slot('11PM-1AM')).tolist() == [False, True, True]
+    assert not slots_overlap('10PM-2AM', '1AM-3AM')
+    print("✅ Overnight slots carry into the next weekday")
+
+def test_slot_options():
+    """Every item of availability text becomes a slot that parse_slot accepts"""
+    options = slot_options('Mon-Fri 9am-1pm; Sat 10:30pm-2am, 9AM-11AM, whenever, 9am-1pm')
+    assert options == ['9AM-1PM', '10:30PM-2AM', '9AM-11AM']
+    assert all(parse_slot(option) for option in options)
+    assert slot_options(None) == [] and slot_options('12pm-12am') == ['12PM-12AM']
+    print("✅ Availability items render as bookable slots")
+
+def test_catalog_index():
+    """The catalog index agrees with checking each plumber's bitmap"""
+    attribute_system = DynamicAttributeSystem()
+    df = attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    index = attribute_system.get_engine().availability
+    bitmaps = [availability_bitmap(parse_availability(text)) for text in df['Free_Time_Slots']]
+    for slot in ['9AM-11AM', '10AM-12PM', '1PM', '4PM-6PM']:
+        for day in (None, 3):
+            expected = [is_available(bitmap, parse_slot(slot), day) for bitmap in bitmaps]
+            assert index.available(parse_slot(slot), day).tolist() == expected, slot
+    empty = AvailabilityIndex(['whenever'], np.array([0, -1], dtype=np.int32))
+    assert empty.unreadable == ['whenever'] and not empty.available(parse_slot('9AM')).any()
+    print("✅ Catalog availability bitmaps answer slot queries")
+
+if __name__ == "__main__":
+    test_parse_availability()
+    test_slot_queries()
+    test_overnight_slots()
+    test_slot_options()
+    test_catalog_index()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Test script for the declared catalog column types
+"""
+
+import pandas as pd
+from catalog_schema import CATALOG_SCHEMA, read_catalog, bytes_per_plumber
+
+def test_declared_types():
+    """Every column is declared, text columns are categorical and integers are downcast"""
+    default = pd.read_csv('enhanced_plumbers_dataset.csv')
+    df = read_catalog('enhanced_plumbers_dataset.csv')
+    assert list(df.columns) == list(CATALOG_SCHEMA) == list(default.columns)
+    assert isinstance(df['District'].dtype, pd.CategoricalDtype)
+    assert df['Experience_Years'].dtype.itemsize < 8 and df['Rating'].dtype == 'float64'
+    for column in df.columns:
+        assert df[column].astype(object).equals(default[column].astype(object)), column
+    assert bytes_per_plumber(df) < bytes_per_plumber(default)
+    print("✅ Declared types keep every value and use less memory")
+
+def test_chunked_read():
+    """Reading in chunks gives the same frame, with categories merged across chunks"""
+    whole = read_catalog('enhanced_plumbers_dataset.csv')
+    chunked = read_catalog('enhanced_plumbers_dataset.csv', chunk_rows=3)
+    pd.testing.assert_frame_equal(chunked, whole)
+    print("✅ Chunked reads match a single read")
+
+if __name__ == "__main__":
+    test_declared_types()
+    test_chunked_read()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled, memory-mapped catalog snapshot
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from attribute_system import DynamicAttributeSystem
+from catalog_snapshot import main, snapshot_path
+from catalog_schema import read_catalog
+from dataset_reloader import DatasetReloader
+
+QUERIES = [
+    {'work_type': 'Leak Repair', 'district': 'Surat', 'client_lat': 21.1702, 'client_lon': 72.8311},
+    {'language': 'Hindi', 'experience_years': 8, 'min_rating': 4.0, 'required_equipment': 'Pipe Wrench'},
+    {'work_type': 'kitchen', 'payment_methods': 'UPI', 'certifications': 'Plumbing License'},
+    {'client_lat': 23.03, 'client_lon': 72.58}
+]
+
+def test_compiled_load_matches_csv():
+    """A catalog loaded from its snapshot answers exactly like one parsed from the CSV"""
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'plumbers.csv')
+        shutil.copy('enhanced_plumbers_dataset.csv', path)
+        attribute_system = DynamicAttributeSystem()
+        assert not attribute_system.load_compiled(path)
+
+        main(['--dataset', path])
+        assert attribute_system.load_compiled(path)
+        assert not attribute_system.get_store().codes['District'].flags.writeable
+        fresh = DynamicAttributeSystem()
+        fresh.load_dataset(path)
+        for preferences in QUERIES:
+            # Compared as text since missing values are NaN, which never equals itself
+            assert str(attribute_system.match_plumbers(preferences, max_results=None, explain=True)) == \
+                str(fresh.match_plumbers(preferences, max_results=None, explain=True))
+            assert str(attribute_system.match_plumbers(preferences, radius_km=50)) == \
+                str(fresh.match_plumbers(preferences, radius_km=50))
+        assert str(attribute_system.nearest_plumbers(22.3, 70.8, 5)) == str(fresh.nearest_plumbers(22.3, 70.8, 5))
+        pd.testing.assert_frame_equal(attribute_system.df, read_catalog(path))
+        print("✅ Snapshot load matches the CSV")
+
+        # Edits to the CSV make the snapshot stale; the reloader still works from a compiled catalog
+        reloader = DatasetReloader(attribute_system, path, min_interval_seconds=0)
+        df = pd.read_csv(path)
+        df.loc[0, 'Rating'] = 1.5
+        df.to_csv(path, index=False)
+        assert not DynamicAttributeSystem().load_compiled(path)
+        assert reloader.maybe_reload()['updated'] == 1
+        assert attribute_system.get_store().value('Rating', 0) == 1.5
+        assert os.path.exists(snapshot_path(path))
+        print("✅ Stale snapshots are ignored")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_compiled_load_matches_csv()
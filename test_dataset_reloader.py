@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental reloading of the plumber dataset
+"""
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from attribute_system import DynamicAttributeSystem
+from dataset_reloader import DatasetReloader, diff_by_name
+
+PREFERENCES = {'work_type': 'Leak Repair', 'language': 'English', 'payment_methods': 'UPI',
+               'min_rating': 4.0, 'client_lat': 21.1702, 'client_lon': 72.8311}
+
+def edited_catalog(df):
+    """Delete, update and insert a few plumbers"""
+    df = df.drop(index=[2, 5]).reset_index(drop=True)
+    df.loc[0, 'Work_Specialization'] = 'Leak Repair'
+    df.loc[3, 'Rating'] = 4.95
+    df.loc[4, 'Languages_Spoken'] = 'Gujarati, Tamil'
+    new_plumber = df.iloc[[1]].copy()
+    new_plumber['Name'] = 'Plumber_New'
+    new_plumber['Payment_Methods'] = 'Cash/UPI/Crypto'
+    return pd.concat([new_plumber, df], ignore_index=True)
+
+def test_diff_by_name():
+    """Inserted, updated and deleted plumbers are told apart by Name"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    source_rows, summary = diff_by_name(df, edited_catalog(df))
+    assert summary == {'inserted': 1, 'updated': 3, 'deleted': 2}
+    assert (source_rows < 0).sum() == 4
+    print("✅ Diff by name finds every change")
+
+def test_reload_matches_fresh_load():
+    """An incremental reload gives the same answers as loading the new file from scratch"""
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'plumbers.csv')
+        shutil.copy('enhanced_plumbers_dataset.csv', path)
+        attribute_system = DynamicAttributeSystem()
+        attribute_system.load_dataset(path)
+        reloader = DatasetReloader(attribute_system, path, min_interval_seconds=0)
+        old_store = attribute_system.get_store()
+        assert reloader.maybe_reload() is None
+
+        edited_catalog(pd.read_csv(path)).to_csv(path, index=False)
+        summary = reloader.maybe_reload()
+        assert summary['mode'] == 'incremental' and summary['inserted'] == 1
+
+        fresh = DynamicAttributeSystem()
+        fresh.load_dataset(path)
+        # Compared as text since missing values are NaN, which never equals itself
+        assert str(attribute_system.match_plumbers(PREFERENCES, max_results=None)) == \
+            str(fresh.match_plumbers(PREFERENCES, max_results=None))
+        store, fresh_store = attribute_system.get_store(), fresh.get_store()
+        for idx in range(len(fresh_store)):
+            assert str(store.record(idx)) == str(fresh_store.record(idx))
+        assert sorted(store.distinct_tokens('Languages_Spoken')) == sorted(fresh_store.distinct_tokens('Languages_Spoken'))
+        assert sorted(store.distinct_values('Name')) == sorted(fresh_store.distinct_values('Name'))
+        assert list(store.search_text('Payment_Methods', 'crypto')) == [0]
+
+        # Readers holding the old store still see the old catalog
+        assert len(old_store) == 20 and old_store.value('Name', 2) == 'Plumber_3'
+        print("✅ Incremental reload matches a fresh load")
+    finally:
+        shutil.rmtree(directory)
+
+def test_reverted_edit_matches_fresh_load():
+    """A list item that only a reverted edit used doesn't break the next reload"""
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'plumbers.csv')
+        shutil.copy('enhanced_plumbers_dataset.csv', path)
+        attribute_system = DynamicAttributeSystem()
+        attribute_system.load_dataset(path)
+        reloader = DatasetReloader(attribute_system, path, min_interval_seconds=0)
+
+        original = pd.read_csv(path)
+        edited = original.copy()
+        edited.loc[0, 'Languages_Spoken'] = 'Kannada'
+        edited.to_csv(path, index=False)
+        assert reloader.maybe_reload()['updated'] == 1
+        original.to_csv(path, index=False)
+        assert reloader.maybe_reload()['updated'] == 1
+        assert reloader.maybe_reload() is None
+
+        fresh = DynamicAttributeSystem()
+        fresh.load_dataset(path)
+        store, fresh_store = attribute_system.get_store(), fresh.get_store()
+        assert 'Kannada' not in store.distinct_tokens('Languages_Spoken')
+        assert len(store.lookup_token('Languages_Spoken', 'Kannada')) == 0
+        for language in fresh_store.distinct_tokens('Languages_Spoken'):
+            assert list(store.lookup_token('Languages_Spoken', language)) == \
+                list(fresh_store.lookup_token('Languages_Spoken', language)), language
+        assert str(attribute_system.match_plumbers(PREFERENCES, max_results=None)) == \
+            str(fresh.match_plumbers(PREFERENCES, max_results=None))
+        print("✅ Reverted edits reload like a fresh load")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_diff_by_name()
+    test_reload_matches_fresh_load()
+    test_reverted_edit_matches_fresh_load()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory facet lists
+"""
+
+import os
+import tempfile
+from flask import Flask
+from models import db, User, PlumberProfile
+from attribute_system import DynamicAttributeSystem
+from facet_cache import FacetCache, profile_values
+from availability import parse_slot
+
+def make_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def add_plumber(facets, name, specialization, languages, free_time_slots):
+    user = User(name=name, email=f'{name}@example.com', password_hash='x', role='plumber')
+    db.session.add(user)
+    db.session.commit()
+    profile = PlumberProfile(user_id=user.id, specialization=specialization, languages=languages,
+                             free_time_slots=free_time_slots)
+    facets.save_profile(profile)
+    return profile
+
+def test_catalog_facets():
+    """Catalog facets are computed once per catalog version"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    facets = FacetCache(attribute_system)
+    first = facets.catalog_facets()
+    assert facets.catalog_facets() is first
+    assert first.values['locations'] == sorted(attribute_system.df['District'].unique())
+    assert first.values['time_slots'] == sorted(set(
+        slot.strip() for slots in attribute_system.df['Free_Time_Slots'] for slot in slots.split(',')))
+    assert all(parse_slot(slot) for slot in first.values['time_slots'])
+
+    df = attribute_system.df.copy()
+    df['District'] = df['District'].astype(object)
+    df.loc[0, 'District'] = 'Kutch'
+    attribute_system.apply_dataset(df)
+    second = facets.catalog_facets()
+    assert 'Kutch' in second.values['locations'] and second.tag != first.tag
+    print("✅ Catalog facets follow the catalog version")
+
+def test_profile_facets():
+    """Registrations and availability edits update the lists in place and reach other workers"""
+    app = make_app(os.path.join(tempfile.mkdtemp(), 'facets.db'))
+    with app.app_context():
+        db.create_all()
+        first = FacetCache(None, min_interval_seconds=0)
+        second = FacetCache(None, min_interval_seconds=0)
+        assert first.profile_facets().values == {'work_types': [], 'time_slots': [], 'languages': []}
+        add_plumber(first, 'ramesh', 'Leak Repair', 'Gujarati, Hindi', '9am-12pm, 2pm-5pm')
+        profile = add_plumber(first, 'suresh', 'Installation', 'Gujarati', '10am-1pm')
+        assert first.profile_facets().values == {
+            'work_types': ['Installation', 'Leak Repair'],
+            'time_slots': ['10AM-1PM', '2PM-5PM', '9AM-12PM'],
+            'languages': ['Gujarati', 'Hindi']
+        }
+
+        previous = profile_values(profile)
+        profile.free_time_slots = '9am-12pm'
+        first.save_profile(profile, previous)
+        assert first.profile_facets().values['time_slots'] == ['2PM-5PM', '9AM-12PM']
+        assert second.profile_facets() == first.profile_facets()
+
+        profile.free_time_slots = '6pm-8pm'
+        second.save_profile(profile, profile_values(profile))
+        assert first.profile_facets().values['time_slots'] == ['2PM-5PM', '6PM-8PM', '9AM-12PM']
+
+        previous = profile_values(profile)
+        profile.free_time_slots = 'Mon-Fri 9:30am-1pm; Sat 10pm-2am, whenever'
+        second.save_profile(profile, previous)
+        slots = first.profile_facets().values['time_slots']
+        assert slots == ['10PM-2AM', '2PM-5PM', '9:30AM-1PM', '9AM-12PM']
+        assert all(parse_slot(slot) for slot in slots)
+    print("✅ Profile facets are updated incrementally")
+
+if __name__ == "__main__":
+    test_catalog_facets()
+    test_profile_facets()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for the match result cache
+"""
+
+import time
+import threading
+from attribute_system import DynamicAttributeSystem
+from match_cache import MatchCache
+
+PREFERENCES = {'work_type': 'Leak Repair', 'district': 'Surat',
+               'client_lat': 21.1702, 'client_lon': 72.8311}
+
+def test_equivalent_queries_hit():
+    """Reordered preferences and nearby coordinates share a cache entry"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+
+    first = attribute_system.match_plumbers(PREFERENCES, max_results=5)
+    nearby = {'client_lon': 72.8312, 'client_lat': 21.1701, 'district': 'Surat', 'work_type': 'Leak Repair'}
+    second = attribute_system.match_plumbers(nearby, max_results=5)
+    assert [p['Name'] for p in first] == [p['Name'] for p in second]
+    assert attribute_system.match_cache.hits == 1 and attribute_system.match_cache.misses == 1
+
+    # Callers may annotate results without corrupting the cache
+    second[0]['eta'] = 10
+    assert 'eta' not in attribute_system.match_plumbers(PREFERENCES, max_results=5)[0]
+
+    attribute_system.match_plumbers(PREFERENCES, max_results=3)
+    assert attribute_system.match_cache.misses == 2
+    print("✅ Equivalent queries hit the cache")
+
+def test_invalidation():
+    """Weight changes and dataset reloads never serve stale results"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+
+    before = attribute_system.match_plumbers(PREFERENCES, max_results=5)
+    attr = attribute_system.get_attribute('district')
+    attr.weight = 0.1
+    attribute_system.update_attribute('district', attr)
+    after = attribute_system.match_plumbers(PREFERENCES, max_results=5)
+    assert attribute_system.match_cache.hits == 0
+    assert after == attribute_system.match_plumbers(PREFERENCES, max_results=5, use_cache=False)
+    assert before != after
+
+    # Definitions are copies; changing one only takes effect through update_attribute
+    attr.weight = 0.8
+    assert attribute_system.match_plumbers(PREFERENCES, max_results=5) == after
+    attribute_system.update_attribute('district', attr)
+    assert attribute_system.match_plumbers(PREFERENCES, max_results=5) == before
+
+    # Published definitions are read-only, so they can't change behind the cache
+    for change in [lambda: setattr(attribute_system.attributes['district'], 'weight', 5.0),
+                   lambda: attribute_system.attributes['district'].possible_values.append('Kutch')]:
+        try:
+            change()
+            assert False
+        except AttributeError:
+            pass
+    assert attribute_system.match_plumbers(PREFERENCES, max_results=5) == before
+
+    version = attribute_system.version
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    assert attribute_system.version > version and len(attribute_system.match_cache) == 0
+    print("✅ Cache is invalidated on changes")
+
+def test_concurrent_updates():
+    """Readers see either the old or the new weights while an update is published"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    light = attribute_system.get_attribute('district')
+    light.weight = 0.1
+    heavy = attribute_system.get_attribute('district')
+    expected = [attribute_system.match_plumbers(PREFERENCES, max_results=5, use_cache=False)]
+    attribute_system.update_attribute('district', light)
+    expected.append(attribute_system.match_plumbers(PREFERENCES, max_results=5, use_cache=False))
+
+    seen = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            seen.append(attribute_system.match_plumbers(PREFERENCES, max_results=5))
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    for i in range(20):
+        attribute_system.update_attribute('district', heavy if i % 2 else light)
+    done.set()
+    for thread in readers:
+        thread.join()
+    assert seen and all(result in expected for result in seen)
+    print("✅ Concurrent readers never see a half-applied update")
+
+def test_lru_and_ttl():
+    """Least recently used entries are evicted and old entries expire"""
+    cache = MatchCache(max_entries=2, ttl_seconds=0.05)
+    keys = [cache.make_key({'district': district}) for district in ['Surat', 'Anand', 'Patan']]
+    cache.put(keys[0], 'surat')
+    cache.put(keys[1], 'anand')
+    assert cache.get(keys[0]) == 'surat'
+    cache.put(keys[2], 'patan')
+    assert cache.get(keys[1]) is None and cache.get(keys[0]) == 'surat'
+    assert cache.evictions == 1
+
+    time.sleep(0.06)
+    assert cache.get(keys[2]) is None and cache.expirations == 1
+    print("✅ LRU eviction and TTL expiry work")
+
+if __name__ == "__main__":
+    test_equivalent_queries_hit()
+    test_invalidation()
+    test_concurrent_updates()
+    test_lru_and_ttl()
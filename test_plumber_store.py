@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled, array-backed plumber store
+"""
+
+import math
+import pandas as pd
+from plumber_store import PlumberStore, intersect_postings
+
+def test_records_round_trip():
+    """Every plumber record rebuilt from the store equals the CSV row"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    store = PlumberStore(df)
+
+    for i, (_, row) in enumerate(df.iterrows()):
+        record = store.record(i)
+        for column, value in row.to_dict().items():
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(record[column]), column
+            else:
+                assert record[column] == value, column
+                assert type(record[column]) == type(value), column
+    print(f"✅ {len(store)} records round-trip, {store.nbytes() / len(store):.0f} bytes per plumber")
+
+def test_masks():
+    """Equality, substring and list-item masks agree with pandas"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    store = PlumberStore(df)
+
+    assert (store.equals_mask('District', 'Surat') == (df['District'] == 'Surat')).all()
+    assert (store.contains_mask('Free_Time_Slots', '9AM') == df['Free_Time_Slots'].str.contains('9AM')).all()
+    english = df['Languages_Spoken'].apply(lambda v: 'English' in [s.strip() for s in v.split(',')])
+    assert (store.mask(store.lookup_token('Languages_Spoken', 'English')) == english).all()
+    assert 'UPI' in store.distinct_tokens('Payment_Methods')
+    assert store.numeric['Experience_Years'].dtype == 'float32'
+    print("✅ Store masks agree with pandas")
+
+def test_posting_lists():
+    """Posting-list lookups and intersections agree with pandas filters"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    store = PlumberStore(df)
+
+    surat = store.lookup('District', 'Surat')
+    assert list(surat) == list(df.index[df['District'] == 'Surat'])
+    gujarati = store.lookup_token('Languages_Spoken', 'Gujarati')
+    expected = df['Languages_Spoken'].apply(lambda v: 'Gujarati' in [s.strip() for s in v.split(',')])
+    assert list(gujarati) == list(df.index[expected])
+    both = intersect_postings(store.lookup('Work_Specialization', 'Leak Repair'),
+                              store.lookup_contains('Service_Areas', 'Rajkot'))
+    expected = (df['Work_Specialization'] == 'Leak Repair') & df['Service_Areas'].str.contains('Rajkot')
+    assert list(both) == list(df.index[expected])
+    assert len(store.lookup('District', 'Nowhere')) == 0
+    print("✅ Posting lists agree with pandas")
+
+def test_trigram_search():
+    """Trigram text search agrees with case-insensitive substring filters"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    store = PlumberStore(df)
+
+    for column, token in [('Specializations_Detailed', 'leak'), ('Equipment_Available', 'Tools'),
+                          ('Service_Areas', 'ahmedabad'), ('Payment_Methods', 'UP'), ('Name', 'plumber_1')]:
+        expected = df[column].str.contains(token, case=False, regex=False, na=False)
+        assert list(store.search_text(column, token)) == list(df.index[expected]), (column, token)
+    assert list(store.search_text('Equipment_Available', 'tools', case_sensitive=True)) == []
+    assert list(store.find_by_name('plumber_7')) == list(df.index[df['Name'] == 'Plumber_7'])
+    print("✅ Trigram search agrees with pandas")
+
+if __name__ == "__main__":
+    test_records_round_trip()
+    test_masks()
+    test_posting_lists()
+    test_trigram_search()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test script to check the columnar scoring engine against the per-row scoring function
+"""
+
+from dataclasses import replace
+from attribute_system import DynamicAttributeSystem, AttributeType, ExpiredCursorError
+
+PREFERENCE_SETS = [
+    {'work_type': 'Leak Repair', 'district': 'Surat', 'language': 'English',
+     'client_lat': 21.1702, 'client_lon': 72.8311},
+    {'work_type': 'Kitchen Plumbing', 'experience_years': 8, 'license_type': 'Licensed',
+     'min_rating': 4.0, 'max_cost': 500, 'client_lat': 23.0300, 'client_lon': 72.5800},
+    {'payment_methods': 'upi', 'certifications': 'Any', 'response_time': 15},
+    {'client_lat': 22.3039, 'client_lon': 73.1812},
+]
+
+def test_engine_matches_per_row_scores():
+    """Every attribute score from the engine equals calculate_attribute_score"""
+    attribute_system = DynamicAttributeSystem()
+    df = attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    engine = attribute_system.get_engine()
+
+    for preferences in PREFERENCE_SETS:
+        for attr_name, customer_value in preferences.items():
+            if attr_name not in attribute_system.attributes:
+                continue
+            attr = attribute_system.attributes[attr_name]
+            scores = engine.score_attribute(attr_name, attr, customer_value)
+            for i, (_, plumber) in enumerate(df.iterrows()):
+                expected = attribute_system.calculate_attribute_score(
+                    plumber.to_dict(), attr_name, customer_value, attr.type
+                )
+                assert scores[i] == expected, (attr_name, customer_value, i)
+    print("✅ Engine scores match per-row scores")
+
+def test_match_results_are_ranked():
+    """match_plumbers returns plumbers ordered by match score"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+
+    for preferences in PREFERENCE_SETS:
+        matched_plumbers = attribute_system.match_plumbers(preferences, max_results=5)
+        scores = [p['Match_Score'] for p in matched_plumbers]
+        assert scores == sorted(scores, reverse=True)
+        assert len(matched_plumbers) <= 5
+        if 'client_lat' in preferences:
+            assert all('Distance_km' in p for p in matched_plumbers)
+    print("✅ Match results are ranked")
+
+def test_top_k_equals_full_ranking():
+    """Pruned top-k selection returns the head of the fully sorted ranking"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+
+    def ranking(matched_plumbers):
+        return [(p['Name'], p['Match_Score'], p.get('Distance_km')) for p in matched_plumbers]
+
+    for preferences in PREFERENCE_SETS:
+        full_ranking = ranking(attribute_system.match_plumbers(preferences, max_results=None))
+        for k in [0, 1, 3, 7]:
+            assert ranking(attribute_system.match_plumbers(preferences, max_results=k)) == full_ranking[:k]
+    print("✅ Top-k selection matches the full ranking")
+
+def test_pruning_with_negative_numeric_values():
+    """Pruning stays exact when a negative numeric preference scores above its weight"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    engine = attribute_system.get_engine()
+    attributes = dict(attribute_system.attributes)
+    attributes['max_cost'] = replace(attributes['max_cost'], weight=0.05)
+
+    for preferences in [{'response_time': 20, 'max_cost': -10},
+                        {'response_time': 20, 'min_rating': 4.5, 'max_cost': -10}]:
+        unpruned = [(p['Name'], p['Match_Score']) for p in engine.match(preferences, attributes, max_results=None)]
+        for k in [1, 3, 5]:
+            pruned = [(p['Name'], p['Match_Score']) for p in engine.match(preferences, attributes, max_results=k)]
+            assert pruned == unpruned[:k], (preferences, k)
+    print("✅ Pruning bounds numeric scores above their weight")
+
+def test_batch_equals_single_queries():
+    """Batch matching returns the same lists as one match_plumbers call per query"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    attribute_system.match_cache = None
+
+    queries = PREFERENCE_SETS + [{'work_type': 'Leak Repair', 'client_lat': 23.03, 'client_lon': 72.58}]
+    batch = attribute_system.match_plumbers_batch(queries, max_results=5)
+    assert len(batch) == len(queries)
+    for preferences, matched_plumbers in zip(queries, batch):
+        single = attribute_system.match_plumbers(preferences, max_results=5)
+        assert [(p['Name'], p['Match_Score'], p.get('Distance_km')) for p in matched_plumbers] == \
+            [(p['Name'], p['Match_Score'], p.get('Distance_km')) for p in single]
+    print("✅ Batch matching matches single queries")
+
+def test_cursor_pages_equal_full_ranking():
+    """Following cursors page by page walks the full ranking in order"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+
+    def ranking(matched_plumbers):
+        return [(p['Name'], p['Match_Score'], p.get('Distance_km'), p['Attribute_Scores']) for p in matched_plumbers]
+
+    for preferences in PREFERENCE_SETS:
+        full_ranking = ranking(attribute_system.match_plumbers(preferences, max_results=None, explain=True))
+        results, cursor, total_found = attribute_system.match_plumbers_page(preferences, page_size=3, explain=True)
+        pages = list(results)
+        while cursor:
+            results, cursor, _ = attribute_system.match_plumbers_page(cursor=cursor, page_size=3, explain=True)
+            pages.extend(results)
+        assert total_found == len(full_ranking)
+        assert ranking(pages) == full_ranking
+
+    for page_size in [0, -3]:
+        try:
+            attribute_system.match_plumbers_page(PREFERENCE_SETS[0], page_size=page_size)
+            assert False, page_size
+        except ValueError:
+            pass
+
+    _, cursor, _ = attribute_system.match_plumbers_page(PREFERENCE_SETS[0], page_size=1)
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    try:
+        attribute_system.match_plumbers_page(cursor=cursor)
+        assert False, "cursor should expire after a reload"
+    except ExpiredCursorError:
+        pass
+    print("✅ Cursor pages match the full ranking")
+
+def test_explanations_are_lazy():
+    """Attribute_Scores are only built when asked for and don't change the ranking"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+
+    for preferences in PREFERENCE_SETS:
+        plain = attribute_system.match_plumbers(preferences, max_results=5)
+        explained = attribute_system.match_plumbers(preferences, max_results=5, explain=True)
+        assert all('Attribute_Scores' not in p for p in plain)
+        assert all('Attribute_Scores' in p for p in explained)
+        assert [p['Name'] for p in plain] == [p['Name'] for p in explained]
+    print("✅ Explanations are only built on request")
+
+def test_tier_tables():
+    """Possible values are scored from tables built at load time, which survive weight changes"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    engine = attribute_system.get_engine()
+    attr = attribute_system.get_attribute('work_type')
+    column = 'Work_Specialization'
+
+    table = engine.tier_table('work_type', column, 'Leak Repair')
+    assert (table == engine._text_tiers('work_type', column, 'Leak Repair')).all()
+    tables = len(engine._tier_tables)
+    attr.weight = 0.5
+    attribute_system.update_attribute('work_type', attr)
+    assert attribute_system.get_engine() is engine and len(engine._tier_tables) == tables
+
+    rows = [3, 1, 7]
+    for value in ['Leak Repair', 'leak', 'Any']:
+        scores = engine.score_attribute('work_type', attr, value)
+        assert (engine.score_attribute('work_type', attr, value, rows) == scores[rows]).all()
+        for i, plumber in enumerate(attribute_system.df.to_dict('records')):
+            assert scores[i] == attribute_system.calculate_attribute_score(plumber, 'work_type', value, attr.type)
+    assert len(engine._tier_tables) == tables
+    print("✅ Categorical scores come from precomputed tier tables")
+
+def test_query_plan():
+    """REQUIRED attributes filter, NEGATIVE attributes penalize and the plan reports both"""
+    attribute_system = DynamicAttributeSystem()
+    df = attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    engine = attribute_system.get_engine()
+    preferences = {'work_type': 'Leak Repair', 'language': 'English'}
+
+    work_type = engine.score_attribute('work_type', attribute_system.attributes['work_type'], 'Leak Repair')
+    matched_plumbers = attribute_system.match_plumbers(preferences, max_results=None, explain=True)
+    assert matched_plumbers and all(p['Attribute_Scores']['work_type'] > 0 for p in matched_plumbers)
+    assert len(matched_plumbers) == (work_type > 0).sum()
+
+    plan = attribute_system.explain_query(preferences)
+    assert plan['required'] == ['work_type'] and plan['soft'] == ['language']
+    assert [stage['candidates'] for stage in plan['stages']] == \
+        [len(df), (work_type > 0).sum(), (work_type > 0).sum(), len(matched_plumbers)]
+
+    attr = attribute_system.get_attribute('language')
+    attr.type = AttributeType.NEGATIVE
+    attribute_system.update_attribute('language', attr)
+    penalized = {p['Name']: p for p in attribute_system.match_plumbers(preferences, max_results=None, explain=True)}
+    for plumber in matched_plumbers:
+        language = plumber['Attribute_Scores']['language']
+        if plumber['Name'] in penalized:
+            assert penalized[plumber['Name']]['Attribute_Scores']['language'] == -language
+        else:
+            assert language >= plumber['Attribute_Scores']['work_type']
+    assert attribute_system.explain_query(preferences)['negative'] == ['language']
+    print("✅ Query plan filters REQUIRED and penalizes NEGATIVE attributes")
+
+def test_facet_counts():
+    """Each facet count equals the plumbers matching the other preferences that also score on the value"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    for preferences in PREFERENCE_SETS:
+        counts = attribute_system.facet_counts(preferences)
+        assert counts['total'] == len(attribute_system.match_plumbers(preferences, max_results=None))
+        for attr_name, values in counts['facets'].items():
+            others = {name: value for name, value in preferences.items() if name != attr_name}
+            matched = {p['Name'] for p in attribute_system.match_plumbers(others, max_results=None)}
+            for value, count in values.items():
+                with_value = attribute_system.match_plumbers({**others, attr_name: value}, max_results=None, explain=True)
+                assert count == sum(1 for p in with_value
+                                    if p['Name'] in matched and p['Attribute_Scores'][attr_name] > 0), (attr_name, value)
+    assert attribute_system.facet_counts({'district': 'Surat'})['facets']['district']['Surat'] > 0
+    print("✅ Facet counts equal per-value matches")
+
+if __name__ == "__main__":
+    test_engine_matches_per_row_scores()
+    test_match_results_are_ranked()
+    test_top_k_equals_full_ranking()
+    test_pruning_with_negative_numeric_values()
+    test_batch_equals_single_queries()
+    test_cursor_pages_equal_full_ranking()
+    test_explanations_are_lazy()
+    test_tier_tables()
+    test_query_plan()
+    test_facet_counts()
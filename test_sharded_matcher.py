@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script for sharded matching across worker processes
+"""
+
+import pandas as pd
+from attribute_system import DynamicAttributeSystem
+from sharded_matcher import ShardedMatcher, shard_by_district
+
+PREFERENCE_SETS = [
+    {'work_type': 'Leak Repair', 'district': 'Surat', 'client_lat': 21.1702, 'client_lon': 72.8311},
+    {'service_type': 'Emergency', 'min_rating': 4.5, 'max_price': 1000},
+    {'work_type': 'Any', 'client_lat': 23.0225, 'client_lon': 72.5714},
+    {}
+]
+
+def summary(plumbers):
+    return [(p['Name'], p['Match_Score'], p.get('Distance_km'), str(p.get('Attribute_Scores'))) for p in plumbers]
+
+def test_shards_match_single_process():
+    """Merged shard results equal the single-process ranking for both shardings"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.apply_dataset(df)
+    expected = [summary(attribute_system.match_plumbers(p, max_results=10, explain=True)) for p in PREFERENCE_SETS]
+
+    for shard_by in ['range', 'district']:
+        with ShardedMatcher(df, n_workers=2, shard_by=shard_by) as matcher:
+            results = matcher.match_many(PREFERENCE_SETS, max_results=10, explain=True)
+            assert [summary(plumbers) for plumbers in results] == expected
+    print("✅ Sharded matching equals single-process matching")
+
+def test_district_shards_keep_districts_together():
+    """Every district lands on exactly one shard"""
+    df = pd.read_csv('enhanced_plumbers_dataset.csv')
+    shards = shard_by_district(df, 3)
+    assert sum(len(rows) for rows in shards) == len(df)
+    for rows in shards:
+        others = df.drop(index=rows)['District']
+        assert not set(df['District'].iloc[rows]) & set(others)
+    print("✅ District sharding keeps districts together")
+
+if __name__ == "__main__":
+    test_shards_match_single_process()
+    test_district_shards_keep_districts_together()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the plumber location grid index
+"""
+
+import numpy as np
+from spatial_index import SpatialIndex
+from geo import haversine_array, distances, in_bounding_box
+from attribute_system import DynamicAttributeSystem
+
+def make_locations(n=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(20.0, 24.7, n)
+    lons = rng.uniform(68.5, 74.5, n)
+    return lats, lons
+
+def test_within_matches_full_scan():
+    """within() returns exactly the plumbers a full distance scan would"""
+    lats, lons = make_locations()
+    index = SpatialIndex(lats, lons)
+
+    for lat, lon, radius in [(21.17, 72.83, 5), (23.02, 72.57, 25), (22.3, 70.8, 120), (30.0, 80.0, 10)]:
+        ids, distances = index.within(lat, lon, radius)
+        expected = np.flatnonzero(haversine_array(lat, lon, lats, lons) <= radius)
+        assert np.array_equal(ids, expected)
+        assert (distances <= radius).all()
+    print("✅ Radius queries match a full scan")
+
+def test_nearest_matches_full_scan():
+    """nearest() returns the k closest plumbers, nearest first"""
+    lats, lons = make_locations()
+    index = SpatialIndex(lats, lons)
+
+    for lat, lon, k in [(21.17, 72.83, 1), (23.02, 72.57, 10), (25.5, 75.0, 50)]:
+        ids, distances = index.nearest(lat, lon, k)
+        all_distances = haversine_array(lat, lon, lats, lons)
+        expected = np.lexsort((np.arange(len(lats)), all_distances))[:k]
+        assert np.array_equal(ids, expected)
+        assert list(distances) == sorted(distances)
+    print("✅ Nearest-neighbour queries match a full scan")
+
+def test_distance_methods():
+    """Bounding-box prefiltering and the equirectangular fast path agree with haversine"""
+    lats, lons = make_locations()
+    exact = haversine_array(21.17, 72.83, lats, lons)
+
+    boxed = distances(21.17, 72.83, lats, lons, max_km=50)
+    inside = in_bounding_box(21.17, 72.83, 50, lats, lons)
+    assert (exact[~inside] > 50).all() and np.isinf(boxed[~inside]).all()
+    assert np.array_equal(boxed[inside], exact[inside])
+
+    approximate = distances(21.17, 72.83, lats, lons, method='equirectangular')
+    near = exact < 100
+    assert (np.abs(approximate[near] - exact[near]) <= 0.002 * exact[near]).all()
+    print("✅ Distance methods agree with haversine")
+
+def test_match_plumbers_radius():
+    """match_plumbers with radius_km only returns plumbers inside the radius"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    preferences = {'work_type': 'Leak Repair', 'client_lat': 21.1702, 'client_lon': 72.8311}
+
+    everyone = attribute_system.match_plumbers(preferences, max_results=50)
+    nearby = attribute_system.match_plumbers(preferences, max_results=50, radius_km=100)
+    assert nearby == [p for p in everyone if p['Distance_km'] <= 100]
+    print(f"✅ {len(nearby)} of {len(everyone)} matches are within 100 km")
+
+if __name__ == "__main__":
+    test_within_matches_full_scan()
+    test_nearest_matches_full_scan()
+    test_distance_methods()
+    test_match_plumbers_radius()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for deferred startup and its phase timings
+"""
+
+import os
+import sys
+import threading
+import subprocess
+from startup import Deferred, StartupTimings, load_warm_up_queries, replay_queries
+from attribute_system import DynamicAttributeSystem
+
+def test_deferred_builds_once():
+    """Concurrent first users share one build, and a failed build is retried"""
+    builds = []
+    def factory():
+        builds.append(1)
+        if len(builds) == 1:
+            raise RuntimeError("dataset missing")
+        return {'plumbers': 20}
+
+    deferred = Deferred(factory)
+    assert not deferred.ready and not builds
+    try:
+        deferred.get('plumbers')
+        assert False, "the first build should fail"
+    except RuntimeError:
+        pass
+    assert not deferred.ready
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(deferred.get('plumbers'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [20] * 4 and len(builds) == 2 and deferred.ready
+    print("✅ Deferred objects are built once, on first use")
+
+def test_timings():
+    """Each phase is recorded in milliseconds, in order"""
+    timings = StartupTimings()
+    with timings.phase('imports'):
+        pass
+    timings.record('catalog', 0.25)
+    assert list(timings.as_dict()) == ['imports', 'catalog'] and timings.as_dict()['catalog'] == 250.0
+    assert timings.summary().endswith('catalog 250ms')
+    print("✅ Startup phases are timed")
+
+def test_replay_queries():
+    """Recorded queries are replayed into the match cache; unknown files give no queries"""
+    attribute_system = DynamicAttributeSystem()
+    attribute_system.load_dataset('enhanced_plumbers_dataset.csv')
+    queries = load_warm_up_queries('warm_up_queries.json')
+    assert queries and load_warm_up_queries('missing_queries.json') == []
+    broken = {'preferences': {'client_lat': 23.0, 'client_lon': 72.5}, 'radius_km': 'far'}
+    assert replay_queries(attribute_system, queries + [broken]) == len(queries)
+    first = queries[0]
+    attribute_system.match_plumbers(first['preferences'], max_results=first['max_results'])
+    assert attribute_system.match_cache.hits == 1
+    print("✅ Warm-up queries prime the match cache")
+
+def test_lazy_import():
+    """Importing the app in lazy mode loads neither pandas nor the catalog"""
+    code = "import sys, app; print('pandas' in sys.modules, app.matcher.ready)"
+    env = dict(os.environ, STARTUP_MODE='lazy')
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.split()[-2:] == ['False', 'False'], output
+    print("✅ Lazy startup defers the heavy imports")
+
+if __name__ == "__main__":
+    test_deferred_builds_once()
+    test_timings()
+    test_replay_queries()
+    test_lazy_import()
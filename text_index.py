@@ -0,0 +1,69 @@
+import numpy as np
+from collections import defaultdict
+from typing import List, Any
+
+
+def trigrams(text: str) -> set:
+    """Distinct 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Lowercased trigram index over the distinct values of a text column
+
+    search() answers "which values contain this token" by intersecting the
+    posting lists of the token's trigrams and only then checking the
+    surviving values with a real substring test.
+    """
+
+    def __init__(self, values: List[Any], _base: 'TrigramIndex' = None):
+        self.values = values
+        start = 0 if _base is None else len(_base.values)
+        self.lowered = ([] if _base is None else list(_base.lowered)) + \
+            [value.lower() if isinstance(value, str) else None for value in values[start:]]
+        self.is_text = np.array([lowered is not None for lowered in self.lowered] + [False])
+
+        grams = defaultdict(list)
+        for position, lowered in enumerate(self.lowered[start:], start):
+            if lowered is None:
+                continue
+            for gram in trigrams(lowered):
+                grams[gram].append(position)
+        self._grams = {} if _base is None else dict(_base._grams)
+        for gram, positions in grams.items():
+            positions = np.array(positions, dtype=np.int32)
+            if gram in self._grams:
+                positions = np.concatenate([self._grams[gram], positions])
+            self._grams[gram] = positions
+
+    def extended(self, values: List[Any]) -> 'TrigramIndex':
+        """Index over values, which must start with this index's values, indexing only the new ones"""
+        return TrigramIndex(values, _base=self)
+
+    def _candidates(self, token: str) -> np.ndarray:
+        """Values that contain every trigram of token"""
+        grams = trigrams(token)
+        if not grams:
+            # Tokens shorter than a trigram can't be narrowed down
+            return np.array([p for p, lowered in enumerate(self.lowered) if lowered is not None], dtype=np.int32)
+        postings = []
+        for gram in grams:
+            if gram not in self._grams:
+                return np.empty(0, dtype=np.int32)
+            postings.append(self._grams[gram])
+        postings.sort(key=len)
+        result = postings[0]
+        for positions in postings[1:]:
+            result = np.intersect1d(result, positions, assume_unique=True)
+        return result
+
+    def search(self, token: str) -> np.ndarray:
+        """Positions of values containing token, ignoring case"""
+        token = token.lower()
+        return np.array([p for p in self._candidates(token).tolist() if token in self.lowered[p]],
+                        dtype=np.int32)
+
+    def search_case_sensitive(self, token: str) -> np.ndarray:
+        """Positions of values containing token exactly as written"""
+        return np.array([p for p in self.search(token).tolist() if token in self.values[p]],
+                        dtype=np.int32)